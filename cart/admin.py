@@ -5,7 +5,14 @@ from .models import Cart, CartItem, DeliveryCost
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ["pkid", "id", "user", "total_items"]
+    list_display = [
+        "pkid",
+        "id",
+        "user",
+        "total_items",
+        "total_quantity",
+        "subtotal",
+    ]
     list_display_links = ["id", "user"]
     search_fields = ["id", "user__username"]
     list_filter = ["user"]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cart.services import purge_abandoned_carts, purge_unavailable_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Vacía los carritos abandonados y elimina las líneas de inventario "
+        "inactivo o no publicado"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CART_ABANDONED_DAYS,
+            help="Días sin modificaciones para considerar un carrito abandonado",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Tamaño del rango de pkid procesado por transacción",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Ejecutar sin hacer cambios reales",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        lines = purge_unavailable_lines(batch_size=batch_size, dry_run=dry_run)
+        carts, cart_lines = purge_abandoned_carts(
+            options["days"], batch_size=batch_size, dry_run=dry_run
+        )
+
+        prefix = "[DRY RUN] " if dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Líneas de inventario no disponible eliminadas: {lines}"
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Carritos abandonados vaciados: {carts} ({cart_lines} líneas)"
+            )
+        )
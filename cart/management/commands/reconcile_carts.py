@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from cart.models import Cart
+from cart.services import reconcile_cart_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula total_items, total_quantity y subtotal de los carritos "
+        "cuyos totales almacenados no coinciden con sus líneas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Cantidad de carritos (por rango de pkid) revisados por UPDATE",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pkid = Cart.objects.aggregate(last=Max("pkid"))["last"] or 0
+
+        repaired = 0
+        start = 0
+        while start < last_pkid:
+            end = start + batch_size
+            repaired += reconcile_cart_totals(
+                Cart.objects.filter(pkid__gt=start, pkid__lte=end)
+            )
+            start = end
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Se corrigieron los totales de {repaired} carritos")
+        )
@@ -1,6 +1,3 @@
-import logging
-from decimal import Decimal
-
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.manager import Manager
@@ -8,8 +5,7 @@ from django.db.models.manager import Manager
 from common.models import TimeStampedUUIDModel
 from coupons.models import Coupon
 from inventory.models import Inventory
-
-logger = logging.getLogger(__name__)
+from promotion.pricing import price_resolver
 
 User = get_user_model()
 
@@ -18,28 +14,26 @@ class Cart(TimeStampedUUIDModel):
     objects: Manager = models.Manager()
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     total_items = models.IntegerField(default=0)
+    total_quantity = models.IntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Bumped on every line or coupon change; see cart.services.bump_cart_version
+    version = models.PositiveBigIntegerField(default=0)
     coupons = models.ManyToManyField(
         Coupon, blank=True
     )  # Changed to ManyToManyField and renamed to coupons
 
     def get_total(self):
         """
-        Calculates the subtotal of all items in the cart.
+        Subtotal of all items in the cart as stored on the row.
         Does NOT include coupon discounts, taxes, or shipping.
+
+        The value is kept up to date by the line helpers in ``cart.services``;
+        ``python manage.py reconcile_carts`` repairs any drift.
         """
-        try:
-            subtotal = Decimal("0")
-            for item in self.items.all():
-                price = Decimal(str(item.inventory.store_price))
-                quantity = Decimal(str(item.quantity))
-                subtotal += price * quantity
-            return subtotal
-        except (TypeError, ValueError) as e:
-            logger.error(f"Error calculating cart subtotal: {str(e)}")
-            return Decimal("0")
+        return self.subtotal
 
     def get_total_items(self):
-        return self.items.count()
+        return self.total_items
 
     def __str__(self):
         return f"Cart for {self.user.username}"
@@ -54,7 +48,13 @@ class CartItem(TimeStampedUUIDModel):
         ordering = ["-created_at"]
 
     def get_total(self):
-        return self.quantity * self.inventory.store_price
+        # unit_price is set by CartPricing when the line has been priced
+        unit_price = getattr(self, "unit_price", None)
+        if unit_price is None:
+            unit_price = price_resolver.unit_prices([self.inventory_id])[
+                self.inventory_id
+            ]
+        return self.quantity * unit_price
 
     def __str__(self):
         return f"{self.quantity} x {self.inventory.product.name}"
@@ -15,13 +15,27 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 
 class CartSerializer(serializers.ModelSerializer):
-    items = CartItemSerializer(many=True, read_only=True)
+    items = serializers.SerializerMethodField()
     coupon = CouponSerializer(read_only=True)  # Include coupon serializer
 
     class Meta:
         model = Cart
         depth = 1
-        fields = ["id", "user", "total_items", "items", "coupon"]  # Add 'coupon' field
+        fields = [
+            "id",
+            "user",
+            "total_items",
+            "total_quantity",
+            "subtotal",
+            "items",
+            "coupon",
+        ]  # Add 'coupon' field
+
+    def get_items(self, obj):
+        # Lines come from the configured cart store (database or Redis)
+        from .store import get_cart_store
+
+        return CartItemSerializer(get_cart_store().lines(obj), many=True).data
 
 
 class DeliveryCostSerializer(serializers.ModelSerializer):
@@ -0,0 +1,803 @@
+import logging
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DecimalField,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from common.cache import get_tag_versions
+from coupons.models import Coupon
+from coupons.rules import get_coupon_rules, usage_counts, validate_coupons
+from promotion.pricing import price_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class CartPricing:
+    """
+    Prices a cart in a fixed number of queries.
+
+    Cart lines (with inventory, product and categories), the effective prices
+    for those lines and the compiled rules of the applied coupons (with their
+    usage counters) are loaded up front; subtotal, discount and total are then
+    computed in memory. Build one instance per request and hand it to every
+    consumer that needs cart totals instead of calling ``Cart.get_total()``
+    repeatedly.
+
+    Lines are read from the configured cart store (see ``cart.store``);
+    ``from_database=True`` reads the persisted ``CartItem`` rows instead.
+    """
+
+    def __init__(self, cart, user=None, from_database=False):
+        self.cart = cart
+        self.user = user
+        self.from_database = from_database
+        self.items = self._load_items()
+        self.unit_prices = self.get_unit_prices([item.inventory for item in self.items])
+
+        self.subtotal = Decimal("0")
+        for item in self.items:
+            item.unit_price = self.unit_prices[item.inventory_id]
+            item.line_total = item.unit_price * item.quantity
+            self.subtotal += item.line_total
+
+        self.refresh_coupons()
+
+    @classmethod
+    def for_user(cls, user):
+        from .models import Cart
+
+        cart, _ = Cart.objects.get_or_create(user=user)
+        return cls(cart, user=user)
+
+    @staticmethod
+    def get_unit_prices(inventories):
+        """
+        Returns ``{inventory pkid: unit price}`` for the given inventories,
+        resolved in one call by ``promotion.pricing.price_resolver``.
+        """
+        return price_resolver.unit_prices(inventory.pkid for inventory in inventories)
+
+    @property
+    def total_items(self):
+        return len(self.items)
+
+    @property
+    def total_quantity(self):
+        return sum(item.quantity for item in self.items)
+
+    def refresh_coupons(self):
+        """
+        Reloads the applied coupons and recomputes discount and total while
+        reusing the already priced lines. Call it after changing
+        ``cart.coupons``.
+
+        Coupons are validated against every line in memory from their
+        compiled rules (``coupons.rules``) and usage counters read once.
+        """
+        coupon_ids = list(
+            Coupon.objects.filter(cart=self.cart).values_list("pkid", flat=True)
+        )
+        rules = get_coupon_rules(coupon_ids)
+        self.coupon_rules = [rules[pkid] for pkid in coupon_ids if pkid in rules]
+        self.coupon_usage = usage_counts(coupon_ids, self.user)
+        results = validate_coupons(
+            self.coupon_rules,
+            self.subtotal,
+            user=self.user,
+            items=self.items,
+            usage=self.coupon_usage,
+        )
+        self.coupon_results = {
+            rule.code: results[rule.pkid] for rule in self.coupon_rules
+        }
+        self.valid_coupon_ids = {
+            pkid for pkid, result in results.items() if result["is_valid"]
+        }
+        self.discount = sum(
+            (
+                Decimal(str(rule.discount(self.subtotal)))
+                for rule in self.coupon_rules
+                if rule.pkid in self.valid_coupon_ids
+            ),
+            Decimal("0"),
+        )
+        self.total = max(Decimal("0"), self.subtotal - self.discount)
+        self.__dict__.pop("coupons", None)
+        return self
+
+    @cached_property
+    def coupons(self):
+        """
+        The applied ``Coupon`` objects, loaded only when rendered or edited;
+        ``total_uses``/``user_uses`` come from the counters already read.
+        """
+        coupons = (
+            Coupon.objects.filter(pk__in=[rule.pkid for rule in self.coupon_rules])
+            .select_related("fixed_price_coupon", "percentage_coupon")
+            .prefetch_related("categories", "products")
+            .in_bulk()
+        )
+        for pkid, coupon in coupons.items():
+            coupon.total_uses, coupon.user_uses = self.coupon_usage[pkid]
+        return [
+            coupons[rule.pkid] for rule in self.coupon_rules if rule.pkid in coupons
+        ]
+
+    @property
+    def valid_coupons(self):
+        return [
+            coupon for coupon in self.coupons if coupon.pkid in self.valid_coupon_ids
+        ]
+
+    def unit_price_for(self, inventory_id):
+        return self.unit_prices.get(inventory_id)
+
+    def as_dict(self):
+        return {
+            "subtotal": self.subtotal,
+            "discount_amount": self.discount,
+            "final_total": self.total,
+        }
+
+    def _load_items(self):
+        # Checkout passes from_database=True after flushing the cart store
+        from .store import DatabaseCartStore, get_cart_store
+
+        store = DatabaseCartStore() if self.from_database else get_cart_store()
+        return store.lines(self.cart)
+
+
+def unit_price_expression(inventory_field="inventory"):
+    """
+    SQL counterpart of ``CartPricing.get_unit_prices``: the effective price
+    of ``inventory_field`` or its ``store_price``.
+    """
+    return Coalesce(
+        F(f"{inventory_field}__effective_price__price"),
+        F(f"{inventory_field}__store_price"),
+    )
+
+
+def cart_version_key(user_id):
+    return f"cart:version:{user_id}"
+
+
+def get_cart_version(user_id):
+    """
+    Current version of the user's cart: one cache lookup, falling back to the
+    ``Cart.version`` column when the key is missing. Returns ``None`` when the
+    user has no cart yet.
+    """
+    return get_cart_versions(user_id)[0]
+
+
+def get_cart_versions(user_id, tags=()):
+    """
+    Returns ``(cart version, {tag: version})`` read with one ``get_many``;
+    the cart version follows ``get_cart_version``.
+    """
+    from .models import Cart
+
+    key = cart_version_key(user_id)
+    versions = get_tag_versions(tags, keys=[key])
+    version = versions.pop(key, None)
+    if version is None:
+        version = (
+            Cart.objects.filter(user_id=user_id)
+            .values_list("version", flat=True)
+            .first()
+        )
+        if version is None:
+            return None, versions
+        # add() so a concurrent bump is never overwritten by an older value
+        cache.add(key, version, timeout=None)
+        version = cache.get(key, version)
+    return version, versions
+
+
+def _incr_cart_version(user_id):
+    key = cart_version_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_cart_version(user_id)
+        return cache.incr(key)
+
+
+def bump_cart_version(cart):
+    """
+    Increments the cart version in the cache now and again once the
+    transaction commits, and returns the value expected after the commit.
+    A read racing with the write may tag the old lines with the first
+    version, never with the final one. Callers writing the cart row store
+    the returned value in ``Cart.version`` so the column stays a floor for
+    the cache counter.
+    """
+    user_id = cart.user_id
+    version = _incr_cart_version(user_id) + 1
+    transaction.on_commit(lambda: _incr_cart_version(user_id), robust=True)
+    cart.version = version
+    return version
+
+
+def _bump_totals(cart, items=0, quantity=0, amount=Decimal("0")):
+    """
+    Applies a delta to the denormalized cart totals with a single UPDATE.
+    The stored values are refreshed on ``cart`` afterwards so callers can
+    serialize it without another query.
+    """
+    from .models import Cart
+
+    Cart.objects.filter(pk=cart.pk).update(
+        total_items=F("total_items") + items,
+        total_quantity=F("total_quantity") + quantity,
+        subtotal=F("subtotal") + amount,
+        version=bump_cart_version(cart),
+        updated_at=timezone.now(),
+    )
+    cart.refresh_from_db(fields=["total_items", "total_quantity", "subtotal"])
+    return cart
+
+
+def add_line(cart, inventory, quantity):
+    from .models import CartItem
+
+    unit_price = CartPricing.get_unit_prices([inventory])[inventory.pkid]
+    with transaction.atomic():
+        cart_item = CartItem.objects.create(
+            cart=cart, inventory=inventory, quantity=quantity
+        )
+        _bump_totals(cart, items=1, quantity=quantity, amount=unit_price * quantity)
+    return cart_item
+
+
+def change_line_quantity(cart_item, delta):
+    """
+    Adds ``delta`` (positive or negative) to the line quantity. The line and
+    the cart totals are both updated with ``F()`` expressions so concurrent
+    requests do not overwrite each other.
+    """
+    from .models import CartItem
+
+    unit_price = CartPricing.get_unit_prices([cart_item.inventory])[
+        cart_item.inventory_id
+    ]
+    with transaction.atomic():
+        CartItem.objects.filter(pk=cart_item.pk).update(
+            quantity=F("quantity") + delta, updated_at=timezone.now()
+        )
+        _bump_totals(cart_item.cart, quantity=delta, amount=unit_price * delta)
+    cart_item.refresh_from_db(fields=["quantity"])
+    return cart_item
+
+
+def remove_line(cart_item):
+    from .models import CartItem
+
+    unit_price = CartPricing.get_unit_prices([cart_item.inventory])[
+        cart_item.inventory_id
+    ]
+    with transaction.atomic():
+        # Lock the line so the quantity subtracted is the one being deleted
+        quantity = (
+            CartItem.objects.select_for_update()
+            .filter(pk=cart_item.pk)
+            .values_list("quantity", flat=True)
+            .first()
+        )
+        if quantity is None:
+            return cart_item.cart
+        CartItem.objects.filter(pk=cart_item.pk).delete()
+        return _bump_totals(
+            cart_item.cart, items=-1, quantity=-quantity, amount=-unit_price * quantity
+        )
+
+
+def clear_cart(cart, clear_coupons=False):
+    from .models import Cart
+    from .store import get_cart_store
+
+    with transaction.atomic():
+        cart.items.all().delete()
+        Cart.objects.filter(pk=cart.pk).update(
+            total_items=0,
+            total_quantity=0,
+            subtotal=Decimal("0"),
+            version=bump_cart_version(cart),
+            updated_at=timezone.now(),
+        )
+        if clear_coupons:
+            cart.coupons.clear()
+    get_cart_store().forget(cart)
+    cart.total_items = 0
+    cart.total_quantity = 0
+    cart.subtotal = Decimal("0")
+    return cart
+
+
+def reconcile_cart_totals(queryset=None):
+    """
+    Recomputes ``total_items``, ``total_quantity`` and ``subtotal`` from the
+    cart lines for the carts in ``queryset`` whose stored values drifted, in
+    a single UPDATE. Returns the number of repaired carts.
+    """
+    from .models import Cart, CartItem
+
+    if queryset is None:
+        queryset = Cart.objects.all()
+
+    lines = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    items = Coalesce(Subquery(lines.annotate(n=Count("pk")).values("n")), 0)
+    quantity = Coalesce(Subquery(lines.annotate(n=Sum("quantity")).values("n")), 0)
+    subtotal = Coalesce(
+        Subquery(
+            lines.annotate(
+                n=Sum(
+                    F("quantity") * unit_price_expression(),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            ).values("n")
+        ),
+        Value(Decimal("0")),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+    drifted = queryset.annotate(
+        real_items=items,
+        real_quantity=quantity,
+        real_subtotal=subtotal,
+    ).exclude(
+        total_items=F("real_items"),
+        total_quantity=F("real_quantity"),
+        subtotal=F("real_subtotal"),
+    )
+    return Cart.objects.filter(pk__in=drifted.values("pk")).update(
+        total_items=items,
+        total_quantity=quantity,
+        subtotal=subtotal,
+    )
+
+
+def _available_units(inventory):
+    stock = getattr(inventory, "inventory_stock", None)
+    return stock.available_units if stock is not None else 0
+
+
+def sync_lines(cart, items_data, mode="replace"):
+    """
+    Applies the lines sent by the frontend to ``cart`` as a set-based diff.
+
+    ``items_data`` is a list of ``{"inventory": {"id": ...}, "quantity": n}``.
+    With ``mode="replace"`` the cart ends up with exactly those lines; with
+    ``mode="merge"`` lines that are not mentioned are kept. Quantities above
+    the available stock are clamped and unknown or out of stock inventories
+    are skipped; each incoming line gets an entry in the returned results
+    instead of aborting the whole sync.
+
+    Returns ``(cart, results)``. The work is a constant number of queries:
+    one ``id__in`` lookup, one ``bulk_create``, one ``bulk_update`` and one
+    delete, plus the cart totals update.
+    """
+    results = []
+    requested = {}
+    for index, item_data in enumerate(items_data):
+        inventory_id = (item_data.get("inventory") or {}).get("id")
+        try:
+            inventory_id = str(uuid.UUID(str(inventory_id)))
+            quantity = int(item_data.get("quantity", 1))
+        except (TypeError, ValueError):
+            quantity = 0
+        if not inventory_id or quantity < 1:
+            results.append(
+                {"index": index, "inventory_id": inventory_id, "status": "invalid"}
+            )
+            continue
+        # Repeated inventories are added up into one line
+        requested[inventory_id] = requested.get(inventory_id, 0) + quantity
+
+    from .store import get_cart_store
+
+    results.extend(get_cart_store().set_quantities(cart, requested, mode=mode))
+    return cart, results
+
+
+def apply_line_quantities(cart, requested, mode="replace"):
+    """
+    Diffs ``requested`` (``{inventory uuid str: quantity}``) against the
+    cart lines and applies it with bulk operations, clamping to available
+    stock. Returns one result per requested inventory and leaves the stored
+    totals on ``cart`` up to date.
+    """
+    from inventory.models import Inventory
+
+    from .models import Cart, CartItem
+
+    results = []
+    with transaction.atomic():
+        Cart.objects.select_for_update().filter(pk=cart.pk).first()
+
+        inventories = {
+            str(inventory.id): inventory
+            for inventory in Inventory.objects.select_related("inventory_stock").filter(
+                id__in=list(requested)
+            )
+        }
+        existing = {
+            str(item.inventory.id): item
+            for item in cart.items.select_related("inventory__inventory_stock")
+        }
+
+        to_create, to_update, to_delete = [], [], []
+        for inventory_id, quantity in requested.items():
+            inventory = inventories.get(inventory_id)
+            result = {"inventory_id": inventory_id, "requested": quantity}
+            results.append(result)
+            if inventory is None:
+                result["status"] = "unknown_inventory"
+                continue
+
+            available = _available_units(inventory)
+            line = existing.get(inventory_id)
+            if available <= 0:
+                result.update(status="out_of_stock", available=0)
+                if line is not None and mode == "replace":
+                    to_delete.append(line.pk)
+                continue
+
+            final_quantity = min(quantity, available)
+            result["quantity"] = final_quantity
+            if final_quantity < quantity:
+                result.update(status="clamped", available=available)
+            if line is None:
+                to_create.append(
+                    CartItem(cart=cart, inventory=inventory, quantity=final_quantity)
+                )
+                result.setdefault("status", "created")
+            elif line.quantity != final_quantity:
+                line.quantity = final_quantity
+                line.updated_at = timezone.now()
+                to_update.append(line)
+                result.setdefault("status", "updated")
+            else:
+                result.setdefault("status", "unchanged")
+
+        if mode == "replace":
+            to_delete.extend(
+                line.pk
+                for inventory_id, line in existing.items()
+                if inventory_id not in requested
+            )
+
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ["quantity", "updated_at"])
+        if to_delete:
+            CartItem.objects.filter(pk__in=to_delete).delete()
+
+        deleted = set(to_delete)
+        final_lines = [
+            line for line in existing.values() if line.pk not in deleted
+        ] + to_create
+        unit_prices = CartPricing.get_unit_prices(
+            line.inventory for line in final_lines
+        )
+        cart.total_items = len(final_lines)
+        cart.total_quantity = sum(line.quantity for line in final_lines)
+        cart.subtotal = sum(
+            (unit_prices[line.inventory_id] * line.quantity for line in final_lines),
+            Decimal("0"),
+        )
+        Cart.objects.filter(pk=cart.pk).update(
+            total_items=cart.total_items,
+            total_quantity=cart.total_quantity,
+            subtotal=cart.subtotal,
+            version=bump_cart_version(cart),
+            updated_at=timezone.now(),
+        )
+
+    return results
+
+
+class CartBatch:
+    """
+    Applies an ordered list of cart operations in one transaction.
+
+    Line operations are folded in memory into the final quantities and then
+    written through the cart store's ``set_quantities``; coupon operations
+    are folded into the final set of codes. Coupons are validated once,
+    against the final cart, in a single pricing pass. Supported operations::
+
+        {"op": "add", "inventory_id": ..., "quantity": 1}
+        {"op": "remove", "inventory_id": ...}
+        {"op": "increase" | "decrease", "inventory_id": ..., "quantity": 1}
+        {"op": "set_quantity", "inventory_id": ..., "quantity": n}
+        {"op": "apply_coupon" | "remove_coupon", "code": ...}
+        {"op": "clear"}
+        {"op": "remove_all_coupons"}
+    """
+
+    LINE_OPERATIONS = ("add", "remove", "increase", "decrease", "set_quantity")
+    COUPON_OPERATIONS = ("apply_coupon", "remove_coupon", "remove_all_coupons")
+    OPERATIONS = LINE_OPERATIONS + COUPON_OPERATIONS + ("clear",)
+
+    def __init__(self, cart, user):
+        self.cart = cart
+        self.user = user
+        self.results = []
+        self.line_results = []
+        self.coupon_errors = {}
+
+    def run(self, operations):
+        """Returns the final ``CartPricing`` of the cart."""
+        from .models import Cart
+        from .store import get_cart_store
+
+        store = get_cart_store()
+        with transaction.atomic():
+            Cart.objects.select_for_update().filter(pk=self.cart.pk).first()
+            self.quantities = store.quantities(self.cart)
+            self.coupons = list(self.cart.coupons.all())
+            self.initial_lines = dict(self.quantities)
+            self.initial_coupons = {coupon.pk for coupon in self.coupons}
+            self.coupons_by_code = self._load_coupons(operations)
+
+            for index, operation in enumerate(operations):
+                result = {"index": index, "op": operation.get("op")}
+                if result["op"] in self.COUPON_OPERATIONS:
+                    result["code"] = operation.get("code")
+                error = self._apply(operation)
+                result["status"] = "error" if error else "ok"
+                if error:
+                    result["error"] = error
+                self.results.append(result)
+
+            if self.quantities != self.initial_lines:
+                self.line_results = store.set_quantities(self.cart, self.quantities)
+
+            pricing = self._save_coupons()
+
+        for result in self.results:
+            if result["op"] == "apply_coupon" and result["status"] == "ok":
+                error = self.coupon_errors.get(result["code"])
+                if error:
+                    result.update(status="error", error=error)
+        return pricing
+
+    def _apply(self, operation):
+        op = operation.get("op")
+        if op not in self.OPERATIONS:
+            return f"Operación desconocida: {op}"
+        if op == "clear":
+            self.quantities.clear()
+            self.coupons = []
+            return None
+        if op in self.COUPON_OPERATIONS:
+            return self._apply_coupon_operation(op, operation.get("code"))
+
+        try:
+            inventory_id = str(uuid.UUID(str(operation.get("inventory_id"))))
+            quantity = int(operation.get("quantity", 1))
+        except (TypeError, ValueError):
+            return "inventory_id y quantity deben ser válidos"
+        if quantity < (0 if op == "set_quantity" else 1):
+            return "quantity debe ser mayor que cero"
+
+        current = self.quantities.get(inventory_id)
+        if op == "add":
+            if current is not None:
+                return "Item is already in cart"
+            self.quantities[inventory_id] = quantity
+            return None
+        if current is None:
+            return "Item is not in cart"
+        if op == "increase":
+            quantity = current + quantity
+        elif op == "decrease":
+            quantity = current - quantity
+        elif op == "remove":
+            quantity = 0
+
+        if quantity <= 0:
+            del self.quantities[inventory_id]
+        else:
+            self.quantities[inventory_id] = quantity
+        return None
+
+    def _apply_coupon_operation(self, op, code):
+        if op == "remove_all_coupons":
+            self.coupons = []
+            return None
+
+        coupon = self.coupons_by_code.get(code)
+        if coupon is None:
+            return "Cupón no encontrado"
+        if op == "remove_coupon":
+            if coupon not in self.coupons:
+                return f"El cupón {code} no está aplicado al carrito"
+            self.coupons.remove(coupon)
+            return None
+
+        if coupon in self.coupons:
+            return None
+        if self.coupons and not coupon.can_combine:
+            return "Este cupón no se puede combinar con otros cupones."
+        if any(not applied.can_combine for applied in self.coupons):
+            return "No se puede aplicar este cupón con los cupones existentes."
+        self.coupons.append(coupon)
+        return None
+
+    def _save_coupons(self):
+        """
+        Stores the final coupon set and prices the cart once. Newly applied
+        coupons that are not valid for the final cart are dropped again and
+        reported in ``coupon_errors``.
+        """
+        final = {coupon.pk for coupon in self.coupons}
+        if final != self.initial_coupons:
+            self.cart.coupons.set(self.coupons)
+
+        pricing = CartPricing(self.cart, user=self.user)
+        rejected = [
+            coupon
+            for coupon in pricing.coupons
+            if coupon.pk not in self.initial_coupons
+            and not pricing.coupon_results[coupon.code]["is_valid"]
+        ]
+        if rejected:
+            for coupon in rejected:
+                self.coupon_errors[coupon.code] = pricing.coupon_results[coupon.code][
+                    "message"
+                ]
+            self.cart.coupons.remove(*rejected)
+            pricing.refresh_coupons()
+        return pricing
+
+    def _load_coupons(self, operations):
+        codes = {
+            operation.get("code")
+            for operation in operations
+            if operation.get("op") in ("apply_coupon", "remove_coupon")
+        }
+        codes.discard(None)
+        by_code = {coupon.code: coupon for coupon in self.coupons}
+        missing = codes - set(by_code)
+        if missing:
+            by_code.update(
+                (coupon.code, coupon)
+                for coupon in Coupon.objects.filter(code__in=missing)
+            )
+        return by_code
+
+
+def _pk_ranges(queryset, batch_size):
+    bounds = queryset.aggregate(first=Min("pkid"), last=Max("pkid"))
+    if bounds["first"] is None:
+        return
+    start = bounds["first"]
+    while start <= bounds["last"]:
+        yield start, start + batch_size
+        start += batch_size
+
+
+def purge_abandoned_carts(days, batch_size=1000, dry_run=False):
+    """
+    Empties carts that have not been touched for ``days`` days.
+
+    ``Cart`` rows themselves are kept (one per user, see ``cart.signals``);
+    their lines and coupons are removed and the totals reset. Carts are
+    walked in ``pkid`` ranges of ``batch_size`` with one short transaction
+    per range, so locks and WAL stay bounded. Carts with unflushed changes
+    in the cart store are skipped. Returns ``(carts, lines)`` purged.
+    """
+    from .models import Cart, CartItem
+    from .store import get_cart_store
+
+    cutoff = timezone.now() - timedelta(days=days)
+    dirty = get_cart_store().dirty_user_ids()
+    purged_carts = purged_lines = 0
+
+    for start, end in _pk_ranges(Cart.objects.all(), batch_size):
+        with transaction.atomic():
+            carts = (
+                Cart.objects.filter(
+                    pkid__gte=start,
+                    pkid__lt=end,
+                    updated_at__lt=cutoff,
+                )
+                .filter(Q(total_items__gt=0) | Q(coupons__isnull=False))
+                .exclude(user_id__in=dirty)
+                .distinct()
+            )
+            carts = list(carts.values_list("pkid", "user_id"))
+            if not carts:
+                continue
+            cart_ids = [pkid for pkid, _ in carts]
+            purged_carts += len(carts)
+            if dry_run:
+                purged_lines += CartItem.objects.filter(cart_id__in=cart_ids).count()
+                continue
+
+            purged_lines += CartItem.objects.filter(cart_id__in=cart_ids).delete()[0]
+            Cart.coupons.through.objects.filter(cart_id__in=cart_ids).delete()
+            # Timestamps are left alone so purged carts are not picked up again
+            Cart.objects.filter(pkid__in=cart_ids).update(
+                total_items=0,
+                total_quantity=0,
+                subtotal=Decimal("0"),
+                version=F("version") + 1,
+            )
+            # The cached versions fall back to the bumped column once it is
+            # visible; deleting them earlier lets a reader re-seed the old one
+            transaction.on_commit(
+                partial(
+                    cache.delete_many,
+                    [cart_version_key(user_id) for _, user_id in carts],
+                )
+            )
+
+    return purged_carts, purged_lines
+
+
+def purge_unavailable_lines(batch_size=1000, dry_run=False):
+    """
+    Deletes cart lines whose inventory is inactive or unpublished, walking
+    ``CartItem`` in ``pkid`` ranges, and repairs the totals of the affected
+    carts. Lines for deleted inventory are already removed by the cascade.
+    Returns the number of lines removed.
+    """
+    from .models import Cart, CartItem
+    from .store import get_cart_store
+
+    store = get_cart_store()
+    dirty = store.dirty_user_ids()
+    unavailable = Q(inventory__is_active=False) | Q(inventory__published_status=False)
+    removed = 0
+
+    for start, end in _pk_ranges(CartItem.objects.all(), batch_size):
+        with transaction.atomic():
+            lines = list(
+                CartItem.objects.filter(pkid__gte=start, pkid__lt=end)
+                .filter(unavailable)
+                .exclude(cart__user_id__in=dirty)
+                .values_list("pkid", "cart_id", "cart__user_id")
+            )
+            if not lines:
+                continue
+            removed += len(lines)
+            if dry_run:
+                continue
+
+            CartItem.objects.filter(pkid__in=[pkid for pkid, _, _ in lines]).delete()
+            carts = {cart_id: user_id for _, cart_id, user_id in lines}
+            reconcile_cart_totals(Cart.objects.filter(pkid__in=carts))
+            Cart.objects.filter(pkid__in=carts).update(version=F("version") + 1)
+            transaction.on_commit(
+                partial(
+                    cache.delete_many,
+                    [cart_version_key(user_id) for user_id in carts.values()],
+                )
+            )
+            # Cached copies of these carts are rebuilt from the rows on next read
+            for cart_id, user_id in carts.items():
+                store.forget(Cart(pkid=cart_id, user_id=user_id))
+
+    return removed
@@ -1,9 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 
 from config.settings import AUTH_USER_MODEL
 
 from .models import Cart
+from .services import bump_cart_version
 
 
 @receiver(post_save, sender=AUTH_USER_MODEL)
@@ -15,3 +16,16 @@ def create_user_cart(sender, instance, created, **kwargs):
 @receiver(post_save, sender=AUTH_USER_MODEL)
 def save_user_cart(sender, instance, **kwargs):
     instance.cart.save()
+
+
+@receiver(m2m_changed, sender=Cart.coupons.through)
+def bump_cart_version_on_coupon_change(sender, instance, action, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        pk_set = kwargs.get("pk_set") or ()
+        carts = Cart.objects.filter(pk__in=pk_set)
+    else:
+        carts = [instance]
+    for cart in carts:
+        Cart.objects.filter(pk=cart.pk).update(version=bump_cart_version(cart))
@@ -0,0 +1,299 @@
+"""
+Cart line storage backends.
+
+``DatabaseCartStore`` reads and writes ``CartItem`` rows directly (the
+default). ``RedisCartStore`` keeps the lines of active carts in a Redis hash
+per user and marks the cart dirty; ``cart.tasks.flush_dirty_carts`` writes
+dirty carts back to ``Cart``/``CartItem`` and checkout flushes the cart it is
+about to charge. Select the backend with ``settings.CART_STORAGE_BACKEND``.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from redis.exceptions import WatchError
+
+from common.redis import get_redis_connection
+from inventory.models import Inventory
+
+from .models import Cart, CartItem
+from .services import (
+    add_line,
+    apply_line_quantities,
+    bump_cart_version,
+    change_line_quantity,
+    clear_cart,
+    remove_line,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseCartStore:
+    def quantities(self, cart):
+        """Returns ``{inventory uuid str: quantity}`` for the cart lines."""
+        return {
+            str(inventory_id): quantity
+            for inventory_id, quantity in cart.items.values_list(
+                "inventory__id", "quantity"
+            )
+        }
+
+    def lines(self, cart):
+        # Inventories come annotated for InventorySerializer (see for_catalog)
+        return list(
+            cart.items.prefetch_related(
+                Prefetch("inventory", queryset=Inventory.objects.for_catalog())
+            )
+        )
+
+    def get_line(self, cart, inventory_id):
+        return (
+            cart.items.select_related("inventory__inventory_stock")
+            .filter(inventory__id=inventory_id)
+            .first()
+        )
+
+    def add(self, cart, inventory, quantity):
+        return add_line(cart, inventory, quantity)
+
+    def change_quantity(self, cart_item, delta):
+        return change_line_quantity(cart_item, delta)
+
+    def remove(self, cart_item):
+        return remove_line(cart_item)
+
+    def clear(self, cart, clear_coupons=False):
+        return clear_cart(cart, clear_coupons=clear_coupons)
+
+    def set_quantities(self, cart, quantities, mode="replace"):
+        return apply_line_quantities(cart, quantities, mode=mode)
+
+    def flush(self, cart):
+        return []
+
+    def dirty_user_ids(self):
+        return []
+
+    def forget(self, cart):
+        pass
+
+
+class RedisCartStore(DatabaseCartStore):
+    """
+    Lines live in the hash ``cart:lines:<user id>`` as
+    ``{inventory uuid: quantity}``; an empty cart is represented by the
+    ``LOADED`` marker field alone so it is not hydrated from Postgres again.
+    Every write adds the user id to the ``cart:dirty`` set and bumps the
+    cart version in the cache only; the column catches up on flush.
+    """
+
+    LOADED = "__loaded__"
+    DIRTY_KEY = "cart:dirty"
+
+    # HINCRBY that drops the field when the quantity reaches zero
+    CHANGE_SCRIPT = """
+        local quantity = redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+        if quantity <= 0 then
+            redis.call('HDEL', KEYS[1], ARGV[1])
+        end
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        redis.call('SADD', KEYS[2], ARGV[4])
+        return quantity
+    """
+
+    def __init__(self):
+        self.redis = get_redis_connection()
+        self.ttl = settings.CART_REDIS_TTL
+        self.change_script = self.redis.register_script(self.CHANGE_SCRIPT)
+
+    def key(self, cart):
+        return f"cart:lines:{cart.user_id}"
+
+    def quantities(self, cart):
+        """Returns ``{inventory uuid str: quantity}``, hydrating from Postgres."""
+        key = self.key(cart)
+        raw = self.redis.hgetall(key)
+        if not raw:
+            mapping = super().quantities(cart)
+            pipe = self.redis.pipeline()
+            pipe.hset(key, mapping={self.LOADED: 1, **mapping})
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+            return mapping
+        return {
+            field.decode(): int(quantity)
+            for field, quantity in raw.items()
+            if field.decode() != self.LOADED
+        }
+
+    def lines(self, cart):
+        quantities = self.quantities(cart)
+        inventories = Inventory.objects.for_catalog().filter(id__in=list(quantities))
+        return [
+            CartItem(
+                cart=cart, inventory=inventory, quantity=quantities[str(inventory.id)]
+            )
+            for inventory in inventories
+        ]
+
+    def get_line(self, cart, inventory_id):
+        quantity = self.quantities(cart).get(str(inventory_id))
+        if quantity is None:
+            return None
+        inventory = (
+            Inventory.objects.select_related("inventory_stock")
+            .filter(id=inventory_id)
+            .first()
+        )
+        if inventory is None:
+            return None
+        return CartItem(cart=cart, inventory=inventory, quantity=quantity)
+
+    def add(self, cart, inventory, quantity):
+        self.quantities(cart)
+        key = self.key(cart)
+        pipe = self.redis.pipeline()
+        pipe.hsetnx(key, str(inventory.id), quantity)
+        pipe.expire(key, self.ttl)
+        pipe.sadd(self.DIRTY_KEY, cart.user_id)
+        pipe.execute()
+        bump_cart_version(cart)
+        self._refresh_counters(cart)
+        return CartItem(cart=cart, inventory=inventory, quantity=quantity)
+
+    def change_quantity(self, cart_item, delta):
+        cart = cart_item.cart
+        cart_item.quantity = self.change_script(
+            keys=[self.key(cart), self.DIRTY_KEY],
+            args=[str(cart_item.inventory.id), delta, self.ttl, cart.user_id],
+        )
+        bump_cart_version(cart)
+        self._refresh_counters(cart)
+        return cart_item
+
+    def remove(self, cart_item):
+        cart = cart_item.cart
+        pipe = self.redis.pipeline()
+        pipe.hdel(self.key(cart), str(cart_item.inventory.id))
+        pipe.sadd(self.DIRTY_KEY, cart.user_id)
+        pipe.execute()
+        bump_cart_version(cart)
+        return self._refresh_counters(cart)
+
+    def set_quantities(self, cart, quantities, mode="replace"):
+        """
+        Bulk writes go straight to Postgres, then the hash is rebuilt from
+        the clamped result so both sides agree.
+        """
+        self.flush(cart)
+        results = apply_line_quantities(cart, quantities, mode=mode)
+        self.forget(cart)
+        return results
+
+    def flush(self, cart):
+        """
+        Writes the hash back to ``CartItem``. The hash is read and the dirty
+        flag cleared in one transaction, so a write racing with the flush
+        marks it dirty again; if the write fails the flag is restored so the
+        cart is retried.
+        """
+        key = self.key(cart)
+        pipe = self.redis.pipeline()
+        pipe.hgetall(key)
+        pipe.srem(self.DIRTY_KEY, cart.user_id)
+        raw, was_dirty = pipe.execute()
+        if not was_dirty:
+            return []
+        if not raw:
+            # CART_REDIS_TTL supera con creces el intervalo del flush: un hash
+            # sucio ausente fue desalojado por Redis y sus cambios se pierden
+            logger.warning(
+                f"Cart {cart.id} was dirty but its Redis hash expired; "
+                "unflushed changes were lost"
+            )
+            return []
+        quantities = {
+            field.decode(): int(quantity)
+            for field, quantity in raw.items()
+            if field.decode() != self.LOADED
+        }
+        try:
+            results = apply_line_quantities(cart, quantities)
+        except Exception:
+            self.redis.sadd(self.DIRTY_KEY, cart.user_id)
+            raise
+        self._store_persisted(cart, raw)
+        return results
+
+    def _store_persisted(self, cart, flushed):
+        """
+        Rewrites the hash with the quantities persisted by the flush (clamped
+        to stock) unless it changed meanwhile; a concurrent write leaves the
+        cart dirty and the next flush reconciles it.
+        """
+        key = self.key(cart)
+        mapping = super().quantities(cart)
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.hgetall(key) != flushed:
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.hset(key, mapping={self.LOADED: 1, **mapping})
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+            except WatchError:
+                pass
+
+    def forget(self, cart):
+        pipe = self.redis.pipeline()
+        pipe.delete(self.key(cart))
+        pipe.srem(self.DIRTY_KEY, cart.user_id)
+        pipe.execute()
+
+    def dirty_user_ids(self):
+        return [int(user_id) for user_id in self.redis.sscan_iter(self.DIRTY_KEY)]
+
+    def _refresh_counters(self, cart):
+        # Only the counters are known without pricing; subtotal is stored on flush
+        quantities = self.quantities(cart)
+        cart.total_items = len(quantities)
+        cart.total_quantity = sum(quantities.values())
+        return cart
+
+
+STORAGE_BACKENDS = {
+    "database": "cart.store.DatabaseCartStore",
+    "redis": "cart.store.RedisCartStore",
+}
+
+_store = None
+
+
+def get_cart_store():
+    global _store
+    if _store is None:
+        backend = settings.CART_STORAGE_BACKEND
+        _store = import_string(STORAGE_BACKENDS.get(backend, backend))()
+    return _store
+
+
+def flush_cart(cart):
+    """Makes the persisted ``CartItem`` rows match the active cart store."""
+    return get_cart_store().flush(cart)
+
+
+def flush_carts(user_ids):
+    store = get_cart_store()
+    flushed = 0
+    for cart in Cart.objects.filter(user_id__in=user_ids):
+        try:
+            store.flush(cart)
+            flushed += 1
+        except Exception as e:
+            logger.error(f"Error flushing cart {cart.id}: {str(e)}")
+    return flushed
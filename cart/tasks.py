@@ -0,0 +1,32 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from .services import purge_abandoned_carts, purge_unavailable_lines
+from .store import flush_carts, get_cart_store
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_dirty_carts():
+    """Persiste en Cart/CartItem los carritos modificados en Redis."""
+    user_ids = get_cart_store().dirty_user_ids()
+    if not user_ids:
+        return 0
+    flushed = flush_carts(user_ids)
+    logger.info(f"Carritos sincronizados con la base de datos: {flushed}")
+    return flushed
+
+
+@shared_task
+def purge_abandoned_carts_task():
+    """Limpieza diaria de carritos abandonados y líneas no disponibles."""
+    lines = purge_unavailable_lines()
+    carts, cart_lines = purge_abandoned_carts(settings.CART_ABANDONED_DAYS)
+    logger.info(
+        f"Líneas no disponibles eliminadas: {lines}; carritos vaciados: "
+        f"{carts} ({cart_lines} líneas)"
+    )
+    return {"unavailable_lines": lines, "carts": carts, "cart_lines": cart_lines}
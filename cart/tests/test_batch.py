@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from cart.services import add_line
+from common.testing import locmem_caches
+from coupons.models import Coupon, FixedPriceCoupon
+from inventory.models import Inventory, Stock
+from products.models import Product
+
+User = get_user_model()
+
+
+@locmem_caches
+class CartBatchViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="batch", email="batch@example.com", password="testpass123"
+        )
+        self.cart = self.user.cart
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.inventories = []
+        for i in range(3):
+            product = Product.objects.create(name=f"product {i}")
+            inventory = Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("20.00"),
+                store_price=Decimal("20.00"),
+            )
+            Stock.objects.create(inventory=inventory, units=10)
+            self.inventories.append(inventory)
+        add_line(self.cart, self.inventories[0], 1)
+
+    def post(self, operations):
+        return self.client.post(
+            "/api/cart/batch/", {"operations": operations}, format="json", secure=True
+        )
+
+    def test_operations_are_applied_in_order(self):
+        coupon = Coupon.objects.create(
+            name="five",
+            fixed_price_coupon=FixedPriceCoupon.objects.create(
+                discount_price=Decimal("5.00"), uses=0
+            ),
+        )
+
+        response = self.post(
+            [
+                {"op": "add", "inventory_id": str(self.inventories[1].id)},
+                {"op": "increase", "inventory_id": str(self.inventories[1].id)},
+                {"op": "remove", "inventory_id": str(self.inventories[0].id)},
+                {"op": "decrease", "inventory_id": str(self.inventories[2].id)},
+                {"op": "apply_coupon", "code": coupon.code},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["ok", "ok", "ok", "error", "ok"])
+        self.assertEqual(response.data["total_items"], 1)
+        self.assertEqual(response.data["total_quantity"], 2)
+        self.assertEqual(response.data["subtotal"], Decimal("40.00"))
+        self.assertEqual(response.data["cart_total"], Decimal("35.00"))
+
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.subtotal, Decimal("40.00"))
+        self.assertEqual(list(self.cart.coupons.all()), [coupon])
+
+    def test_coupon_invalid_for_final_cart_is_not_applied(self):
+        coupon = Coupon.objects.create(
+            name="minimum",
+            min_purchase_amount=Decimal("100.00"),
+            fixed_price_coupon=FixedPriceCoupon.objects.create(
+                discount_price=Decimal("5.00"), uses=0
+            ),
+        )
+
+        response = self.post([{"op": "apply_coupon", "code": coupon.code}])
+
+        self.assertEqual(response.data["results"][0]["status"], "error")
+        self.assertFalse(self.cart.coupons.exists())
+
+    def test_rejects_malformed_payload(self):
+        response = self.client.post("/api/cart/batch/", {}, format="json", secure=True)
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,91 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from cart.services import add_line, get_cart_version
+from common.testing import locmem_caches
+from coupons.signals import invalidate_coupon_rules
+from inventory.models import Inventory, Stock
+from products.models import Product
+from promotion.pricing import refresh_effective_prices
+
+User = get_user_model()
+
+
+@locmem_caches
+class CartETagTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="etag", email="etag@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        product = Product.objects.create(name="product")
+        self.inventory = Inventory.objects.create(
+            product=product,
+            retail_price=Decimal("10.00"),
+            store_price=Decimal("10.00"),
+        )
+        Stock.objects.create(inventory=self.inventory, units=10)
+
+    def get_items(self, **headers):
+        return self.client.get("/api/cart/cart-items/", secure=True, headers=headers)
+
+    def test_unchanged_cart_answers_304_without_queries(self):
+        etag = self.get_items()["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.get_items(If_None_Match=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_line_and_coupon_changes_bump_the_version(self):
+        etag = self.get_items()["ETag"]
+
+        add_line(self.user.cart, self.inventory, 1)
+        response = self.get_items(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.user.cart.coupons.clear()
+        self.assertEqual(self.get_items(If_None_Match=etag).status_code, 200)
+
+    def test_price_and_coupon_changes_change_the_etag(self):
+        etag = self.get_items()["ETag"]
+
+        refresh_effective_prices([self.inventory.pkid])
+        response = self.get_items(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        invalidate_coupon_rules([1])
+        self.assertEqual(self.get_items(If_None_Match=etag).status_code, 200)
+
+    def test_total_is_always_computed(self):
+        etag = self.get_items()["ETag"]
+
+        response = self.client.post(
+            "/api/cart/total/", secure=True, headers={"If-None-Match": etag}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_version_is_bumped_again_after_commit(self):
+        before = get_cart_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            add_line(self.user.cart, self.inventory, 1)
+            during = get_cart_version(self.user.pk)
+        for callback in callbacks:
+            callback()
+
+        self.user.cart.refresh_from_db()
+        # A read before the commit sees a version the committed lines never get
+        self.assertEqual(during, before + 1)
+        self.assertEqual(get_cart_version(self.user.pk), before + 2)
+        self.assertEqual(self.user.cart.version, before + 2)
@@ -0,0 +1,159 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cart.models import CartItem
+from cart.services import (
+    CartPricing,
+    add_line,
+    change_line_quantity,
+    reconcile_cart_totals,
+    remove_line,
+)
+from categories.models import Category, MeasureUnit
+from common.testing import locmem_caches
+from coupons.models import Coupon, PercentageCoupon
+from inventory.models import Inventory, Stock
+from products.models import Product
+from promotion.models import ProductsOnPromotion, Promotion, PromoType
+from promotion.pricing import price_resolver
+
+User = get_user_model()
+
+
+@locmem_caches
+class CartPricingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="pricing", email="pricing@example.com", password="testpass123"
+        )
+        self.cart = self.user.cart
+        measure_unit = MeasureUnit.objects.create(description="Units")
+        self.category = Category.objects.create(
+            name="Electronics", measure_unit=measure_unit
+        )
+        self.inventories = []
+        for i, price in enumerate(["10.00", "20.00", "30.00"]):
+            product = Product.objects.create(name=f"product {i}")
+            product.category.add(self.category)
+            inventory = Inventory.objects.create(
+                product=product,
+                retail_price=Decimal(price),
+                store_price=Decimal(price),
+            )
+            Stock.objects.create(inventory=inventory, units=10)
+            add_line(self.cart, inventory, 2)
+            self.inventories.append(inventory)
+
+    def test_subtotal_and_total_without_coupons(self):
+        pricing = CartPricing(self.cart, user=self.user)
+
+        self.assertEqual(pricing.subtotal, Decimal("120.00"))
+        self.assertEqual(pricing.discount, Decimal("0"))
+        self.assertEqual(pricing.total, Decimal("120.00"))
+        self.assertEqual(self.cart.get_total(), Decimal("120.00"))
+
+    def test_active_promotion_price_is_used(self):
+        promotion = Promotion.objects.create(
+            name="Sale",
+            is_active=True,
+            promo_start=date.today(),
+            promo_end=date.today() + timedelta(days=5),
+            promo_type=PromoType.objects.create(name="Percent"),
+        )
+        ProductsOnPromotion.objects.create(
+            product_inventory_id=self.inventories[0],
+            promotion_id=promotion,
+            promo_price=Decimal("5.00"),
+        )
+
+        pricing = CartPricing(self.cart, user=self.user)
+
+        self.assertEqual(pricing.subtotal, Decimal("110.00"))
+
+    def test_valid_coupon_discount(self):
+        coupon = Coupon.objects.create(
+            name="ten",
+            percentage_coupon=PercentageCoupon.objects.create(
+                discount_percentage=10, uses=0
+            ),
+            apply_to="CATEGORY",
+        )
+        coupon.categories.add(self.category)
+        self.cart.coupons.add(coupon)
+
+        pricing = CartPricing(self.cart, user=self.user)
+
+        self.assertEqual(pricing.discount, Decimal("12.00"))
+        self.assertEqual(pricing.total, Decimal("108.00"))
+        self.assertTrue(pricing.coupon_results[coupon.code]["is_valid"])
+
+    def test_query_count_does_not_grow_with_lines(self):
+        # Both carts are priced with cold price caches
+        cache.clear()
+        price_resolver.clear()
+        with CaptureQueriesContext(connection) as small_cart:
+            CartPricing(self.cart, user=self.user)
+
+        for i in range(5):
+            product = Product.objects.create(name=f"extra {i}")
+            inventory = Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("1.00"),
+                store_price=Decimal("1.00"),
+            )
+            CartItem.objects.create(cart=self.cart, inventory=inventory, quantity=1)
+
+        cache.clear()
+        price_resolver.clear()
+        with CaptureQueriesContext(connection) as large_cart:
+            CartPricing(self.cart, user=self.user)
+
+        self.assertEqual(len(small_cart), len(large_cart))
+
+
+@locmem_caches
+class CartTotalsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="totals", email="totals@example.com", password="testpass123"
+        )
+        self.cart = self.user.cart
+        product = Product.objects.create(name="product")
+        self.inventory = Inventory.objects.create(
+            product=product,
+            retail_price=Decimal("12.50"),
+            store_price=Decimal("12.50"),
+        )
+
+    def assertStoredTotals(self, items, quantity, subtotal):
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_items, items)
+        self.assertEqual(self.cart.total_quantity, quantity)
+        self.assertEqual(self.cart.subtotal, Decimal(subtotal))
+
+    def test_line_changes_update_stored_totals(self):
+        cart_item = add_line(self.cart, self.inventory, 2)
+        self.assertStoredTotals(1, 2, "25.00")
+
+        change_line_quantity(cart_item, 1)
+        self.assertEqual(cart_item.quantity, 3)
+        self.assertStoredTotals(1, 3, "37.50")
+
+        change_line_quantity(cart_item, -2)
+        self.assertStoredTotals(1, 1, "12.50")
+
+        remove_line(cart_item)
+        self.assertStoredTotals(0, 0, "0")
+
+    def test_reconcile_repairs_drift(self):
+        CartItem.objects.create(cart=self.cart, inventory=self.inventory, quantity=4)
+
+        self.assertEqual(reconcile_cart_totals(), 1)
+        self.assertStoredTotals(1, 4, "50.00")
+        self.assertEqual(reconcile_cart_totals(), 0)
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from cart.services import add_line, purge_abandoned_carts, purge_unavailable_lines
+from common.testing import locmem_caches
+from inventory.models import Inventory
+from products.models import Product
+
+User = get_user_model()
+
+
+@locmem_caches
+class PurgeCartsTest(TestCase):
+    def setUp(self):
+        self.carts = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f"purge{i}",
+                email=f"purge{i}@example.com",
+                password="testpass123",
+            )
+            self.carts.append(user.cart)
+        product = Product.objects.create(name="product")
+        self.inventory = Inventory.objects.create(
+            product=product,
+            retail_price=Decimal("10.00"),
+            store_price=Decimal("10.00"),
+        )
+
+    def test_only_carts_untouched_for_n_days_are_emptied(self):
+        for cart in self.carts:
+            add_line(cart, self.inventory, 1)
+        Cart.objects.filter(pk__in=[self.carts[0].pk, self.carts[1].pk]).update(
+            updated_at=timezone.now() - timedelta(days=40)
+        )
+
+        carts, lines = purge_abandoned_carts(30, batch_size=1)
+
+        self.assertEqual((carts, lines), (2, 2))
+        self.assertEqual(CartItem.objects.get().cart, self.carts[2])
+        self.carts[0].refresh_from_db()
+        self.assertEqual(self.carts[0].total_items, 0)
+        self.assertEqual(self.carts[0].subtotal, Decimal("0"))
+
+    def test_lines_for_unpublished_inventory_are_dropped(self):
+        add_line(self.carts[0], self.inventory, 2)
+        Inventory.objects.filter(pk=self.inventory.pk).update(published_status=False)
+
+        self.assertEqual(purge_unavailable_lines(batch_size=1), 1)
+        self.carts[0].refresh_from_db()
+        self.assertEqual(self.carts[0].total_quantity, 0)
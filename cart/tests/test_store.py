@@ -0,0 +1,84 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from cart.store import RedisCartStore
+from common.testing import locmem_caches
+from inventory.models import Inventory, Stock
+from products.models import Product
+
+User = get_user_model()
+
+
+@locmem_caches
+class RedisCartFlushTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="flush", email="flush@example.com", password="testpass123"
+        )
+        self.cart = self.user.cart
+        inventory = Inventory.objects.create(
+            product=Product.objects.create(name="Teclado"),
+            retail_price=Decimal("10.00"),
+            store_price=Decimal("10.00"),
+        )
+        Stock.objects.create(inventory=inventory, units=5)
+        self.field = str(inventory.id)
+        self.hash = {RedisCartStore.LOADED.encode(): b"1", self.field.encode(): b"9"}
+
+        # No Redis server here: the client is replaced by a mock
+        with mock.patch("cart.store.get_redis_connection"):
+            self.store = RedisCartStore()
+        # flush reads the hash and clears the dirty flag in one transaction
+        self.read = self.store.redis.pipeline.return_value
+        self.read.execute.return_value = [self.hash, 1]
+        self.pipe = self.read.__enter__.return_value
+        self.pipe.hgetall.return_value = self.hash
+
+    def test_failed_write_marks_the_cart_dirty_again(self):
+        with mock.patch(
+            "cart.store.apply_line_quantities", side_effect=RuntimeError("db down")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.store.flush(self.cart)
+
+        self.store.redis.sadd.assert_called_once_with(
+            RedisCartStore.DIRTY_KEY, self.user.pk
+        )
+        self.pipe.execute.assert_not_called()
+
+    def test_hash_is_rewritten_with_the_clamped_quantities(self):
+        results = self.store.flush(self.cart)
+
+        self.assertEqual(results[0]["status"], "clamped")
+        self.assertEqual(self.cart.items.get().quantity, 5)
+        self.pipe.hset.assert_called_once_with(
+            self.store.key(self.cart),
+            mapping={RedisCartStore.LOADED: 1, self.field: 5},
+        )
+        self.pipe.execute.assert_called_once()
+
+    def test_hash_changed_during_the_flush_is_left_dirty(self):
+        self.pipe.hgetall.return_value = {**self.hash, self.field.encode(): b"2"}
+
+        self.store.flush(self.cart)
+
+        self.pipe.hset.assert_not_called()
+
+    def test_expired_hash_is_logged(self):
+        self.read.execute.return_value = [{}, 1]
+
+        with self.assertLogs("cart.store", "WARNING"):
+            self.assertEqual(self.store.flush(self.cart), [])
+
+        self.read.hgetall.assert_called_once_with(self.store.key(self.cart))
+        self.read.srem.assert_called_once_with(RedisCartStore.DIRTY_KEY, self.user.pk)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_clean_cart_is_not_written(self):
+        self.read.execute.return_value = [self.hash, 0]
+
+        self.assertEqual(self.store.flush(self.cart), [])
+        self.assertFalse(self.cart.items.exists())
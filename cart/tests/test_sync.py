@@ -0,0 +1,94 @@
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cart.services import add_line, sync_lines
+from common.testing import locmem_caches
+from inventory.models import Inventory, Stock
+from products.models import Product
+
+User = get_user_model()
+
+
+@locmem_caches
+class SyncLinesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="sync", email="sync@example.com", password="testpass123"
+        )
+        self.cart = self.user.cart
+        self.inventories = []
+        for i in range(4):
+            product = Product.objects.create(name=f"product {i}")
+            inventory = Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            Stock.objects.create(inventory=inventory, units=5 if i else 0)
+            self.inventories.append(inventory)
+
+    def payload(self, inventory_id, quantity):
+        return {"inventory": {"id": str(inventory_id)}, "quantity": quantity}
+
+    def test_replace_applies_diff_and_reports_each_line(self):
+        kept = add_line(self.cart, self.inventories[1], 1)
+        add_line(self.cart, self.inventories[2], 1)
+        unknown = uuid.uuid4()
+
+        cart, results = sync_lines(
+            self.cart,
+            [
+                self.payload(self.inventories[0].id, 1),
+                self.payload(self.inventories[1].id, 2),
+                self.payload(self.inventories[3].id, 9),
+                self.payload(unknown, 1),
+            ],
+        )
+
+        statuses = {result["inventory_id"]: result["status"] for result in results}
+        self.assertEqual(statuses[str(self.inventories[0].id)], "out_of_stock")
+        self.assertEqual(statuses[str(self.inventories[1].id)], "updated")
+        self.assertEqual(statuses[str(self.inventories[3].id)], "clamped")
+        self.assertEqual(statuses[str(unknown)], "unknown_inventory")
+
+        lines = {item.inventory_id: item.quantity for item in cart.items.all()}
+        self.assertEqual(
+            lines, {self.inventories[1].pkid: 2, self.inventories[3].pkid: 5}
+        )
+        kept.refresh_from_db()
+        self.assertEqual(kept.quantity, 2)
+
+        cart.refresh_from_db()
+        self.assertEqual(cart.total_items, 2)
+        self.assertEqual(cart.total_quantity, 7)
+        self.assertEqual(cart.subtotal, Decimal("70.00"))
+
+    def test_merge_keeps_lines_not_sent(self):
+        add_line(self.cart, self.inventories[2], 1)
+
+        cart, _ = sync_lines(
+            self.cart, [self.payload(self.inventories[1].id, 3)], mode="merge"
+        )
+
+        self.assertEqual(cart.items.count(), 2)
+        self.assertEqual(cart.total_quantity, 4)
+
+    def test_query_count_does_not_depend_on_line_count(self):
+        # Warm the cart version cache so both runs start from the same state
+        sync_lines(self.cart, [])
+        with CaptureQueriesContext(connection) as one_line:
+            sync_lines(self.cart, [self.payload(self.inventories[1].id, 1)])
+        self.cart.items.all().delete()
+
+        with CaptureQueriesContext(connection) as three_lines:
+            sync_lines(
+                self.cart,
+                [self.payload(inventory.id, 1) for inventory in self.inventories[1:]],
+            )
+
+        self.assertEqual(len(one_line), len(three_lines))
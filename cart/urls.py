@@ -3,22 +3,28 @@ from django.urls import path
 from .views import (
     AddItemToCartView,
     ApplyCouponView,  # Import the new view
+    CartBatchView,
     ClearCartView,
     DecreaseQuantityView,
     GetItemsView,
+    GetTotalView,
     IncreaseQuantityView,
     RemoveAllCouponsView,  # Import the new view
     RemoveCouponView,  # Import the new view
     RemoveItemView,
+    SynchCartItemsView,
 )
 
 urlpatterns = [
     path("cart-items/", GetItemsView.as_view()),
+    path("total/", GetTotalView.as_view(), name="cart-total"),
     path("add-item/", AddItemToCartView.as_view()),
     path("increase-quantity/", IncreaseQuantityView.as_view()),
     path("decrease-quantity/", DecreaseQuantityView.as_view()),
     path("remove-item/", RemoveItemView.as_view()),
     path("clear/", ClearCartView.as_view(), name="clear-cart"),
+    path("synch/", SynchCartItemsView.as_view(), name="synch-cart"),
+    path("batch/", CartBatchView.as_view(), name="cart-batch"),
     path("delivery-cost/", RemoveItemView.as_view()),
     path(
         "apply-coupon/", ApplyCouponView.as_view(), name="apply-coupon"
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.permissions import (
     IsAdminUser,
@@ -10,49 +11,79 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from coupons.models import Coupon
+from coupons.rules import ANY_COUPON_TAG, get_coupon_rules, validate_coupons
 from coupons.serializers import CouponSerializer
-from coupons.views import (
-    CheckCouponView,
-    calculate_total_coupon_discount,
-)  # Import CheckCouponView and the new utility function
 from inventory.models import Inventory
+from promotion.pricing import ANY_PRICE_TAG
 
-from .models import Cart, CartItem, DeliveryCost
+from .models import Cart, DeliveryCost
 from .serializers import CartItemSerializer, CartSerializer, DeliveryCostSerializer
+from .services import CartBatch, CartPricing, get_cart_versions, sync_lines
+from .store import get_cart_store
 
 
-class GetItemsView(APIView):
+class CartETagMixin:
+    """
+    Conditional requests for cart reads. The ETag is derived from the cart
+    version and the versions of the price and coupon tags (prices and
+    discounts change without touching the cart), so a matching
+    ``If-None-Match`` is answered with 304 after a single cache ``get_many``
+    (or ``Cart`` row lookup).
+    """
+
+    etag_tags = (ANY_PRICE_TAG, ANY_COUPON_TAG)
+
+    def check_not_modified(self, request):
+        version, tags = get_cart_versions(request.user.pk, self.etag_tags)
+        if version is None:
+            return None, None
+        tag_versions = "-".join(str(tags[tag]) for tag in self.etag_tags)
+        etag = quote_etag(f"cart-{request.user.pk}-{version}-{tag_versions}")
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and etag in parse_etags(if_none_match):
+            return etag, self.with_etag(
+                Response(status=status.HTTP_304_NOT_MODIFIED), etag
+            )
+        return etag, None
+
+    def with_etag(self, response, etag):
+        if etag:
+            response["ETag"] = etag
+            response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class GetItemsView(CartETagMixin, APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, format=None):
         user = request.user
-        cart, _ = Cart.objects.get_or_create(user=user)  # Ensure cart exists
-        cartId = cart.id
-        total_items = cart.total_items
+        etag, not_modified = self.check_not_modified(request)
+        if not_modified:
+            return not_modified
 
-        cart_items = CartItem.objects.filter(cart=cart)
-        serialized_cart_items = CartItemSerializer(cart_items, many=True).data
+        cart, _ = Cart.objects.get_or_create(user=user)  # Ensure cart exists
 
-        # Get cart total including potential coupon discount using the utility function
-        subtotal = cart.get_total()  # get_total now calculates only subtotal
-        total_discount = calculate_total_coupon_discount(cart, user)
-        cart_total = subtotal - total_discount
-        cart_total = max(Decimal("0"), cart_total)  # Ensure total is not negative
+        # Lines, prices and coupons are loaded once and reused below
+        pricing = CartPricing(cart, user=user)
+        serialized_cart_items = CartItemSerializer(pricing.items, many=True).data
 
-        return Response(
+        response = Response(
             {
-                "cartId": cartId,
+                "cartId": cart.id,
                 "cart_items": serialized_cart_items,
-                "total_items": total_items,
-                "cart_total": cart_total,  # Include the calculated total
-                "subtotal": subtotal,  # Include subtotal
-                "discount_amount": total_discount,  # Include total discount
-                "coupons": [
-                    CouponSerializer(coupon).data for coupon in cart.coupons.all()
-                ],  # Include coupon details if applied
+                "total_items": cart.total_items,
+                "total_quantity": cart.total_quantity,
+                "cart_total": pricing.total,  # Include the calculated total
+                "subtotal": pricing.subtotal,  # Include subtotal
+                "discount_amount": pricing.discount,  # Include total discount
+                "coupons": CouponSerializer(
+                    pricing.coupons, many=True
+                ).data,  # Include coupon details if applied
             },
             status=status.HTTP_200_OK,
         )
+        return self.with_etag(response, etag)
 
 
 class GetTotalView(APIView):
@@ -69,20 +100,7 @@ class GetTotalView(APIView):
         # However, to reflect the applied coupon, we should use the user's actual cart items.
         # If the frontend sends item data for a different purpose (e.g., calculating total for selected items),
         # this logic might need adjustment. Assuming for now it's to get the total of the user's current cart.
-
-        cart_items = cart.items.all()
-        subtotal = Decimal("0")
-        for item in cart_items:
-            subtotal += Decimal(str(item.inventory.store_price)) * Decimal(
-                str(item.quantity)
-            )
-
-        # Calculate total discount using the utility function
-        total_discount = calculate_total_coupon_discount(cart, user)
-
-        final_total = subtotal - total_discount
-        # Ensure final total is not negative
-        final_total = max(Decimal("0"), final_total)
+        pricing = CartPricing(cart, user=user)
 
         # Taxes and shipping estimates would need to be calculated based on the final_total and potentially other factors
         # For now, returning a simplified response including subtotal, discount, and final total.
@@ -93,19 +111,21 @@ class GetTotalView(APIView):
         tax_estimate = Decimal("0")  # Replace with actual tax calculation
         shipping_estimate = Decimal("0")  # Replace with actual shipping calculation
 
-        final_price_with_taxes_shipping = final_total + tax_estimate + shipping_estimate
+        final_price_with_taxes_shipping = (
+            pricing.total + tax_estimate + shipping_estimate
+        )
 
         return Response(
             {
-                "subtotal": subtotal,
-                "discount_amount": total_discount,  # Use total_discount from utility function
-                "final_total": final_total,
+                "subtotal": pricing.subtotal,
+                "discount_amount": pricing.discount,
+                "final_total": pricing.total,
                 "tax_estimate": tax_estimate,
                 "shipping_estimate": shipping_estimate,
                 "finalPrice": final_price_with_taxes_shipping,
-                "coupons": [
-                    CouponSerializer(coupon).data for coupon in cart.coupons.all()
-                ],  # Include applied coupon data as a list
+                "coupons": CouponSerializer(
+                    pricing.coupons, many=True
+                ).data,  # Include applied coupon data as a list
             },
             status=status.HTTP_200_OK,
         )
@@ -123,9 +143,7 @@ class AddItemToCartView(APIView):
 
         try:
             inventory = Inventory.objects.get(id=item_id)
-            stock = (
-                inventory.inventory_stock.units - inventory.inventory_stock.units_sold
-            )
+            stock = inventory.inventory_stock.available_units
 
         except Inventory.DoesNotExist:
             return Response(
@@ -135,7 +153,8 @@ class AddItemToCartView(APIView):
         cart, _ = Cart.objects.get_or_create(user=user)
 
         # Check if item already in cart
-        if CartItem.objects.filter(cart=cart, inventory=inventory).exists():
+        store = get_cart_store()
+        if str(inventory.id) in store.quantities(cart):
             return Response(
                 {"error": "Item is already in cart"}, status=status.HTTP_409_CONFLICT
             )
@@ -146,14 +165,8 @@ class AddItemToCartView(APIView):
                 status=status.HTTP_409_CONFLICT,
             )
 
-        with transaction.atomic():
-            CartItem.objects.create(inventory=inventory, cart=cart, quantity=quantity)
-            # Update total_items in the cart
-            # Note: total_items should probably be the count of unique items, not total quantity
-            # Cart.objects.filter(user=user).update(total_items=F("total_items") + 1)
-            cart.total_items = cart.items.count()  # Recalculate based on items count
-            cart.save()
-            # cart.refresh_from_db()  # Fetch the updated total_items value - not needed if recalculating
+        # Creates the line and bumps the stored cart totals atomically
+        store.add(cart, inventory, int(quantity))
 
         # Return the updated cart details including the coupon
         serialized_cart = CartSerializer(cart).data
@@ -181,18 +194,14 @@ class RemoveItemView(APIView):
 
         cart, _ = Cart.objects.get_or_create(user=user)
         # Use filter().first() to avoid exception if item not found
-        cart_item = CartItem.objects.filter(cart=cart, inventory__id=item_id).first()
+        cart_item = get_cart_store().get_line(cart, item_id)
 
         if not cart_item:
             return Response(
                 {"error": "Item is not in cart"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        with transaction.atomic():
-            cart_item.delete()
-            # Update the total number of items in the cart
-            cart.total_items = cart.items.count()  # Recalculate based on items count
-            cart.save()
+        get_cart_store().remove(cart_item)
 
         # Return the updated cart details including the coupon
         serialized_cart = CartSerializer(cart).data
@@ -211,11 +220,8 @@ class ClearCartView(APIView):
     def post(self, request, format=None):
         user = request.user
         cart, _ = Cart.objects.get_or_create(user=user)
-        cart_items = CartItem.objects.filter(cart=cart)
-        cart_items.delete()
-        cart.total_items = 0
-        cart.coupons.clear()  # Remove all applied coupons when clearing cart
-        cart.save()
+        # Remove all applied coupons when clearing cart
+        get_cart_store().clear(cart, clear_coupons=True)
         serializer = CartSerializer(cart)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -239,7 +245,7 @@ class DecreaseQuantityView(APIView):
         # Obtener o crear el carrito del usuario
         cart, _ = Cart.objects.get_or_create(user=user)
         # Use filter().first() to avoid exception if item not found
-        cart_item = CartItem.objects.filter(cart=cart, inventory__id=item_id).first()
+        cart_item = get_cart_store().get_line(cart, item_id)
 
         if not cart_item:
             return Response(
@@ -250,12 +256,7 @@ class DecreaseQuantityView(APIView):
 
         if quantity <= 1:
             # If quantity is 1 or less, remove the item instead of decreasing quantity
-            with transaction.atomic():
-                cart_item.delete()
-                cart.total_items = (
-                    cart.items.count()
-                )  # Recalculate based on items count
-                cart.save()
+            get_cart_store().remove(cart_item)
             # Return the updated cart details including the coupon
             serialized_cart = CartSerializer(cart).data
             return Response(
@@ -267,12 +268,8 @@ class DecreaseQuantityView(APIView):
                 status=status.HTTP_200_OK,
             )
 
-        # Utilizar una transacción atómica para garantizar la coherencia de los datos
-        with transaction.atomic():
-            # Decrease the quantity
-            cart_item.quantity = quantity - 1
-            cart_item.save()
-            # total_items does not change when decreasing quantity of an existing item
+        # Line quantity and cart totals are updated with F() in one transaction
+        get_cart_store().change_quantity(cart_item, -1)
 
         # Return the updated cart item quantity and potentially the updated cart total
         # To get the updated cart total, we would need to call cart.get_total() and include it in the response
@@ -303,7 +300,7 @@ class IncreaseQuantityView(APIView):
         # Obtener o crear el carrito del usuario
         cart, _ = Cart.objects.get_or_create(user=user)
         # Use filter().first() to avoid exception if item not found
-        cart_item = CartItem.objects.filter(cart=cart, inventory__id=item_id).first()
+        cart_item = get_cart_store().get_line(cart, item_id)
 
         if not cart_item:
             return Response(
@@ -312,20 +309,14 @@ class IncreaseQuantityView(APIView):
 
         # Check for stock availability before increasing quantity
         inventory = cart_item.inventory
-        available_stock = (
-            inventory.inventory_stock.units - inventory.inventory_stock.units_sold
-        )
+        available_stock = inventory.inventory_stock.available_units
         if cart_item.quantity + 1 > available_stock:
             return Response(
                 {"error": "Not enough stock available"}, status=status.HTTP_409_CONFLICT
             )
 
-        # Utilizar una transacción atómica para garantizar la coherencia de los datos
-        with transaction.atomic():
-            # Increase the quantity
-            cart_item.quantity = cart_item.quantity + 1
-            cart_item.save()
-            # total_items does not change when increasing quantity of an existing item
+        # Line quantity and cart totals are updated with F() in one transaction
+        get_cart_store().change_quantity(cart_item, 1)
 
         # Return the updated cart item quantity and potentially the updated cart total
         # To get the updated cart total, we would need to call cart.get_total() and include it in the response
@@ -346,17 +337,21 @@ class SynchCartItemsView(APIView):
         user = request.user
         data = request.data
         items_data = data.get("cart_items", [])
+        # "replace" (default) leaves exactly the sent lines, "merge" keeps the rest
+        mode = data.get("mode", "replace")
+        if mode not in ("replace", "merge"):
+            return Response(
+                {"error": "mode must be 'replace' or 'merge'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         # Obtener o crear el carrito del usuario
         cart, _ = Cart.objects.get_or_create(user=user)
 
         # If no items in the request, clear the cart
-        if not items_data:
-            with transaction.atomic():
-                cart.cartitem_set.all().delete()
-                cart.total_items = 0
-                cart.coupons.clear()  # Remove applied coupons when clearing cart
-                cart.save()
+        if not items_data and mode == "replace":
+            # Remove applied coupons when clearing cart
+            get_cart_store().clear(cart, clear_coupons=True)
             serialized_cart = CartSerializer(cart).data
             return Response(
                 {"cart": serialized_cart, "total_items": cart.total_items},
@@ -365,46 +360,70 @@ class SynchCartItemsView(APIView):
 
         # Utilizar una transacción atómica para garantizar la coherencia de los datos
         with transaction.atomic():
-            # Clear existing items from the cart
-            cart.cartitem_set.all().delete()
+            # Diff against the existing lines applied with bulk operations
+            cart, results = sync_lines(cart, items_data, mode=mode)
             # Remove applied coupon when syncing items, as the total will be recalculated
-            cart.coupons.clear()  # Remove applied coupons when syncing cart
-            cart.save()
-
-            created_items = []
-            # Iterate over the cart items provided in the request
-            for item_data in items_data:
-                inventory_data = item_data.get("inventory")
-                quantity = item_data.get("quantity", 1)
-
-                if not inventory_data or "id" not in inventory_data:
-                    # Skip items with missing inventory data or ID
-                    continue
-
-                inventory_id = inventory_data["id"]
-
-                # Validate if the inventory exists
-                try:
-                    inventory = Inventory.objects.get(id=inventory_id)
-                except Inventory.DoesNotExist:
-                    # Optionally, return an error or skip the item
-                    # For now, skipping the item and continuing
-                    continue
-
-                # Create and save the cart item
-                cart_item = CartItem(cart=cart, inventory=inventory, quantity=quantity)
-                cart_item.save()
-                created_items.append(cart_item)
-
-            # Calculate the total number of unique items in the cart
-            cart.total_items = cart.items.count()
-            cart.save()
-
-        # Serialize the cart items and return the response
-        # Return the full cart details including the coupon (which is now None)
+            cart.coupons.clear()
+
+        # Return the full cart details including the per-line results
         serialized_cart = CartSerializer(cart).data
         return Response(
-            {"cart": serialized_cart, "total_items": cart.total_items},
+            {
+                "cart": serialized_cart,
+                "total_items": cart.total_items,
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class CartBatchView(APIView):
+    """
+    Applies an ordered list of cart operations in a single request and
+    returns the final cart once. See ``cart.services.CartBatch`` for the
+    supported operations.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    max_operations = 100
+
+    def post(self, request, format=None):
+        user = request.user
+        operations = request.data.get("operations")
+
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {"error": "Se requiere una lista de operaciones"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(operations) > self.max_operations:
+            return Response(
+                {"error": f"Máximo {self.max_operations} operaciones por petición"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not all(isinstance(operation, dict) for operation in operations):
+            return Response(
+                {"error": "Cada operación debe ser un objeto"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cart, _ = Cart.objects.get_or_create(user=user)
+        batch = CartBatch(cart, user)
+        pricing = batch.run(operations)
+
+        return Response(
+            {
+                "cartId": cart.id,
+                "cart_items": CartItemSerializer(pricing.items, many=True).data,
+                "total_items": cart.total_items,
+                "total_quantity": cart.total_quantity,
+                "cart_total": pricing.total,
+                "subtotal": pricing.subtotal,
+                "discount_amount": pricing.discount,
+                "coupons": CouponSerializer(pricing.coupons, many=True).data,
+                "results": batch.results,
+                "lines": batch.line_results,
+            },
             status=status.HTTP_200_OK,
         )
 
@@ -482,69 +501,66 @@ class ApplyCouponView(APIView):
             )
 
         cart, _ = Cart.objects.get_or_create(user=user)
-        cart_items = cart.items.all()  # Get cart items
-        cart_subtotal = cart.get_total()  # get_total now calculates only subtotal
+        # Price the lines once; only the coupons are re-evaluated afterwards
+        pricing = CartPricing(cart, user=user)
+        # Una consulta por los códigos y una validación conjunta con las reglas
+        # compiladas, como CartPricing.refresh_coupons
+        pkids_by_code = dict(
+            Coupon.objects.filter(code__in=coupon_codes).values_list("code", "pkid")
+        )
+        rules = get_coupon_rules(pkids_by_code.values())
+        results = validate_coupons(
+            rules.values(), pricing.subtotal, user=user, items=pricing.items
+        )
 
         applied_coupons = []
         errors = {}
-        coupon_checker = CheckCouponView()
 
         # Clear existing coupons before applying new ones, or implement logic for adding/removing
         # For simplicity now, replacing existing coupons with the new list
         cart.coupons.clear()
 
         for code in coupon_codes:
-            try:
-                coupon = Coupon.objects.get(code=code)
+            coupon = rules.get(pkids_by_code.get(code))
+            if coupon is None:
+                errors[code] = "Cupón no encontrado"  # Store not found error
+                continue
 
-                # Validate the coupon
-                validation_result = coupon_checker.validate_coupon(
-                    coupon, user, cart_subtotal, cart_items=cart_items
-                )
+            # Validate the coupon
+            validation_result = results[coupon.pkid]
 
-                if validation_result["is_valid"]:
-                    # Check for combinability if multiple coupons are being applied
-                    if len(applied_coupons) > 0 and not coupon.can_combine:
-                        errors[code] = (
-                            "Este cupón no se puede combinar con otros cupones."
-                        )
-                        continue  # Skip applying this coupon
-
-                    # Check if any already applied coupon is not combinable
-                    if any(not c.can_combine for c in applied_coupons):
-                        errors[code] = (
-                            "No se puede aplicar este cupón con los cupones existentes."
-                        )
-                        continue  # Skip applying this coupon
-
-                    applied_coupons.append(coupon)
-                    cart.coupons.add(coupon)  # Associate coupon with the cart
-
-                else:
-                    errors[code] = validation_result[
-                        "message"
-                    ]  # Store validation error
-
-            except Coupon.DoesNotExist:
-                errors[code] = "Cupón no encontrado"  # Store not found error
+            if validation_result["is_valid"]:
+                # Check for combinability if multiple coupons are being applied
+                if len(applied_coupons) > 0 and not coupon.can_combine:
+                    errors[code] = "Este cupón no se puede combinar con otros cupones."
+                    continue  # Skip applying this coupon
+
+                # Check if any already applied coupon is not combinable
+                if any(not c.can_combine for c in applied_coupons):
+                    errors[code] = (
+                        "No se puede aplicar este cupón con los cupones existentes."
+                    )
+                    continue  # Skip applying this coupon
+
+                applied_coupons.append(coupon)
+
+            else:
+                errors[code] = validation_result["message"]  # Store validation error
 
+        if applied_coupons:
+            # Associate coupons with the cart
+            cart.coupons.add(*(c.pkid for c in applied_coupons))
         cart.save()  # Save the cart with associated coupons
 
         # Recalculate total with the applied coupons and return updated cart details
-        # Use the utility function to get the total discount
-        total_discount = calculate_total_coupon_discount(cart, user)
-        subtotal = cart.get_total()  # get_total now calculates only subtotal
-        final_total = subtotal - total_discount
-        final_total = max(Decimal("0"), final_total)
+        pricing.refresh_coupons()
 
         serialized_cart = CartSerializer(cart).data
 
         response_data = {
             "message": "Procesamiento de cupones completado",
             "cart": serialized_cart,
-            "subtotal": subtotal,
-            "discount_amount": total_discount,
-            "final_total": final_total,
+            **pricing.as_dict(),
         }
         if errors:
             response_data["errors"] = errors  # Include errors in the response
@@ -582,10 +598,7 @@ class RemoveCouponView(APIView):
                 cart.save()
 
                 # Recalculate total after removing the coupon
-                total_discount = calculate_total_coupon_discount(cart, user)
-                subtotal = cart.get_total()
-                final_total = subtotal - total_discount
-                final_total = max(Decimal("0"), final_total)
+                pricing = CartPricing(cart, user=user)
 
                 serialized_cart = CartSerializer(cart).data
 
@@ -593,9 +606,7 @@ class RemoveCouponView(APIView):
                     {
                         "message": f"Cupón {coupon_code} removido exitosamente",
                         "cart": serialized_cart,
-                        "subtotal": subtotal,
-                        "discount_amount": total_discount,
-                        "final_total": final_total,
+                        **pricing.as_dict(),
                     },
                     status=status.HTTP_200_OK,
                 )
@@ -633,10 +644,7 @@ class RemoveAllCouponsView(APIView):
         cart.save()
 
         # Recalculate total after removing all coupons
-        total_discount = calculate_total_coupon_discount(cart, user)
-        subtotal = cart.get_total()
-        final_total = subtotal - total_discount
-        final_total = max(Decimal("0"), final_total)
+        pricing = CartPricing(cart, user=user)
 
         serialized_cart = CartSerializer(cart).data
 
@@ -644,9 +652,7 @@ class RemoveAllCouponsView(APIView):
             {
                 "message": f"Se removieron {coupons_count} cupón(es) del carrito",
                 "cart": serialized_cart,
-                "subtotal": subtotal,
-                "discount_amount": total_discount,
-                "final_total": final_total,
+                **pricing.as_dict(),
             },
             status=status.HTTP_200_OK,
         )
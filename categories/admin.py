@@ -5,7 +5,15 @@ from .models import Category, MeasureUnit
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ["pk", "id", "name", "slug", "measure_unit", "parent"]
+    list_display = [
+        "pk",
+        "id",
+        "name",
+        "slug",
+        "measure_unit",
+        "parent",
+        "product_count",
+    ]
     list_display_links = ["id", "name"]
     search_fields = ["name"]
     list_per_page = 25
@@ -0,0 +1,122 @@
+"""
+Closure table for the category tree.
+
+``CategoryClosure`` stores one row per (ancestor, descendant) pair, including
+the (category, category) pair at depth 0, so "everything under X" is a
+single indexed join instead of a recursive query. Rows are kept up to date by
+``Category.save`` (``insert_node`` on create, ``move_subtree`` when the
+parent changes); deleting a category cascades to its rows.
+
+``Category.product_count`` is the number of active products in the category
+or any of its descendants, refreshed for the affected ancestors whenever
+products, their categories or the tree change.
+"""
+
+from django.db import connection
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _tables():
+    from .models import Category, CategoryClosure
+
+    return Category._meta.db_table, CategoryClosure._meta.db_table
+
+
+def insert_node(category):
+    """Links a new ``category`` to itself and to every ancestor of its parent."""
+    _, closure = _tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+            SELECT %(node)s, %(node)s, 0
+            UNION ALL
+            SELECT ancestor_id, %(node)s, depth + 1
+            FROM {closure}
+            WHERE descendant_id = %(parent)s
+            """,
+            {"node": category.pk, "parent": category.parent_id},
+        )
+
+
+def move_subtree(category):
+    """
+    Re-links the subtree of ``category`` under its new ``parent_id``: links
+    from the old ancestors to the subtree are dropped and the cross product
+    of the new ancestors and the subtree is inserted.
+    """
+    _, closure = _tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {closure} AS link
+            USING {closure} AS subtree
+            WHERE subtree.ancestor_id = %(node)s
+              AND link.descendant_id = subtree.descendant_id
+              AND link.ancestor_id NOT IN (
+                  SELECT descendant_id FROM {closure} WHERE ancestor_id = %(node)s
+              )
+            """,
+            {"node": category.pk},
+        )
+        if category.parent_id is not None:
+            cursor.execute(
+                f"""
+                INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+                SELECT above.ancestor_id, below.descendant_id,
+                       above.depth + below.depth + 1
+                FROM {closure} AS above
+                CROSS JOIN {closure} AS below
+                WHERE above.descendant_id = %(parent)s
+                  AND below.ancestor_id = %(node)s
+                """,
+                {"node": category.pk, "parent": category.parent_id},
+            )
+
+
+def rebuild_closure():
+    """Recomputes the whole table from ``parent`` pointers (backfills)."""
+    category, closure = _tables()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {closure}")
+        cursor.execute(
+            f"""
+            WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+                SELECT pkid, pkid, 0 FROM {category}
+                UNION ALL
+                SELECT tree.ancestor_id, child.pkid, tree.depth + 1
+                FROM tree
+                JOIN {category} AS child ON child.parent_id = tree.descendant_id
+            )
+            INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, descendant_id, depth FROM tree
+            """
+        )
+
+
+def refresh_product_counts(category_pks=None):
+    """
+    Recounts active products for the given categories and their ancestors,
+    or for every category when ``category_pks`` is ``None``.
+    """
+    from .models import Category, CategoryClosure
+
+    categories = Category.objects.all()
+    if category_pks is not None:
+        if not category_pks:
+            return 0
+        categories = categories.filter(
+            pk__in=CategoryClosure.objects.filter(descendant__in=category_pks).values(
+                "ancestor"
+            )
+        )
+    counts = (
+        CategoryClosure.objects.filter(
+            ancestor=OuterRef("pk"), descendant__product__is_active=True
+        )
+        .values("ancestor")
+        .annotate(count=Count("descendant__product", distinct=True))
+        .values("count")
+    )
+    return categories.update(product_count=Coalesce(Subquery(counts), Value(0)))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from categories.closure import rebuild_closure, refresh_product_counts
+from common.cache import invalidate_tags
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye la tabla de cierre de categorías a partir de los padres y "
+        "recalcula la cantidad de productos de cada categoría"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_closure()
+            updated = refresh_product_counts()
+        invalidate_tags("category:list")
+        self.stdout.write(
+            self.style.SUCCESS(f"Se reconstruyó el árbol de {updated} categorías")
+        )
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_CLOSURE = """
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT pkid, pkid, 0 FROM categories_category
+    UNION ALL
+    SELECT tree.ancestor_id, child.pkid, tree.depth + 1
+    FROM tree
+    JOIN categories_category AS child ON child.parent_id = tree.descendant_id
+)
+INSERT INTO categories_categoryclosure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+BACKFILL_PRODUCT_COUNTS = """
+UPDATE categories_category AS category
+SET product_count = counts.total
+FROM (
+    SELECT link.ancestor_id, COUNT(DISTINCT product.pkid) AS total
+    FROM categories_categoryclosure AS link
+    JOIN products_product_category AS pc ON pc.category_id = link.descendant_id
+    JOIN products_product AS product
+      ON product.pkid = pc.product_id AND product.is_active
+    GROUP BY link.ancestor_id
+) AS counts
+WHERE category.pkid = counts.ancestor_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_remove_measureunit_is_custom_and_more'),
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='categories.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='categories.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='category_closure_unique')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_CLOSURE, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_PRODUCT_COUNTS, migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,6 @@
 from autoslug import AutoSlugField
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from common.models import IsActiveQueryset, TimeStampedUUIDModel
@@ -47,6 +48,8 @@ class Category(TimeStampedUUIDModel):
         related_name="MeasureUnit",
         verbose_name=_("Measure Unit"),
     )
+    # Productos activos en la categoría y sus descendientes (categories.closure)
+    product_count = models.PositiveIntegerField(default=0, editable=False)
     objects = IsActiveQueryset.as_manager()
 
     class Meta:
@@ -55,3 +58,53 @@ class Category(TimeStampedUUIDModel):
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        from .closure import insert_node, move_subtree, refresh_product_counts
+
+        adding = self._state.adding
+        with transaction.atomic():
+            if not adding:
+                old_parent_id = (
+                    Category.objects.filter(pk=self.pk)
+                    .values_list("parent_id", flat=True)
+                    .first()
+                )
+                if self.parent_id is not None and self.parent_id != old_parent_id:
+                    if CategoryClosure.objects.filter(
+                        ancestor_id=self.pk, descendant_id=self.parent_id
+                    ).exists():
+                        raise ValidationError(
+                            _("A category can't be moved under its own subtree")
+                        )
+            super().save(*args, **kwargs)
+            if adding:
+                insert_node(self)
+            elif self.parent_id != old_parent_id:
+                move_subtree(self)
+                # Los productos del subárbol cuentan ahora para otros ancestros
+                refresh_product_counts(
+                    [pk for pk in (self.pk, old_parent_id) if pk is not None]
+                )
+
+
+class CategoryClosure(models.Model):
+    """One row per (ancestor, descendant) pair of the category tree."""
+
+    ancestor = models.ForeignKey(
+        Category, related_name="descendant_links", on_delete=models.CASCADE
+    )
+    descendant = models.ForeignKey(
+        Category, related_name="ancestor_links", on_delete=models.CASCADE
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="category_closure_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
@@ -12,5 +12,13 @@ class MeasureUnitSerializer(serializers.ModelSerializer):
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ("id", "name", "slug", "parent", "is_active", "measure_unit")
+        fields = (
+            "id",
+            "name",
+            "slug",
+            "parent",
+            "is_active",
+            "measure_unit",
+            "product_count",
+        )
         depth = 1
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache import invalidate_tags
+
+from .closure import refresh_product_counts
+from .models import Category
+from .tree import TREE_TAG, category_tag
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    # Las páginas de sus ancestros llevan su etiqueta; la del padre nuevo
+    # cubre los ancestros que reciben el subárbol movido
+    tags = [TREE_TAG, category_tag(instance.pk)]
+    if instance.parent_id is not None:
+        tags.append(category_tag(instance.parent_id))
+    invalidate_tags(*tags)
+
+
+@receiver(post_delete, sender=Category)
+def refresh_parent_product_counts(sender, instance, **kwargs):
+    # Los productos de la categoría borrada dejan de contar en sus ancestros
+    if instance.parent_id is not None:
+        refresh_product_counts([instance.parent_id])
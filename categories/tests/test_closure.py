@@ -0,0 +1,114 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from categories.closure import rebuild_closure, refresh_product_counts
+from categories.models import Category, CategoryClosure, MeasureUnit
+from common.testing import locmem_caches
+from inventory.models import Inventory
+from products.models import Product
+
+
+@locmem_caches
+class CategoryClosureTest(TestCase):
+    def setUp(self):
+        self.unit = MeasureUnit.objects.create(description="Units")
+        self.electronics = self.category("Electronics")
+        self.computers = self.category("Computers", self.electronics)
+        self.laptops = self.category("Laptops", self.computers)
+        self.home = self.category("Home")
+
+    def category(self, name, parent=None):
+        return Category.objects.create(name=name, parent=parent, measure_unit=self.unit)
+
+    def links(self):
+        return set(
+            CategoryClosure.objects.values_list(
+                "ancestor__name", "descendant__name", "depth"
+            )
+        )
+
+    def product(self, name, *categories, is_active=True):
+        product = Product.objects.create(name=name, is_active=is_active)
+        product.category.add(*categories)
+        return product
+
+    def counts(self):
+        return dict(Category.objects.values_list("name", "product_count"))
+
+    def test_links_follow_creates_and_moves(self):
+        self.assertEqual(
+            self.links(),
+            {
+                ("Electronics", "Electronics", 0),
+                ("Computers", "Computers", 0),
+                ("Laptops", "Laptops", 0),
+                ("Home", "Home", 0),
+                ("Electronics", "Computers", 1),
+                ("Electronics", "Laptops", 2),
+                ("Computers", "Laptops", 1),
+            },
+        )
+
+        self.computers.parent = self.home
+        self.computers.save()
+        self.assertIn(("Home", "Laptops", 2), self.links())
+        self.assertNotIn(("Electronics", "Laptops", 2), self.links())
+
+        maintained = self.links()
+        rebuild_closure()
+        self.assertEqual(self.links(), maintained)
+
+    def test_moving_under_own_subtree_is_rejected(self):
+        self.electronics.parent = self.laptops
+        with self.assertRaises(ValidationError):
+            self.electronics.save()
+
+    def test_product_counts_include_descendants(self):
+        laptop = self.product("Laptop", self.laptops)
+        self.product("Desktop", self.computers, self.laptops)
+        self.product("Hidden", self.laptops, is_active=False)
+        self.product("Lamp", self.home)
+
+        self.assertEqual(
+            self.counts(),
+            {"Electronics": 2, "Computers": 2, "Laptops": 2, "Home": 1},
+        )
+
+        laptop.category.clear()
+        self.assertEqual(self.counts()["Electronics"], 1)
+
+        self.laptops.parent = self.home
+        self.laptops.save()
+        self.assertEqual(
+            self.counts(),
+            {"Electronics": 1, "Computers": 1, "Laptops": 1, "Home": 2},
+        )
+
+        Category.objects.update(product_count=0)
+        refresh_product_counts()
+        self.assertEqual(self.counts()["Home"], 2)
+
+    def test_catalog_by_category_includes_subcategories(self):
+        for product in (
+            self.product("Laptop", self.laptops),
+            self.product("Desktop", self.computers, self.laptops),
+            self.product("Lamp", self.home),
+        ):
+            Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+
+        response = APIClient().get(
+            f"/api/inventory/category/{self.electronics.slug}/", secure=True
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(item["product"]["name"] for item in response.data["results"]),
+            ["Desktop", "Laptop"],
+        )
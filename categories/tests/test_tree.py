@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from categories.models import Category, MeasureUnit
+from categories.tree import descendant_slugs, get_category_tree, get_subtree
+from common.testing import locmem_caches
+
+
+def names(nodes):
+    return [(node["name"], names(node["sub_categories"])) for node in nodes]
+
+
+@locmem_caches
+class CategoryTreeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.unit = MeasureUnit.objects.create(description="Units")
+        self.electronics = self.category("Electronics")
+        self.computers = self.category("Computers", self.electronics)
+        self.laptops = self.category("Laptops", self.computers)
+        self.audio = self.category("Audio", self.electronics)
+        self.home = self.category("Home")
+
+    def category(self, name, parent=None):
+        return Category.objects.create(name=name, parent=parent, measure_unit=self.unit)
+
+    def test_tree_has_arbitrary_depth(self):
+        self.assertEqual(
+            names(get_category_tree()),
+            [
+                (
+                    "Electronics",
+                    [("Audio", []), ("Computers", [("Laptops", [])])],
+                ),
+                ("Home", []),
+            ],
+        )
+        self.assertEqual(
+            sorted(descendant_slugs(self.electronics.slug)),
+            sorted(
+                [
+                    self.electronics.slug,
+                    self.computers.slug,
+                    self.laptops.slug,
+                    self.audio.slug,
+                ]
+            ),
+        )
+        self.assertIsNone(get_subtree("missing"))
+
+    def test_menu_is_served_without_queries_until_a_category_changes(self):
+        self.client.get("/api/categories/all/", secure=True)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/categories/all/", secure=True)
+        self.assertEqual(len(response.data["categories"]), 2)
+
+        self.laptops.parent = self.home
+        self.laptops.save()
+
+        response = self.client.get("/api/categories/all/", secure=True)
+        home = response.data["categories"][1]
+        self.assertEqual(names([home]), [("Home", [("Laptops", [])])])
+
+    def test_other_processes_reuse_the_shared_tree(self):
+        get_category_tree()
+        # A fresh worker starts without the per-process copy
+        with mock.patch("categories.tree._snapshot", (None, [], {})):
+            with self.assertNumQueries(0):
+                tree = get_category_tree()
+        self.assertEqual(len(tree), 2)
+
+    def test_subtree_endpoint(self):
+        response = self.client.get(
+            f"/api/categories/tree/{self.computers.slug}/", secure=True
+        )
+        self.assertEqual(
+            names([response.data["category"]]), [("Computers", [("Laptops", [])])]
+        )
+        response = self.client.get("/api/categories/tree/missing/", secure=True)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,125 @@
+"""
+In-memory category tree.
+
+The tree is built from one query over all categories in O(n) (children are
+attached through a ``pkid -> node`` dict) and cached at two levels: the
+``default`` cache (Redis) shared by every process, and a per-process copy.
+Both are stamped with the version of the ``"category:list"`` tag, which the
+category and product signals bump on any change (``common.cache``). In
+steady state a lookup costs one cache read of that version and no query.
+"""
+
+import threading
+
+from django.core.cache import cache
+
+from common.cache import get_tag_versions
+
+from .models import Category, CategoryClosure
+
+TREE_TAG = "category:list"
+TREE_CACHE_KEY = "categories:tree"
+
+# (version, tree, by_slug) de este proceso; se reemplaza entero, nunca se muta
+_snapshot = (None, [], {})
+_lock = threading.Lock()
+
+
+def category_tag(category_id):
+    """
+    Tag of the responses listing category ``category_id`` (by ``pkid``),
+    bumped when the category or its products change.
+    """
+    return f"category:{category_id}"
+
+
+def subtree_tags(slugs):
+    """
+    Tags of a response filtered by the categories ``slugs`` and everything
+    under them: one ``category_tag`` per category of the subtrees, plus
+    ``TREE_TAG`` while a slug does not exist (it may be created later).
+    """
+    links = list(
+        CategoryClosure.objects.filter(ancestor__slug__in=slugs).values_list(
+            "ancestor__slug", "descendant_id"
+        )
+    )
+    tags = [category_tag(pk) for _, pk in links]
+    if {slug for slug, _ in links} != set(slugs):
+        tags.append(TREE_TAG)
+    return tags
+
+
+def build_tree(rows):
+    """
+    Nests ``rows`` (dicts with ``pkid`` and ``parent_id``) under their
+    parents, keeping their order, and returns the roots.
+    """
+    nodes = {}
+    for row in rows:
+        nodes[row["pkid"]] = {
+            "id": str(row["id"]),
+            "name": row["name"],
+            "slug": row["slug"],
+            "product_count": row["product_count"],
+            "sub_categories": [],
+            "_parent": row["parent_id"],
+        }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.pop("_parent"))
+        (parent["sub_categories"] if parent else roots).append(node)
+    return roots
+
+
+def _index(tree):
+    by_slug = {}
+    stack = list(tree)
+    while stack:
+        node = stack.pop()
+        by_slug[node["slug"]] = node
+        stack.extend(node["sub_categories"])
+    return by_slug
+
+
+def _load(version):
+    entry = cache.get(TREE_CACHE_KEY)
+    if entry is not None and entry["version"] == version:
+        return entry["tree"]
+    tree = build_tree(
+        Category.objects.order_by("name").values(
+            "pkid", "id", "name", "slug", "parent_id", "product_count"
+        )
+    )
+    cache.set(TREE_CACHE_KEY, {"version": version, "tree": tree}, timeout=None)
+    return tree
+
+
+def _current():
+    global _snapshot
+    version = get_tag_versions([TREE_TAG])[TREE_TAG]
+    if _snapshot[0] != version:
+        with _lock:
+            if _snapshot[0] != version:
+                tree = _load(version)
+                _snapshot = (version, tree, _index(tree))
+    return _snapshot
+
+
+def get_category_tree():
+    """
+    Root categories, each with nested ``sub_categories``. The nodes are
+    shared by every caller of the process and must not be modified.
+    """
+    return _current()[1]
+
+
+def get_subtree(slug):
+    """The node for ``slug`` with its descendants, or ``None``."""
+    return _current()[2].get(slug)
+
+
+def descendant_slugs(slug):
+    """``slug`` and the slugs of every category under it."""
+    node = get_subtree(slug)
+    return list(_index([node])) if node else []
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    CategorySubtreeView,
     CreateCategoryView,
     CreateMeasureUnitView,
     ListCategoriesView,
@@ -9,6 +10,7 @@ from .views import (
 
 urlpatterns = [
     path("all/", ListCategoriesView.as_view()),
+    path("tree/<slug:slug>/", CategorySubtreeView.as_view()),
     path("create/", CreateCategoryView.as_view()),
     path("measure-units/", ListMeasureUnitsView.as_view()),
     path("measure-units/create/", CreateMeasureUnitView.as_view()),
@@ -4,36 +4,17 @@ from rest_framework.views import APIView
 
 from .models import Category, MeasureUnit
 from .serializers import CategorySerializer, MeasureUnitSerializer
+from .tree import get_category_tree, get_subtree
 
 
 class ListCategoriesView(APIView):
     permission_classes = (permissions.AllowAny,)
 
     def get(self, request, format=None):
-        if Category.objects.all().exists():
-            categories = Category.objects.all()
-
-            result = []
-
-            for category in categories:
-                if not category.parent:
-                    item = {}
-                    item["id"] = category.id
-                    item["name"] = category.name
-                    item["slug"] = category.slug
-
-                    item["sub_categories"] = []
-                    for cat in categories:
-                        sub_item = {}
-                        if cat.parent and cat.parent.id == category.id:
-                            sub_item["id"] = cat.id
-                            sub_item["name"] = cat.name
-                            sub_item["slug"] = cat.slug
-                            sub_item["sub_categories"] = []
-
-                            item["sub_categories"].append(sub_item)
-                    result.append(item)
-            return Response({"categories": result}, status=status.HTTP_200_OK)
+        # Árbol en memoria (categories.tree): sin consultas mientras no cambie
+        categories = get_category_tree()
+        if categories:
+            return Response({"categories": categories}, status=status.HTTP_200_OK)
         else:
             return Response(
                 {"error": "No categories found"},
@@ -41,6 +22,18 @@ class ListCategoriesView(APIView):
             )
 
 
+class CategorySubtreeView(APIView):
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request, slug, format=None):
+        category = get_subtree(slug)
+        if category is None:
+            return Response(
+                {"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({"category": category}, status=status.HTTP_200_OK)
+
+
 class CreateCategoryView(APIView):
     permission_classes = (
         permissions.IsAdminUser,
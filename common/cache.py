@@ -0,0 +1,165 @@
+"""
+Tag-invalidated response cache for public, read-mostly endpoints.
+
+Every tag (``"inventory:42"``, ``"category:list"``...) has a version stored
+in the ``default`` cache. A cached response remembers the version of each of
+its tags; ``invalidate_tags`` bumps versions, which turns every response
+holding one of those tags into a miss without having to find or delete it.
+Versions start from a timestamp, so a tag evicted from the cache can never
+come back with a version a stale entry still matches.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+TAG_PREFIX = "cachetag:"
+RESPONSE_PREFIX = "response:"
+
+
+def _tag_key(tag):
+    return f"{TAG_PREFIX}{tag}"
+
+
+def get_tag_versions(tags, keys=()):
+    """
+    Returns ``{tag: version}``, creating versions for unknown tags. The plain
+    cache ``keys`` are read in the same ``get_many`` and returned under their
+    own name when present.
+    """
+    tag_keys = {_tag_key(tag): tag for tag in set(tags)}
+    found = cache.get_many([*tag_keys, *keys])
+    missing = {key: time.time_ns() for key in tag_keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        found.update(cache.get_many(list(missing)))
+    versions = {key: found[key] for key in keys if key in found}
+    versions.update({tag: found.get(key) for key, tag in tag_keys.items()})
+    return versions
+
+
+def fields_changed(instance, fields, update_fields=None):
+    """
+    Whether saving ``instance`` changes any of ``fields`` against the stored
+    row, for ``pre_save`` receivers deciding which collection tags to bump.
+    New rows count as changed; a save limited to other ``update_fields``
+    costs no query.
+    """
+    if instance._state.adding:
+        return True
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return False
+    attnames = [instance._meta.get_field(name).attname for name in fields]
+    stored = (
+        type(instance)
+        ._base_manager.filter(pk=instance.pk)
+        .values_list(*attnames)
+        .first()
+    )
+    return stored != tuple(getattr(instance, attname) for attname in attnames)
+
+
+def invalidate_tags(*tags):
+    for tag in set(tags):
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.set(_tag_key(tag), time.time_ns(), timeout=None)
+
+
+def response_cache_key(request, view):
+    """Key by view, URL and normalized (sorted) query params."""
+    params = sorted(
+        (key, value) for key, values in request.query_params.lists() for value in values
+    )
+    # La URL absoluta incluye host y esquema, que aparecen en los enlaces next
+    # El tipo negociado (JSON, NDJSON...) también distingue la respuesta
+    raw = repr(
+        (
+            view.__class__.__name__,
+            request.build_absolute_uri(request.path),
+            getattr(request, "accepted_media_type", None),
+            params,
+        )
+    )
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f"{RESPONSE_PREFIX}{digest}"
+
+
+def inventory_tags(inventories):
+    tags = []
+    for inventory in inventories:
+        tags.append(f"inventory:{inventory.pkid}")
+        tags.append(f"product:{inventory.product_id}")
+    return tags
+
+
+def cached_get(view, request, compute):
+    """
+    Returns the cached response of ``view`` for ``request`` while the
+    versions of its tags are unchanged, else ``compute()`` and caches it.
+    """
+    key = response_cache_key(request, view)
+    entry = cache.get(key)
+    if entry is not None and get_tag_versions(entry["tags"]) == entry["tags"]:
+        return Response(entry["data"], status=entry["status"])
+
+    # Versiones de las etiquetas fijas leídas antes de calcular: una
+    # invalidación concurrente deja la entrada ya obsoleta
+    view.cache_objects = []
+    versions = get_tag_versions(view.cache_tags)
+    response = compute()
+    # Las respuestas transmitidas (StreamingHttpResponse) no se cachean
+    if response.status_code == 200 and hasattr(response, "data"):
+        object_tags = view.get_object_cache_tags(view.cache_objects)
+        versions.update(get_tag_versions(object_tags))
+        timeout = view.cache_timeout or settings.CATALOG_CACHE_TIMEOUT
+        cache.set(
+            key, {"data": response.data, "status": 200, "tags": versions}, timeout
+        )
+    return response
+
+
+def cache_response(method):
+    """Decorator for the ``get`` of an ``APIView`` using ``TaggedCacheMixin``."""
+
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        return cached_get(view, request, lambda: method(view, request, *args, **kwargs))
+
+    return wrapper
+
+
+class TaggedCacheMixin:
+    """
+    Caches successful GET responses. ``cache_tags`` are static tags for the
+    endpoint (usually a collection tag such as ``"inventory:list"``);
+    ``get_object_cache_tags`` adds tags for the objects rendered, which list
+    views collect from the page and ``APIView`` subclasses assign to
+    ``self.cache_objects``. Generic views are cached automatically; an
+    ``APIView`` decorates its own ``get`` with ``cache_response``.
+    """
+
+    cache_tags = ()
+    cache_timeout = None
+
+    def get(self, request, *args, **kwargs):
+        return cached_get(
+            self,
+            request,
+            lambda: super(TaggedCacheMixin, self).get(request, *args, **kwargs),
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # Sin paginación se serializa el mismo queryset (ya evaluado)
+        self.cache_objects = page if page is not None else queryset
+        return page
+
+    def get_object_cache_tags(self, objects):
+        return []
@@ -0,0 +1,109 @@
+"""
+Collision-free business codes (SKU, UPC, product reference) backed by
+PostgreSQL sequences.
+
+Each ``CodeAllocator`` reserves a block of sequence values with a single
+query and hands them out from memory, so ``bulk_create`` of thousands of rows
+costs one round trip per block. Sequence values are never reused (``nextval``
+ignores rollbacks), which is what makes codes unique without retrying on
+``IntegrityError``; a rolled back block only leaves gaps. Codes issued before
+the sequences existed were random, so every block is checked once against the
+table and values already taken are skipped.
+
+The sequences are created (``IF NOT EXISTS``) after ``migrate`` by
+``create_sequences``, which also covers test databases built without
+migrations.
+"""
+
+import os
+import string
+import threading
+
+from django.conf import settings
+from django.db import connection, connections
+
+BASE36 = string.digits + string.ascii_uppercase
+
+ALLOCATORS = []
+
+
+def digits(width):
+    def formatter(value):
+        return str(value).zfill(width)
+
+    return formatter
+
+
+def base36(width):
+    def formatter(value):
+        code = ""
+        while value:
+            value, remainder = divmod(value, 36)
+            code = BASE36[remainder] + code
+        return code.rjust(width, "0")
+
+    return formatter
+
+
+def upc_a(value):
+    """11-digit sequence value plus the UPC-A check digit."""
+    code = str(value).zfill(11)
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(code))
+    return f"{code}{(10 - total % 10) % 10}"
+
+
+class CodeAllocator:
+    def __init__(self, sequence, field, formatter):
+        self.sequence = sequence
+        self.field = field
+        self.formatter = formatter
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._buffer = []
+        ALLOCATORS.append(self)
+
+    def take(self, model, count):
+        """Returns ``count`` unused codes for ``model.<field>``."""
+        with self._lock:
+            # Tras un fork (workers de gunicorn o celery) el bloque heredado
+            # también lo tiene el proceso padre
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._buffer = []
+            while len(self._buffer) < count:
+                needed = count - len(self._buffer)
+                self._refill(model, max(needed, settings.CODE_ALLOCATOR_BLOCK_SIZE))
+            codes = self._buffer[:count]
+            del self._buffer[:count]
+            return codes
+
+    def assign(self, objs):
+        """Sets a code on the objects of ``objs`` that have none."""
+        pending = [obj for obj in objs if not getattr(obj, self.field)]
+        if pending:
+            codes = self.take(type(pending[0]), len(pending))
+            for obj, code in zip(pending, codes, strict=True):
+                setattr(obj, self.field, code)
+
+    def _refill(self, model, size):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [self.sequence, size],
+            )
+            codes = [self.formatter(value) for (value,) in cursor.fetchall()]
+        taken = set(
+            model._base_manager.filter(**{f"{self.field}__in": codes}).values_list(
+                self.field, flat=True
+            )
+        )
+        self._buffer.extend(code for code in codes if code not in taken)
+
+
+def create_sequences(using="default", **kwargs):
+    """``post_migrate`` receiver for the sequences of every allocator."""
+    db = connections[using]
+    with db.cursor() as cursor:
+        for allocator in ALLOCATORS:
+            name = db.ops.quote_name(allocator.sequence)
+            cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {name}")
@@ -21,3 +21,29 @@ class IsActiveQueryset(models.QuerySet):
 class PublishedManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(published_status=True)
+
+
+class RatingSummaryModel(models.Model):
+    """
+    Denormalized review summary kept up to date with atomic increments by
+    ``reviews.services``; ``rating_avg`` is stored (and indexed) so catalog
+    ordering and "top rated" queries do not aggregate reviews.
+    """
+
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.DecimalField(
+        max_digits=3, decimal_places=2, default=0, db_index=True
+    )
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f"rating_{star}") for star in range(1, 6)}
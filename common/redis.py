@@ -0,0 +1,11 @@
+from django.core.cache import caches
+
+
+def get_redis_connection(alias="default", write=True):
+    """
+    Returns the raw ``redis.Redis`` client behind a Django ``RedisCache``
+    alias, for data structures the cache API does not expose (hashes, sets,
+    HyperLogLog, Lua scripts). Keys written through it are not prefixed or
+    versioned by the cache framework.
+    """
+    return caches[alias]._cache.get_client(write=write)
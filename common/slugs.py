@@ -0,0 +1,54 @@
+"""
+Slugs assigned in bulk.
+
+``autoslug.AutoSlugField`` computes each slug in ``pre_save`` with one query
+per row (more on collisions), and rows of the same ``bulk_create`` cannot
+see each other. ``assign_slugs`` computes the slugs of a whole batch with a
+single query, following autoslug's ``<slug>-<n>`` scheme, and the
+``AutoSlugField`` below keeps them instead of recomputing them.
+"""
+
+import re
+
+from autoslug import AutoSlugField as BaseAutoSlugField
+from autoslug.utils import crop_slug, get_prepopulated_value
+
+
+class AutoSlugField(BaseAutoSlugField):
+    def pre_save(self, instance, add):
+        if add and getattr(instance, "_slug_assigned", False):
+            return getattr(instance, self.attname)
+        return super().pre_save(instance, add)
+
+
+def _base_slug(field, obj):
+    value = get_prepopulated_value(field, obj)
+    slug = field.slugify(value) if value else ""
+    return field.slugify(crop_slug(field, slug or obj._meta.model_name))
+
+
+def assign_slugs(objs, field_name="slug"):
+    """Sets a unique ``field_name`` on the new objects of ``objs``."""
+    pending = [obj for obj in objs if obj._state.adding]
+    if not pending:
+        return
+    model = type(pending[0])
+    field = model._meta.get_field(field_name)
+    bases = [(obj, _base_slug(field, obj)) for obj in pending]
+
+    sep = re.escape(field.index_sep)
+    alternatives = "|".join(sorted({re.escape(base) for _, base in bases}))
+    taken = set(
+        model._base_manager.filter(
+            **{f"{field.name}__regex": rf"^({alternatives})({sep}[0-9]+)?$"}
+        ).values_list(field.name, flat=True)
+    )
+    for obj, base in bases:
+        slug, index = base, 1
+        while slug in taken:
+            index += 1
+            tail = f"{field.index_sep}{index}"
+            slug = f"{base[: field.max_length - len(tail)]}{tail}"
+        taken.add(slug)
+        setattr(obj, field.attname, slug)
+        obj._slug_assigned = True
@@ -0,0 +1,90 @@
+"""
+Streaming responses for endpoints that return whole querysets.
+
+``streaming_response`` walks the queryset with ``iterator(chunk_size=...)``
+(prefetches run once per chunk), serializes one chunk at a time and yields
+the encoded bytes, so memory stays bounded by the chunk size instead of the
+catalog size. The body is a JSON array, or NDJSON (one object per line) when
+the client negotiates ``application/x-ndjson`` through ``NDJSONRenderer``.
+"""
+
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 500
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets content negotiation pick NDJSON (``Accept: application/x-ndjson``
+    or ``?format=ndjson``). Streamed bodies bypass it; anything else (errors,
+    regular responses) is rendered as a single line.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, cls=JSONEncoder).encode() + b"\n"
+
+
+# Renderers por defecto más NDJSON, para las vistas que transmiten
+STREAMING_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _encode(obj):
+    return json.dumps(obj, cls=JSONEncoder, ensure_ascii=False)
+
+
+def wants_ndjson(request):
+    renderer = getattr(request, "accepted_renderer", None)
+    return isinstance(renderer, NDJSONRenderer)
+
+
+def stream_serialized(
+    queryset, serializer_class, context=None, ndjson=False, chunk_size=STREAM_CHUNK_SIZE
+):
+    """Yields the encoded body, one serialized chunk at a time."""
+    first = True
+    if not ndjson:
+        yield "["
+    for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        data = serializer_class(chunk, many=True, context=context).data
+        if ndjson:
+            yield "".join(f"{_encode(item)}\n" for item in data)
+            continue
+        for item in data:
+            yield _encode(item) if first else f",{_encode(item)}"
+            first = False
+    if not ndjson:
+        yield "]"
+
+
+def streaming_response(request, queryset, serializer_class, chunk_size=None):
+    ndjson = wants_ndjson(request)
+    body = stream_serialized(
+        queryset,
+        serializer_class,
+        context={"request": request},
+        ndjson=ndjson,
+        chunk_size=chunk_size or STREAM_CHUNK_SIZE,
+    )
+    content_type = NDJSON_MEDIA_TYPE if ndjson else "application/json"
+    return StreamingHttpResponse(
+        (part.encode() for part in body), content_type=content_type
+    )
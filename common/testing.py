@@ -0,0 +1,11 @@
+"""Helpers shared by the test suites of every app."""
+
+from django.test import override_settings
+
+# Cachés en memoria para que las pruebas no dependan de un Redis en ejecución
+LOCMEM_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    for alias in ("default", "throttling", "sessions")
+}
+
+locmem_caches = override_settings(CACHES=LOCMEM_CACHES)
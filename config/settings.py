@@ -57,6 +57,7 @@ DJANGO_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
 ]
 
 PROJECT_APPS = [
@@ -507,11 +508,31 @@ CELERY_RESULT_BACKEND = env(
 )
 
 CELERY_BEAT_SCHEDULE = {
-    "sample_task": {
-        "task": "ecommerce.promotion.promotion_management",
-        "schedule": crontab(minute="0", hour="1"),
+    "promotion_management": {
+        "task": "promotion.tasks.promotion_management",
+        "schedule": timedelta(minutes=5),
+    },
+    "flush_dirty_carts": {
+        "task": "cart.tasks.flush_dirty_carts",
+        "schedule": timedelta(minutes=1),
+    },
+    "purge_abandoned_carts": {
+        "task": "cart.tasks.purge_abandoned_carts_task",
+        "schedule": crontab(minute="30", hour="3"),
+    },
+    "flush_inventory_views": {
+        "task": "inventory.tasks.flush_inventory_views",
+        "schedule": timedelta(minutes=1),
+    },
+    "release_expired_stock_holds": {
+        "task": "inventory.tasks.release_expired_stock_holds",
+        "schedule": timedelta(minutes=1),
     },
 }
+# Segundos hacia adelante en que se encolan las tareas con ETA de inicio/fin de
+# promociones; debe superar el intervalo de promotion_management y quedar por
+# debajo del visibility_timeout del broker
+PROMOTION_SCHEDULE_HORIZON = env.int("PROMOTION_SCHEDULE_HORIZON", default=15 * 60)
 
 CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
@@ -567,6 +588,44 @@ CACHES = {
     },
 }
 
+# Almacenamiento de carritos: "database" (Cart/CartItem) o "redis" (hashes en la
+# cache "default" con escritura diferida a la base de datos vía Celery)
+CART_STORAGE_BACKEND = env("CART_STORAGE_BACKEND", default="database")
+# Debe superar con margen el intervalo de flush_dirty_carts: un hash que expira
+# antes de escribirse pierde sus cambios
+CART_REDIS_TTL = env.int("CART_REDIS_TTL", default=60 * 60 * 24 * 7)
+# Días sin cambios tras los cuales un carrito se considera abandonado
+CART_ABANDONED_DAYS = env.int("CART_ABANDONED_DAYS", default=30)
+
+# Visitas únicas por inventario: IPs vistas se recuerdan en Redis este tiempo
+INVENTORY_VIEWS_SEEN_TTL = env.int(
+    "INVENTORY_VIEWS_SEEN_TTL", default=60 * 60 * 24 * 30
+)
+
+# Búsqueda aproximada por nombre con pg_trgm. La migración crea la extensión
+# y el índice solo si está activa y pg_trgm está disponible en el servidor;
+# desactivarla cuando no lo esté
+CATALOG_SEARCH_TRIGRAM = env.bool("CATALOG_SEARCH_TRIGRAM", default=True)
+# Segundos que se cachean los conteos de facetas por combinación de filtros
+CATALOG_FACETS_CACHE_TIMEOUT = env.int("CATALOG_FACETS_CACHE_TIMEOUT", default=300)
+# Segundos máximos de las respuestas cacheadas del catálogo (se invalidan por
+# etiquetas desde las señales; el tiempo acota lo que se actualiza con update())
+CATALOG_CACHE_TIMEOUT = env.int("CATALOG_CACHE_TIMEOUT", default=60 * 15)
+# Filas por transacción y subidas simultáneas a Cloudinary de la importación
+# de inventario desde el admin (el comando acepta --batch-size y --workers)
+INVENTORY_IMPORT_BATCH_SIZE = env.int("INVENTORY_IMPORT_BATCH_SIZE", default=500)
+INVENTORY_IMPORT_WORKERS = env.int("INVENTORY_IMPORT_WORKERS", default=4)
+# Directorio compartido por la web y los workers donde esperan los archivos
+# subidos hasta que inventory.tasks.import_inventory_file los procesa
+INVENTORY_IMPORT_DIR = env("INVENTORY_IMPORT_DIR", default=str(BASE_DIR / "imports"))
+# Códigos (SKU, UPC, referencia) reservados por consulta a la secuencia y
+# repartidos desde memoria en cada proceso
+CODE_ALLOCATOR_BLOCK_SIZE = env.int("CODE_ALLOCATOR_BLOCK_SIZE", default=100)
+# Precios efectivos que cada proceso guarda en memoria (LRU) y segundos que
+# se conservan en Redis; las versiones por inventario los invalidan antes
+PRICE_RESOLVER_CACHE_SIZE = env.int("PRICE_RESOLVER_CACHE_SIZE", default=10000)
+PRICE_RESOLVER_CACHE_TIMEOUT = env.int("PRICE_RESOLVER_CACHE_TIMEOUT", default=60 * 60)
+
 # Session Configuration (opcional, si usas sesiones basadas en cache)
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "sessions"
@@ -606,6 +665,11 @@ PAYMENT_MAX_AMOUNT = env.float("PAYMENT_MAX_AMOUNT", default="10000.00")
 PAYMENT_SESSION_TIMEOUT = env.int(
     "PAYMENT_SESSION_TIMEOUT", default="3600"
 )  # 1 hora en segundos
+# Segundos que un checkout retiene el stock: la sesión de pago más un margen
+# para la confirmación; al vencer, la tarea release_expired_stock_holds lo libera
+STOCK_HOLD_TIMEOUT = env.int(
+    "STOCK_HOLD_TIMEOUT", default=int(PAYMENT_SESSION_TIMEOUT) + 300
+)
 PAYMENT_RETRY_LIMIT = env.int("PAYMENT_RETRY_LIMIT", default="3")
 
 # Payment Email Settings
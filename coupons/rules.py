@@ -0,0 +1,245 @@
+"""
+Compiled coupon rules.
+
+A ``Coupon`` is compiled into an immutable ``CouponRules``: date window,
+limits, discount and the applicable category and inventory ids as
+frozensets. Compiled rules live in the ``default`` cache, stamped with the
+version of the ``"coupon:<pkid>"`` tag that ``coupons.signals`` bumps when
+the coupon, its discount or its categories/products change (along with
+``"coupon:any"``, for readers that do not enumerate the coupons).
+
+``validate_coupons`` checks every coupon of a cart against every line in
+memory: the compiled rules come from the cache, the usage counters of all
+the coupons are read with one grouped query and first-purchase coupons add
+at most one ``exists()``, however many coupons and lines there are.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from common.cache import get_tag_versions
+
+from .models import Coupon, CouponUsage
+
+RULES_TIMEOUT = 60 * 60 * 24
+ANY_COUPON_TAG = "coupon:any"
+
+
+def coupon_tag(coupon_id):
+    return f"coupon:{coupon_id}"
+
+
+@dataclass(frozen=True)
+class CouponRules:
+    pkid: int
+    code: str
+    is_active: bool
+    start_date: datetime
+    end_date: datetime
+    min_purchase_amount: Decimal | None
+    max_uses: int | None
+    max_uses_per_user: int | None
+    first_purchase_only: bool
+    can_combine: bool
+    apply_to: str
+    category_ids: frozenset
+    inventory_ids: frozenset
+    discount_price: Decimal | None
+    discount_percentage: int | None
+    max_discount_amount: Decimal | None
+
+    @classmethod
+    def compile(cls, coupon):
+        """Reads the relations through ``.all()`` so prefetched rows are reused."""
+        fixed, percentage = coupon.fixed_price_coupon, coupon.percentage_coupon
+        return cls(
+            pkid=coupon.pkid,
+            code=coupon.code,
+            is_active=coupon.is_active,
+            start_date=coupon.start_date,
+            end_date=coupon.end_date,
+            min_purchase_amount=coupon.min_purchase_amount,
+            max_uses=coupon.max_uses,
+            max_uses_per_user=coupon.max_uses_per_user,
+            first_purchase_only=coupon.first_purchase_only,
+            can_combine=coupon.can_combine,
+            apply_to=coupon.apply_to,
+            category_ids=frozenset(c.pkid for c in coupon.categories.all()),
+            inventory_ids=frozenset(i.pkid for i in coupon.products.all()),
+            discount_price=fixed.discount_price if fixed else None,
+            discount_percentage=percentage.discount_percentage if percentage else None,
+            max_discount_amount=coupon.max_discount_amount,
+        )
+
+    def applies_to(self, lines):
+        """
+        Whether any of ``lines`` (``(inventory pkid, category pkids)`` pairs)
+        is covered by the coupon.
+        """
+        if self.apply_to == "ALL":
+            return True
+        if self.apply_to == "CATEGORY":
+            return any(not self.category_ids.isdisjoint(c) for _, c in lines)
+        if self.apply_to == "PRODUCT":
+            return any(inventory_id in self.inventory_ids for inventory_id, _ in lines)
+        return False
+
+    def validate(
+        self, cart_total, total_uses, user_uses=None, has_orders=False, lines=None
+    ):
+        """
+        Same checks and messages as ``CheckCouponView.validate_coupon``;
+        ``user_uses`` is ``None`` for anonymous users and ``lines`` ``None``
+        when there is no cart to match.
+        """
+        if not (self.start_date <= timezone.now() <= self.end_date):
+            return {"is_valid": False, "message": "El cupón no está vigente"}
+        if not self.is_active:
+            return {"is_valid": False, "message": "El cupón no está activo"}
+        if self.min_purchase_amount and float(cart_total) < float(
+            self.min_purchase_amount
+        ):
+            return {
+                "is_valid": False,
+                "message": f"El monto mínimo de compra es ${self.min_purchase_amount}",
+            }
+        if self.max_uses is not None and self.max_uses <= total_uses:
+            return {
+                "is_valid": False,
+                "message": "El cupón ha alcanzado su límite de usos",
+            }
+        if (
+            user_uses is not None
+            and self.max_uses_per_user is not None
+            and self.max_uses_per_user <= user_uses
+        ):
+            return {
+                "is_valid": False,
+                "message": "Has alcanzado el límite de usos para este cupón",
+            }
+        if self.first_purchase_only and has_orders:
+            return {
+                "is_valid": False,
+                "message": "Este cupón es solo para primera compra",
+            }
+        if lines is not None and not self.applies_to(lines):
+            return {
+                "is_valid": False,
+                "message": "Este cupón no aplica a los artículos en tu carrito",
+            }
+        return {"is_valid": True, "message": "Cupón válido"}
+
+    def discount(self, cart_total):
+        cart_total = float(cart_total)
+        if self.discount_price is not None:
+            discount = float(self.discount_price)
+        elif self.discount_percentage is not None:
+            discount = cart_total * (self.discount_percentage / 100)
+        else:
+            return 0
+        # Aplicar límite máximo de descuento si existe
+        if self.max_discount_amount:
+            discount = min(discount, float(self.max_discount_amount))
+        return round(discount, 2)
+
+
+def get_coupon_rules(coupon_ids):
+    """
+    Returns ``{coupon pkid: CouponRules}`` from the cache, compiling the
+    missing ones with a fixed number of queries.
+    """
+    coupon_ids = set(coupon_ids)
+    if not coupon_ids:
+        return {}
+    versions = get_tag_versions(coupon_tag(pkid) for pkid in coupon_ids)
+    keys = {
+        f"coupon:rules:{pkid}:{versions[coupon_tag(pkid)]}": pkid for pkid in coupon_ids
+    }
+    rules = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = coupon_ids - set(rules)
+    if missing:
+        coupons = (
+            Coupon.objects.filter(pk__in=missing)
+            .select_related("fixed_price_coupon", "percentage_coupon")
+            .prefetch_related("categories", "products")
+        )
+        compiled = {coupon.pkid: CouponRules.compile(coupon) for coupon in coupons}
+        cache.set_many(
+            {key: compiled[pkid] for key, pkid in keys.items() if pkid in compiled},
+            RULES_TIMEOUT,
+        )
+        rules.update(compiled)
+    return rules
+
+
+def usage_counts(coupon_ids, user=None):
+    """
+    Returns ``{coupon pkid: (total uses, uses by user)}`` with one grouped
+    query; the user count is ``None`` without a user.
+    """
+    coupon_ids = list(coupon_ids)
+    counts = dict.fromkeys(coupon_ids, (0, 0 if user else None))
+    if not coupon_ids:
+        return counts
+    annotations = {"total": Count("pk")}
+    if user is not None:
+        annotations["by_user"] = Count("pk", filter=Q(user=user))
+    rows = (
+        CouponUsage.objects.filter(coupon__in=coupon_ids)
+        .values("coupon")
+        .annotate(**annotations)
+    )
+    for row in rows:
+        counts[row["coupon"]] = (row["total"], row.get("by_user"))
+    return counts
+
+
+def cart_lines(items, with_categories=True):
+    """
+    ``(inventory pkid, category pkids)`` of cart items, read from prefetched
+    rows; the categories are only needed by ``"CATEGORY"`` coupons.
+    """
+    if not with_categories:
+        return [(item.inventory_id, frozenset()) for item in items]
+    return [
+        (
+            item.inventory_id,
+            frozenset(c.pkid for c in item.inventory.product.category.all()),
+        )
+        for item in items
+    ]
+
+
+def validate_coupons(rules, cart_total, user=None, items=None, usage=None):
+    """
+    Validates every compiled rule in ``rules`` against the cart in memory and
+    returns ``{coupon pkid: {"is_valid", "message"}}``. ``usage`` can be
+    passed when the caller already loaded it with ``usage_counts``.
+    """
+    rules = list(rules)
+    if not rules:
+        return {}
+    if usage is None:
+        usage = usage_counts((rule.pkid for rule in rules), user)
+    has_orders = False
+    if user is not None and any(rule.first_purchase_only for rule in rules):
+        has_orders = user.orders.exists()
+    lines = None
+    if items is not None:
+        lines = cart_lines(items, any(rule.apply_to == "CATEGORY" for rule in rules))
+    return {
+        rule.pkid: rule.validate(
+            cart_total,
+            usage[rule.pkid][0],
+            user_uses=usage[rule.pkid][1],
+            has_orders=has_orders,
+            lines=lines,
+        )
+        for rule in rules
+    }
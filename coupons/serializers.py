@@ -63,6 +63,13 @@ class CouponSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("created_at", "updated_at")
 
+    def _get_total_uses(self, obj):
+        # CartPricing annotates total_uses; fall back to a count otherwise
+        total_uses = getattr(obj, "total_uses", None)
+        if total_uses is None:
+            total_uses = obj.used_by.count()
+        return total_uses
+
     def get_is_valid(self, obj):
         from django.utils import timezone
 
@@ -70,11 +77,11 @@ class CouponSerializer(serializers.ModelSerializer):
         return (
             obj.is_active
             and obj.start_date <= now <= obj.end_date
-            and obj.max_uses > obj.used_by.count()
+            and obj.max_uses > self._get_total_uses(obj)
         )
 
     def get_remaining_uses(self, obj):
-        return obj.max_uses - obj.used_by.count()
+        return obj.max_uses - self._get_total_uses(obj)
 
 
 class CampaignSerializer(serializers.ModelSerializer):
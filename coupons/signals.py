@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache import invalidate_tags
+
+from .models import Coupon, FixedPriceCoupon, PercentageCoupon
+from .rules import ANY_COUPON_TAG, coupon_tag
+
+
+def invalidate_coupon_rules(coupon_ids):
+    tags = [coupon_tag(pkid) for pkid in coupon_ids]
+    if not tags:
+        return
+    tags.append(ANY_COUPON_TAG)
+    invalidate_tags(*tags)
+    # Otro proceso pudo compilar las reglas anteriores antes del commit
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon(sender, instance, **kwargs):
+    invalidate_coupon_rules([instance.pk])
+
+
+@receiver(post_save, sender=FixedPriceCoupon)
+def invalidate_fixed_price_coupons(sender, instance, **kwargs):
+    invalidate_coupon_rules(
+        Coupon.objects.filter(fixed_price_coupon=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=PercentageCoupon)
+def invalidate_percentage_coupons(sender, instance, **kwargs):
+    invalidate_coupon_rules(
+        Coupon.objects.filter(percentage_coupon=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Coupon.categories.through)
+@receiver(m2m_changed, sender=Coupon.products.through)
+def invalidate_coupon_targets(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_coupon_rules([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        invalidate_coupon_rules(pk_set)
+    elif action == "pre_clear":
+        # Desde la categoría o el inventario: los cupones afectados se leen
+        # antes de que se borren los vínculos
+        instance._cleared_coupon_ids = list(
+            instance.coupon_set.values_list("pk", flat=True)
+        )
+    elif action == "post_clear":
+        invalidate_coupon_rules(getattr(instance, "_cleared_coupon_ids", ()))
@@ -0,0 +1,178 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from cart.services import CartPricing, add_line
+from categories.models import Category, MeasureUnit
+from common.testing import locmem_caches
+from coupons.models import Coupon, CouponUsage, FixedPriceCoupon, PercentageCoupon
+from coupons.rules import get_coupon_rules
+from inventory.models import Inventory, Stock
+from orders.models import Order
+from products.models import Product
+from shipping.models import Shipping
+
+User = get_user_model()
+
+
+@locmem_caches
+class CouponRulesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="coupons", email="coupons@example.com", password="testpass123"
+        )
+        self.cart = self.user.cart
+        unit = MeasureUnit.objects.create(description="Units")
+        self.electronics = Category.objects.create(
+            name="Electronics", measure_unit=unit
+        )
+        self.home = Category.objects.create(name="Home", measure_unit=unit)
+        self.inventories = []
+        for i in range(4):
+            product = Product.objects.create(name=f"product {i}")
+            product.category.add(self.electronics)
+            inventory = Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            Stock.objects.create(inventory=inventory, units=10)
+            add_line(self.cart, inventory, 1)
+            self.inventories.append(inventory)
+
+    def coupon(self, name, apply_to="ALL", **kwargs):
+        return Coupon.objects.create(
+            name=name,
+            percentage_coupon=PercentageCoupon.objects.create(
+                discount_percentage=10, uses=0
+            ),
+            apply_to=apply_to,
+            can_combine=True,
+            **kwargs,
+        )
+
+    def test_all_cart_coupons_are_validated_in_memory(self):
+        everything = self.coupon("everything")
+        home = self.coupon("home", apply_to="CATEGORY")
+        home.categories.add(self.home)
+        first = self.coupon("first", first_purchase_only=True, max_uses=5)
+        Order.objects.create(
+            user=self.user,
+            amount=Decimal("10.00"),
+            shipping=Shipping.objects.create(
+                name="Standard",
+                standard_shipping_cost=Decimal("5.00"),
+                is_active=True,
+            ),
+            transaction_id="txn-1",
+        )
+        self.cart.coupons.add(everything, home, first)
+        pricing = CartPricing(self.cart, user=self.user)  # Compiles the rules
+
+        # Coupon ids, usage counters and the user's orders
+        with self.assertNumQueries(3):
+            pricing.refresh_coupons()
+        self.assertEqual(pricing.discount, Decimal("4.00"))
+        self.assertEqual(
+            {
+                code: result["message"]
+                for code, result in pricing.coupon_results.items()
+            },
+            {
+                everything.code: "Cupón válido",
+                home.code: "Este cupón no aplica a los artículos en tu carrito",
+                first.code: "Este cupón es solo para primera compra",
+            },
+        )
+
+    def test_usage_counters_are_read_once(self):
+        coupon = self.coupon("limited", max_uses=1)
+        order = Order.objects.create(
+            user=self.user,
+            amount=Decimal("10.00"),
+            shipping=Shipping.objects.create(
+                name="Standard",
+                standard_shipping_cost=Decimal("5.00"),
+                is_active=True,
+            ),
+            transaction_id="txn-2",
+        )
+        CouponUsage.objects.create(
+            coupon=coupon, user=self.user, order=order, discount_amount=Decimal("1")
+        )
+        self.cart.coupons.add(coupon)
+
+        pricing = CartPricing(self.cart, user=self.user)
+
+        self.assertEqual(
+            pricing.coupon_results[coupon.code]["message"],
+            "El cupón ha alcanzado su límite de usos",
+        )
+        self.assertEqual(pricing.coupons[0].total_uses, 1)
+        self.assertEqual(pricing.valid_coupons, [])
+
+    def test_compiled_rules_follow_coupon_changes(self):
+        coupon = self.coupon("products", apply_to="PRODUCT")
+        coupon.products.add(self.inventories[0])
+        rules = get_coupon_rules([coupon.pkid])[coupon.pkid]
+        self.assertEqual(rules.inventory_ids, frozenset({self.inventories[0].pkid}))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_coupon_rules([coupon.pkid])[coupon.pkid], rules)
+
+        self.inventories[1].coupon_set.add(coupon)
+        self.assertEqual(
+            get_coupon_rules([coupon.pkid])[coupon.pkid].inventory_ids,
+            frozenset(inventory.pkid for inventory in self.inventories[:2]),
+        )
+
+        coupon.percentage_coupon = None
+        coupon.fixed_price_coupon = FixedPriceCoupon.objects.create(
+            discount_price=Decimal("3.00"), uses=0
+        )
+        coupon.save()
+        self.assertEqual(
+            get_coupon_rules([coupon.pkid])[coupon.pkid].discount(100), 3.0
+        )
+
+    def test_apply_coupon_view_validates_all_codes_at_once(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def apply(codes):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(
+                    "/api/cart/apply-coupon/",
+                    {"coupon_codes": codes},
+                    format="json",
+                    secure=True,
+                )
+            return response, len(queries)
+
+        coupons = [self.coupon(f"coupon {i}") for i in range(4)]
+        home = self.coupon("home", apply_to="CATEGORY")
+        home.categories.add(self.home)
+        apply([coupon.code for coupon in coupons] + [home.code])  # Compiles the rules
+
+        response, few = apply([coupons[0].code, home.code, "missing"])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["errors"],
+            {
+                home.code: "Este cupón no aplica a los artículos en tu carrito",
+                "missing": "Cupón no encontrado",
+            },
+        )
+        self.assertEqual(list(self.cart.coupons.all()), [coupons[0]])
+
+        response, many = apply([coupon.code for coupon in coupons] + [home.code])
+        self.assertEqual(
+            set(self.cart.coupons.values_list("pkid", flat=True)),
+            {coupon.pkid for coupon in coupons},
+        )
+        self.assertEqual(few, many)
@@ -1,7 +1,4 @@
-from decimal import Decimal
-
 from django.db.models import Q
-from django.utils import timezone
 from rest_framework import status
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.pagination import PageNumberPagination
@@ -10,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Campaign, Coupon, CouponUsage
+from .rules import cart_lines, get_coupon_rules, usage_counts
 from .serializers import CampaignSerializer, CouponSerializer, CouponUsageSerializer
 
 
@@ -77,133 +75,59 @@ class CheckCouponView(APIView):
             )
 
     def validate_coupon(
-        self, coupon, user, cart_total, cart_items=None
+        self,
+        coupon,
+        user,
+        cart_total,
+        cart_items=None,
+        total_uses=None,
+        user_uses=None,
+        has_orders=None,
     ):  # Added cart_items parameter
-        now = timezone.now()
-
-        # Validar fechas
-        if not (coupon.start_date <= now <= coupon.end_date):
-            return {"is_valid": False, "message": "El cupón no está vigente"}
-
-        # Validar estado
-        if not coupon.is_active:
-            return {"is_valid": False, "message": "El cupón no está activo"}
-
-        # Validar monto mínimo
-        if coupon.min_purchase_amount and float(cart_total) < float(
-            coupon.min_purchase_amount
-        ):
-            return {
-                "is_valid": False,
-                "message": f"El monto mínimo de compra es ${coupon.min_purchase_amount}",
-            }
-
-        # Validar usos totales
-        if (
-            coupon.max_uses is not None and coupon.max_uses <= coupon.used_by.count()
-        ):  # Added is not None check
-            return {
-                "is_valid": False,
-                "message": "El cupón ha alcanzado su límite de usos",
-            }
-
-        # Validar usos por usuario
-        if (
-            user
-            and coupon.max_uses_per_user is not None  # Added is not None check
-            and coupon.max_uses_per_user <= coupon.used_by.filter(id=user.id).count()
-        ):
-            return {
-                "is_valid": False,
-                "message": "Has alcanzado el límite de usos para este cupón",
-            }
-
-        # Validar primera compra
-        if coupon.first_purchase_only and user and user.orders.exists():
-            return {
-                "is_valid": False,
-                "message": "Este cupón es solo para primera compra",
-            }
-
-        # Validar aplicación a productos/categorías específicas
-        if coupon.apply_to != "ALL" and cart_items is not None:
-            applicable_items_found = False
-            for item in cart_items:
-                if coupon.apply_to == "CATEGORY":
-                    # Assuming item.inventory.product.category is the Category object
-                    if item.inventory.product.category in coupon.categories.all():
-                        applicable_items_found = True
-                        break
-                elif coupon.apply_to == "PRODUCT":
-                    # Assuming item.inventory is the Inventory object
-                    if item.inventory in coupon.products.all():
-                        applicable_items_found = True
-                        break
-
-            if not applicable_items_found:
-                return {
-                    "is_valid": False,
-                    "message": "Este cupón no aplica a los artículos en tu carrito",
-                }
-
-        return {"is_valid": True, "message": "Cupón válido"}
+        """
+        ``total_uses``, ``user_uses`` and ``has_orders`` can be passed when the
+        caller already loaded them so the validation does not query the
+        database again. The checks run on the compiled rules of the coupon
+        (see ``coupons.rules``); carts validate all their coupons at once with
+        ``validate_coupons``.
+        """
+        rules = get_coupon_rules([coupon.pkid])[coupon.pkid]
+        if total_uses is None or (user and user_uses is None):
+            counts = usage_counts([coupon.pkid], user)[coupon.pkid]
+            if total_uses is None:
+                total_uses = counts[0]
+            if user_uses is None:
+                user_uses = counts[1]
+
+        if rules.first_purchase_only and user and has_orders is None:
+            has_orders = user.orders.exists()
+
+        lines = None
+        if cart_items is not None:
+            lines = cart_lines(cart_items, rules.apply_to == "CATEGORY")
+        return rules.validate(
+            cart_total,
+            total_uses,
+            user_uses=user_uses if user else None,
+            has_orders=bool(user and has_orders),
+            lines=lines,
+        )
 
     def calculate_discount(self, coupon, cart_total):
-        cart_total = float(cart_total)
-
-        if coupon.fixed_price_coupon:
-            discount = float(coupon.fixed_price_coupon.discount_price)
-        elif coupon.percentage_coupon:
-            discount = cart_total * (coupon.percentage_coupon.discount_percentage / 100)
-        else:
-            return 0
-
-        # Aplicar límite máximo de descuento si existe
-        if coupon.max_discount_amount:
-            discount = min(discount, float(coupon.max_discount_amount))
-
-        return round(discount, 2)
+        return get_coupon_rules([coupon.pkid])[coupon.pkid].discount(cart_total)
 
 
 # New utility function to calculate total discount for a cart
 def calculate_total_coupon_discount(cart, user):
     """
     Calculates the total discount amount for all valid coupons applied to a cart.
-    """
-    total_discount = Decimal("0")
-    coupon_checker = CheckCouponView()
-    cart_items = cart.items.all()
-    subtotal = Decimal("0")
-    for item in cart_items:
-        subtotal += Decimal(str(item.inventory.store_price)) * Decimal(
-            str(item.quantity)
-        )
-
-    # Note: Complex coupon combination logic (e.g., applying percentage after fixed)
-    # would need a more sophisticated approach here.
-    # This implementation simply sums up the discounts of valid coupons.
-    # It assumes discounts are calculated based on the subtotal.
 
-    for coupon in cart.coupons.all():
-        # Validate the coupon in the context of the current cart and user
-        validation_result = coupon_checker.validate_coupon(
-            coupon, user, subtotal, cart_items=cart_items
-        )
+    Thin wrapper kept for backwards compatibility; prefer building a
+    ``cart.services.CartPricing`` once and reading ``discount`` from it.
+    """
+    from cart.services import CartPricing
 
-        if validation_result["is_valid"]:
-            # Calculate the discount for this specific coupon
-            coupon_discount = coupon_checker.calculate_discount(coupon, subtotal)
-            # Convertir a Decimal para evitar errores de tipo
-            total_discount += Decimal(str(coupon_discount))
-        else:
-            # If a coupon in the cart is no longer valid, it should ideally be removed
-            # from the cart's coupons ManyToManyField. This could be done here,
-            # but might be better handled in the view that fetches/updates the cart
-            # to avoid modifying the cart during a calculation.
-            # For now, we just won't apply the discount of invalid coupons.
-            pass
-
-    return total_discount
+    return CartPricing(cart, user=user).discount
 
 
 class CouponListView(ListCreateAPIView):
@@ -11,6 +11,7 @@ from .models import (
     InventoryViews,
     Media,
     Stock,
+    StockHold,
     Type,
 )
 
@@ -50,7 +51,13 @@ class AttributeAdmin(admin.ModelAdmin):
 
 @admin.register(Stock)
 class StockAdmin(admin.ModelAdmin):
-    list_display = ["id", "inventory", "units", "units_sold"]
+    list_display = ["id", "inventory", "units", "units_sold", "units_held"]
+
+
+@admin.register(StockHold)
+class StockHoldAdmin(admin.ModelAdmin):
+    list_display = ["id", "inventory", "order", "quantity", "status", "expires_at"]
+    list_filter = ["status"]
 
 
 @admin.register(Type)
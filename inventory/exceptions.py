@@ -4,3 +4,14 @@ from rest_framework.exceptions import APIException
 class InventoryNotFound(APIException):
     status_code = 404
     deafult_detail = "The requested inventory does not exist"
+
+
+class InsufficientStock(APIException):
+    status_code = 409
+    default_detail = "Not enough stock for some of the requested items"
+    default_code = "insufficient_stock"
+
+    def __init__(self, failures):
+        # [{"inventory": pkid, "requested": n, "available": n | None}, ...]
+        self.failures = failures
+        super().__init__({"detail": self.default_detail, "items": failures})
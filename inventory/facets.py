@@ -0,0 +1,110 @@
+"""
+Facet counts for the catalog: how many of the filtered inventories fall in
+each brand, type, quality, category and price bucket. All five facets come
+from one ``GROUP BY GROUPING SETS`` query over the filtered queryset and are
+cached per filter combination.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, CharField, F, Q, Value, When
+
+# (clave, precio mínimo de tienda); cada tramo llega hasta el siguiente
+PRICE_BUCKETS = [
+    ("0-50000", 0),
+    ("50000-100000", 50000),
+    ("100000-200000", 100000),
+    ("200000-400000", 200000),
+    ("400000-600000", 400000),
+    ("600000+", 600000),
+]
+
+FACETS = {
+    "brand": F("brand__name"),
+    "type": F("type__slug"),
+    "quality": F("quality"),
+    "category": F("product__category__slug"),
+}
+
+# Parámetros que no cambian los conteos
+NON_FACET_PARAMS = {"page", "page_size", "ordering"}
+
+
+def price_bucket_range(key):
+    """Returns the ``(min, max)`` store price of a bucket; ``max`` may be None."""
+    bounds = dict(PRICE_BUCKETS)
+    if key not in bounds:
+        return None
+    keys = [bucket for bucket, _ in PRICE_BUCKETS]
+    index = keys.index(key)
+    upper = PRICE_BUCKETS[index + 1][1] if index + 1 < len(keys) else None
+    return bounds[key], upper
+
+
+def price_bucket_expression():
+    whens = []
+    for key, _ in PRICE_BUCKETS:
+        lower, upper = price_bucket_range(key)
+        condition = Q(store_price__gte=lower)
+        if upper is not None:
+            condition &= Q(store_price__lt=upper)
+        whens.append(When(condition, then=Value(key)))
+    return Case(*whens, output_field=CharField())
+
+
+def compute_facets(queryset):
+    """
+    Runs the grouped query for ``queryset`` (filtered ``Inventory``) and
+    returns ``{facet: {value: count}}``. Inventories are counted once per
+    value even when the category join repeats them.
+    """
+    aliases = {f"facet_{name}": expression for name, expression in FACETS.items()}
+    aliases["facet_price_bucket"] = price_bucket_expression()
+    rows = queryset.order_by().annotate(**aliases).values("pkid", *aliases)
+    inner_sql, params = rows.query.sql_with_params()
+
+    quote = connection.ops.quote_name
+    columns = [quote(alias) for alias in aliases]
+    sql = (
+        f"SELECT {', '.join(columns)}, "
+        f"{', '.join(f'GROUPING({column})' for column in columns)}, "
+        f"COUNT(DISTINCT {quote('pkid')}) "
+        f"FROM ({inner_sql}) facet_rows "
+        f"GROUP BY GROUPING SETS ({', '.join(f'({column})' for column in columns)})"
+    )
+
+    names = [*FACETS, "price_bucket"]
+    facets = {name: {} for name in names}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            values = row[: len(names)]
+            flags = row[len(names) : -1]
+            for name, value, flag in zip(names, values, flags, strict=True):
+                # GROUPING() es 0 para la columna agrupada en esta fila
+                if flag == 0 and value is not None:
+                    facets[name][value] = row[-1]
+    return facets
+
+
+def facets_cache_key(query_params):
+    params = sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        if key not in NON_FACET_PARAMS
+        for value in values
+    )
+    digest = hashlib.md5(repr(params).encode(), usedforsecurity=False).hexdigest()
+    return f"catalog:facets:{digest}"
+
+
+def get_facets(queryset, query_params):
+    key = facets_cache_key(query_params)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, settings.CATALOG_FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,435 @@
+"""
+Bulk inventory import from CSV or JSONL.
+
+Rows are read as a stream and processed in batches. Each batch:
+
+1. resolves products, brands, types and attribute values by natural key
+   (name, or ``Attribute:value``) against per-import dictionaries, with one
+   query per model for the keys not seen yet; missing ones are created with
+   one ``bulk_create`` per model;
+2. uploads the image URLs of the batch to Cloudinary in a bounded thread pool;
+3. writes ``Inventory``, ``Stock``, ``Media`` and the attribute links with
+   ``bulk_create`` inside one transaction;
+4. stores the number of rows consumed in the checkpoint, so a failed import
+   restarted with the same checkpoint skips what was already committed.
+
+The checkpoint is cleared once the last batch is committed: importing the
+same file again afterwards is a new import.
+
+Supported columns: ``product`` (required), ``description``, ``brand``,
+``type``, ``quality``, ``retail_price`` and ``store_price`` (required),
+``taxe``, ``is_active``, ``is_digital``, ``published_status``, ``weight``,
+``units``, ``attributes`` (``"Color:Rojo|Talla:M"``) and ``images``
+(``"url1|url2"``, the first one is featured).
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import cloudinary.uploader
+from django.core.cache import cache
+from django.db import transaction
+
+from common.cache import invalidate_tags
+from products.models import Product
+from promotion.pricing import refresh_effective_prices
+
+from .models import (
+    Attribute,
+    AttributeValue,
+    Brand,
+    Inventory,
+    Media,
+    Stock,
+    Type,
+)
+
+logger = logging.getLogger(__name__)
+
+LIST_SEPARATOR = "|"
+TRUE_VALUES = {"1", "true", "yes", "si", "sí"}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    """
+    ``resumed_from`` is the number of rows skipped because an interrupted
+    earlier run of the same content had already committed them (0 for a
+    fresh import).
+    """
+
+    created: int = 0
+    failed: int = 0
+    resumed_from: int = 0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self, max_errors=100):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "resumed_from": self.resumed_from,
+            "errors": self.errors[:max_errors],
+        }
+
+
+def read_rows(stream, fmt):
+    """Yields dicts from a text stream in ``"csv"`` or ``"jsonl"`` format."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def file_fingerprint(path, chunk_size=1024 * 1024):
+    """SHA-256 of the file at ``path``, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(upload, directory, suffix):
+    """
+    Copies the uploaded file ``upload`` into ``directory`` as
+    ``<sha256>.<suffix>`` and returns ``(path, sha256)``: the same content
+    always lands on the same file and checkpoint.
+    """
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        for chunk in upload.chunks():
+            digest.update(chunk)
+            f.write(chunk)
+    path = os.path.join(directory, f"{digest.hexdigest()}.{suffix}")
+    os.replace(f.name, path)
+    return path, digest.hexdigest()
+
+
+class FileCheckpoint:
+    """
+    Progress stored in a JSON file with the fingerprint of the imported
+    content; a checkpoint written for other content is ignored.
+    """
+
+    def __init__(self, path, fingerprint=None):
+        self.path = path
+        self.fingerprint = fingerprint
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("fingerprint") != self.fingerprint:
+                return 0
+            return data["rows"]
+        except (FileNotFoundError, ValueError, KeyError, AttributeError):
+            return 0
+
+    def save(self, rows):
+        with open(self.path, "w") as f:
+            json.dump({"rows": rows, "fingerprint": self.fingerprint}, f)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class CacheCheckpoint:
+    timeout = 60 * 60 * 24 * 7
+
+    def __init__(self, key):
+        self.key = f"inventory:import:{key}"
+
+    def load(self):
+        return cache.get(self.key, 0)
+
+    def save(self, rows):
+        cache.set(self.key, rows, self.timeout)
+
+    def clear(self):
+        cache.delete(self.key)
+
+
+def upload_image(url):
+    """Uploads ``url`` to Cloudinary and returns the ``public_id``."""
+    result = cloudinary.uploader.upload(url, tags=["inventory", "import"])
+    return result["public_id"]
+
+
+def _text(row, key):
+    value = row.get(key)
+    return str(value).strip() if value not in (None, "") else ""
+
+
+def _decimal(row, key, required=False):
+    value = _text(row, key)
+    if not value:
+        if required:
+            raise ImportRowError(f"'{key}' is required")
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ImportRowError(f"'{key}' must be a decimal value")
+
+
+def _bool(row, key):
+    value = _text(row, key)
+    return None if not value else value.lower() in TRUE_VALUES
+
+
+def _list(row, key):
+    value = row.get(key) or []
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class InventoryImporter:
+    def __init__(self, user=None, batch_size=500, upload_workers=4, checkpoint=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.upload_workers = upload_workers
+        self.checkpoint = checkpoint
+        self.products = {}
+        self.brands = {}
+        self.types = {}
+        self.attributes = {}
+        self.attribute_values = {}
+
+    def run(self, rows):
+        result = ImportResult()
+        done = self.checkpoint.load() if self.checkpoint else 0
+        result.resumed_from = done
+        rows = islice(enumerate(rows, start=1), done, None)
+
+        with ThreadPoolExecutor(max_workers=self.upload_workers) as pool:
+            while batch := list(islice(rows, self.batch_size)):
+                self._import_batch(batch, pool, result)
+                done = batch[-1][0]
+                if self.checkpoint:
+                    self.checkpoint.save(done)
+                logger.info(
+                    f"Importación de inventario: {done} filas procesadas, "
+                    f"{result.created} creadas, {result.failed} con errores"
+                )
+        # Solo una importación interrumpida se reanuda
+        if self.checkpoint:
+            self.checkpoint.clear()
+        return result
+
+    def _import_batch(self, batch, pool, result):
+        parsed = []
+        for line, row in batch:
+            try:
+                parsed.append((line, self._parse(row)))
+            except ImportRowError as e:
+                result.failed += 1
+                result.errors.append({"row": line, "error": str(e)})
+        if not parsed:
+            return
+
+        self._resolve([data for _, data in parsed])
+
+        # Subidas en paralelo, acotadas por el tamaño del pool
+        uploads = {
+            (line, index): pool.submit(upload_image, url)
+            for line, data in parsed
+            for index, url in enumerate(data["images"])
+        }
+        images = {}
+        for (line, index), future in uploads.items():
+            try:
+                images[(line, index)] = future.result()
+            except Exception as e:
+                result.errors.append({"row": line, "error": f"image upload: {e}"})
+
+        with transaction.atomic():
+            inventories = []
+            for _, data in parsed:
+                inventory = Inventory(
+                    product=self.products[data["product"]],
+                    brand=self.brands.get(data["brand"]),
+                    type=self.types.get(data["type"]),
+                    user=self.user,
+                    **data["fields"],
+                )
+                inventories.append(inventory)
+            Inventory.objects.bulk_create(inventories)
+
+            stocks, media, links = [], [], []
+            through = Inventory.attribute_values.through
+            for (line, data), inventory in zip(parsed, inventories, strict=True):
+                stocks.append(Stock(inventory=inventory, units=data["units"]))
+                for index, _ in enumerate(data["images"]):
+                    public_id = images.get((line, index))
+                    if public_id:
+                        media.append(
+                            Media(
+                                inventory=inventory,
+                                image=public_id,
+                                alt_text=f"Imagen {index + 1} de {data['product']}",
+                                is_featured=index == 0,
+                                default=index == 0,
+                            )
+                        )
+                for key in data["attributes"]:
+                    links.append(
+                        through(
+                            inventory=inventory,
+                            attributevalue=self.attribute_values[key],
+                        )
+                    )
+            Stock.objects.bulk_create(stocks)
+            Media.objects.bulk_create(media)
+            through.objects.bulk_create(links, ignore_conflicts=True)
+            refresh_effective_prices([inventory.pk for inventory in inventories])
+
+        # bulk_create no emite señales: se invalida la caché del catálogo aquí
+        invalidate_tags("inventory:list")
+        result.created += len(inventories)
+
+    def _parse(self, row):
+        # Product.save() guarda el nombre en formato título
+        product = str.title(_text(row, "product"))
+        if not product:
+            raise ImportRowError("'product' is required")
+
+        fields = {
+            "retail_price": _decimal(row, "retail_price", required=True),
+            "store_price": _decimal(row, "store_price", required=True),
+        }
+        quality = _text(row, "quality")
+        if quality:
+            if quality not in Inventory.StateType.values:
+                raise ImportRowError(f"Unknown quality '{quality}'")
+            fields["quality"] = quality
+        taxe = _decimal(row, "taxe")
+        if taxe is not None:
+            fields["taxe"] = taxe
+        weight = _text(row, "weight")
+        if weight:
+            try:
+                fields["weight"] = float(weight)
+            except ValueError:
+                raise ImportRowError("'weight' must be a number")
+        for flag in ("is_active", "is_digital", "published_status"):
+            value = _bool(row, flag)
+            if value is not None:
+                fields[flag] = value
+
+        units = _text(row, "units") or "0"
+        if not units.isdigit():
+            raise ImportRowError("'units' must be a positive integer")
+
+        attributes = []
+        for pair in _list(row, "attributes"):
+            name, _, value = pair.partition(":")
+            if not name.strip() or not value.strip():
+                raise ImportRowError(f"Attribute '{pair}' must be 'name:value'")
+            attributes.append((name.strip(), value.strip()))
+
+        return {
+            "product": product,
+            "description": _text(row, "description"),
+            "brand": _text(row, "brand"),
+            "type": _text(row, "type"),
+            "units": int(units),
+            "attributes": attributes,
+            "images": _list(row, "images"),
+            "fields": fields,
+        }
+
+    def _resolve(self, parsed):
+        """Fills the natural-key caches for the keys of ``parsed``."""
+        created = set()
+        if self._resolve_by_name(
+            Brand, self.brands, {data["brand"] for data in parsed} - {""}
+        ):
+            created.add("brand:list")
+        if self._resolve_by_name(
+            Type, self.types, {data["type"] for data in parsed} - {""}
+        ):
+            created.add("type:list")
+
+        missing_products = {
+            data["product"]: data["description"]
+            for data in parsed
+            if data["product"] not in self.products
+        }
+        if missing_products:
+            for product in Product.objects.filter(name__in=missing_products):
+                self.products.setdefault(product.name, product)
+            # ProductQuerySet.bulk_create asigna slug y ref_code
+            new_products = Product.objects.bulk_create(
+                Product(name=name, description=description)
+                for name, description in missing_products.items()
+                if name not in self.products
+            )
+            for product in new_products:
+                self.products[product.name] = product
+            if new_products:
+                created.add("product:list")
+
+        pairs = {pair for data in parsed for pair in data["attributes"]}
+        self._resolve_by_name(Attribute, self.attributes, {name for name, _ in pairs})
+        missing = pairs - self.attribute_values.keys()
+        if missing:
+            existing = AttributeValue.objects.filter(
+                attribute__in=[self.attributes[name] for name, _ in missing],
+                value__in={value for _, value in missing},
+            ).select_related("attribute")
+            for attribute_value in existing:
+                key = (attribute_value.attribute.name, attribute_value.value)
+                self.attribute_values.setdefault(key, attribute_value)
+            new_values = AttributeValue.objects.bulk_create(
+                AttributeValue(attribute=self.attributes[name], value=value)
+                for name, value in missing - self.attribute_values.keys()
+            )
+            for attribute_value in new_values:
+                key = (attribute_value.attribute.name, attribute_value.value)
+                self.attribute_values[key] = attribute_value
+
+        # bulk_create no emite señales: una invalidación por lote
+        if created:
+            invalidate_tags(*created)
+
+    def _resolve_by_name(self, model, lookup, names):
+        """
+        Fills ``lookup`` with the ``model`` rows named ``names``, creating
+        the missing ones in bulk. Returns whether any was created.
+        """
+        missing = names - lookup.keys()
+        if not missing:
+            return False
+        for obj in model.objects.filter(name__in=missing):
+            lookup[obj.name] = obj
+        new = missing - lookup.keys()
+        if not new:
+            return False
+        # Otra importación pudo crear el mismo nombre: se lee de nuevo
+        model.objects.bulk_create(
+            [model(name=name) for name in new], ignore_conflicts=True
+        )
+        for obj in model.objects.filter(name__in=new):
+            lookup[obj.name] = obj
+        return True
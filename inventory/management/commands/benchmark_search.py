@@ -0,0 +1,165 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from inventory.models import Inventory
+from inventory.search import search_inventory
+from products.models import Product
+
+NOUNS = [
+    "teclado",
+    "mouse",
+    "monitor",
+    "portátil",
+    "audífonos",
+    "parlante",
+    "cámara",
+    "impresora",
+    "router",
+    "tablet",
+    "cargador",
+    "micrófono",
+]
+ADJECTIVES = [
+    "mecánico",
+    "inalámbrico",
+    "curvo",
+    "gamer",
+    "compacto",
+    "profesional",
+    "ergonómico",
+    "portátil",
+    "bluetooth",
+    "usb-c",
+    "4k",
+    "silencioso",
+]
+BRANDS = ["acme", "nova", "zenit", "orbital", "kappa", "lumen", "vertex"]
+
+
+def _array(words):
+    return "ARRAY[" + ", ".join(f"'{word}'" for word in words) + "]"
+
+
+def _word(words, step):
+    # Palabra pseudoaleatoria pero determinista para la fila i
+    return f"({_array(words)})[1 + mod(i * {step}, {len(words)})]"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de la búsqueda del catálogo sobre N inventarios "
+        "sintéticos; los datos se insertan en una transacción que se revierte"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Consulta a medir (se puede repetir)",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        queries = options["queries"] or [
+            "teclado mecánico",
+            "audifonos bluetooth",
+            "monitr curvo",
+            "nova",
+        ]
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.seed(rows)
+            self.stdout.write(
+                f"{rows} inventarios sintéticos en {time.perf_counter() - started:.1f}s"
+            )
+
+            for query in queries:
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    queryset = search_inventory(Inventory.objects.for_catalog(), query)
+                    count = queryset.count()
+                    list(queryset[:12])
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{query!r}: {count} resultados, "
+                        f"mediana {statistics.median(timings):.1f} ms, "
+                        f"p95 {p95:.1f} ms"
+                    )
+                )
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        last_pkid = Product.objects.order_by("-pkid").values_list("pkid", flat=True)
+        last_pkid = last_pkid.first() or 0
+        self.insert(
+            Product,
+            {
+                "id": "gen_random_uuid()",
+                "created_at": "now()",
+                "updated_at": "now()",
+                "name": (
+                    f"initcap({_word(NOUNS, 7)} || ' ' || {_word(ADJECTIVES, 13)}"
+                    f" || ' ' || {_word(BRANDS, 3)} || ' ' || i)"
+                ),
+                "slug": "'bench-' || i",
+                "ref_code": "'B' || lpad(i::text, 10, '0')",
+                "description": (
+                    f"{_word(NOUNS, 11)} || ' ' || {_word(ADJECTIVES, 5)}"
+                    f" || ' ideal para oficina y hogar'"
+                ),
+                "published_status": "true",
+            },
+            f"generate_series(1, {int(rows)}) AS i",
+        )
+        self.insert(
+            Inventory,
+            {
+                "id": "gen_random_uuid()",
+                "created_at": "now()",
+                "updated_at": "now()",
+                "product": "p.pkid",
+                "sku": "'B' || p.pkid",
+                "upc": "'B' || p.pkid",
+                "is_active": "true",
+                "retail_price": "10 + mod(p.pkid, 500)",
+                "store_price": "10 + mod(p.pkid, 500)",
+            },
+            f"products_product AS p WHERE p.pkid > {int(last_pkid)}",
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE products_product")
+            cursor.execute("ANALYZE inventory_inventory")
+
+    def insert(self, model, expressions, source):
+        """
+        ``INSERT ... SELECT`` one row per ``source`` row; columns not in
+        ``expressions`` get the model field default.
+        """
+        columns, values, params = [], [], []
+        for field in model._meta.concrete_fields:
+            if field.primary_key or field.generated:
+                continue
+            columns.append(connection.ops.quote_name(field.column))
+            if field.name in expressions:
+                values.append(expressions[field.name])
+            else:
+                values.append("%s")
+                params.append(field.get_db_prep_save(field.get_default(), connection))
+        sql = (
+            f"INSERT INTO {model._meta.db_table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(values)} FROM {source}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.importer import (
+    FileCheckpoint,
+    InventoryImporter,
+    file_fingerprint,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa inventarios desde un archivo CSV o JSONL en lotes con "
+        "bulk_create. Si se interrumpe, al volver a ejecutarlo continúa "
+        "desde el último lote confirmado"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ruta del archivo CSV o JSONL")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Formato del archivo (por defecto, según la extensión)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Cantidad de filas escritas por transacción",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Subidas simultáneas de imágenes a Cloudinary",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Archivo de progreso (por defecto, <path>.checkpoint)",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email del usuario asignado a los inventarios creados",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith(".jsonl") else "csv")
+
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(email=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No existe el usuario {options['user']}")
+
+        try:
+            fingerprint = file_fingerprint(path)
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {path}")
+
+        # Un progreso guardado para otro contenido del archivo se descarta
+        checkpoint = FileCheckpoint(
+            options["checkpoint"] or f"{path}.checkpoint", fingerprint=fingerprint
+        )
+        importer = InventoryImporter(
+            user=user,
+            batch_size=options["batch_size"],
+            upload_workers=options["workers"],
+            checkpoint=checkpoint,
+        )
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            result = importer.run(read_rows(f, fmt))
+
+        for error in result.errors:
+            self.stderr.write(f"Fila {error['row']}: {error['error']}")
+        if result.resumed_from:
+            self.stdout.write(
+                f"Importación reanudada: se omitieron las {result.resumed_from} "
+                "filas confirmadas en la ejecución anterior"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Se importaron {result.created} inventarios "
+                f"({result.failed} filas con errores)"
+            )
+        )
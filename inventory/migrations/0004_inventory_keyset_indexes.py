@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0003_inventory_rating_summary"),
+        ("products", "0003_product_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventory",
+            index=models.Index(
+                fields=["created_at", "pkid"], name="inventory_created_pkid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventory",
+            index=models.Index(
+                fields=["user", "created_at", "pkid"], name="inventory_user_created_idx"
+            ),
+        ),
+    ]
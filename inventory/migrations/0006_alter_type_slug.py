@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:38
+
+import common.slugs
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0005_stock_holds"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="type",
+            name="slug",
+            field=common.slugs.AutoSlugField(
+                always_update=True, editable=False, populate_from="name", unique=True
+            ),
+        ),
+    ]
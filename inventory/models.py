@@ -1,8 +1,5 @@
-import random
-import string
 from decimal import Decimal
 
-from autoslug import AutoSlugField
 from cloudinary.models import CloudinaryField
 from django.core.validators import MinValueValidator
 from django.db import models
@@ -12,12 +9,22 @@ from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
 import helpers
-from common.models import IsActiveQueryset, PublishedManager, TimeStampedUUIDModel
-from products.models import Product
+from common.codes import CodeAllocator, digits, upc_a
+from common.models import (
+    IsActiveQueryset,
+    PublishedManager,
+    RatingSummaryModel,
+    TimeStampedUUIDModel,
+)
+from common.slugs import AutoSlugField, assign_slugs
+from products.models import Product, in_categories_filter
 from users.models import User
 
 helpers.cloudinary_init()
 
+SKU_CODES = CodeAllocator("inventory_sku_seq", "sku", digits(10))
+UPC_CODES = CodeAllocator("inventory_upc_seq", "upc", upc_a)
+
 
 class Attribute(TimeStampedUUIDModel):
     name = models.CharField(
@@ -30,6 +37,14 @@ class Attribute(TimeStampedUUIDModel):
         return self.name
 
 
+class TypeQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no llama a save(): los slugs se asignan aquí
+        objs = list(objs)
+        assign_slugs(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Type(TimeStampedUUIDModel):
     name = models.CharField(
         max_length=255,
@@ -38,6 +53,8 @@ class Type(TimeStampedUUIDModel):
     slug = AutoSlugField(populate_from="name", unique=True, always_update=True)
     description = models.TextField(blank=True)
 
+    objects = TypeQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -66,7 +83,45 @@ class Brand(TimeStampedUUIDModel):
         return self.name
 
 
-class Inventory(TimeStampedUUIDModel):
+class InventoryQuerySet(IsActiveQueryset):
+    def for_catalog(self):
+        """
+        Everything ``InventorySerializer`` renders, in a constant number of
+        queries: related rows are joined or prefetched and the active
+        promotion price is annotated as ``promotion_price`` from the
+        materialized ``effective_price`` row. Ratings are read from the
+        denormalized ``rating_*`` columns.
+        """
+        return (
+            self.select_related(
+                "product", "brand", "type", "user__profile", "inventory_stock"
+            )
+            .prefetch_related(
+                "product__category",
+                "inventory_media",
+                "attribute_values__attribute",
+            )
+            .annotate(promotion_price=models.F("effective_price__promo_price"))
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no llama a save(): los códigos se asignan aquí
+        objs = list(objs)
+        SKU_CODES.assign(objs)
+        UPC_CODES.assign(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def in_categories(self, slugs):
+        """Inventories whose product is under any of the categories ``slugs``."""
+        return self.filter(in_categories_filter(models.OuterRef("product_id"), slugs))
+
+    def top_rated(self, min_reviews=1):
+        return self.filter(rating_count__gte=min_reviews).order_by(
+            "-rating_avg", "-rating_count"
+        )
+
+
+class Inventory(RatingSummaryModel, TimeStampedUUIDModel):
     class StateType(models.TextChoices):
         NEW = "New", _("New")
         USED = "Used", _("Used")
@@ -151,17 +206,29 @@ class Inventory(TimeStampedUUIDModel):
     views = models.IntegerField(verbose_name=_("Total Views"), default=0)
 
     published = PublishedManager()
-    objects = IsActiveQueryset.as_manager()
+    objects = InventoryQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Inventory"
+        indexes = [
+            # Paginación por cursor (common.pagination.KeysetPagination)
+            models.Index(
+                fields=["created_at", "pkid"], name="inventory_created_pkid_idx"
+            ),
+            models.Index(
+                fields=["user", "created_at", "pkid"],
+                name="inventory_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.product.name
 
     def save(self, *args, **kwargs):
-        self.upc = "".join(random.choices(string.digits, k=12))
-        self.sku = "".join(random.choices(string.digits, k=10))
+        # Los códigos se asignan solo al crear y no cambian después
+        if self._state.adding:
+            SKU_CODES.assign([self])
+            UPC_CODES.assign([self])
         super().save(*args, **kwargs)
 
 
@@ -274,6 +341,54 @@ class Stock(TimeStampedUUIDModel):
     units_sold = models.IntegerField(
         default=0,
     )
+    # Suma de las reservas activas (StockHold), mantenida por inventory.stock
+    units_held = models.IntegerField(
+        default=0,
+    )
 
     class Meta:
         verbose_name_plural = _("Stock")
+
+    @property
+    def available_units(self):
+        # Disponible para vender: existencias menos reservas de checkouts abiertos
+        return self.units - self.units_held
+
+
+class StockHold(TimeStampedUUIDModel):
+    """
+    Units of an inventory set aside for a pending order until ``expires_at``.
+    Converted into a sale when the order is paid; released on cancellation
+    or, without waiting for any webhook, by the expiry sweeper.
+    """
+
+    class HoldStatus(models.TextChoices):
+        ACTIVE = "active", _("Active")
+        CONVERTED = "converted", _("Converted")
+        RELEASED = "released", _("Released")
+
+    inventory = models.ForeignKey(
+        Inventory, related_name="stock_holds", on_delete=models.CASCADE
+    )
+    order = models.ForeignKey(
+        "orders.Order", related_name="stock_holds", on_delete=models.CASCADE
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    status = models.CharField(
+        max_length=10, choices=HoldStatus.choices, default=HoldStatus.ACTIVE
+    )
+
+    class Meta:
+        verbose_name_plural = _("Stock holds")
+        indexes = [
+            # Barrido de reservas vencidas
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(status="active"),
+                name="stockhold_active_expiry_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.inventory_id} ({self.status})"
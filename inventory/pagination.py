@@ -1,7 +1,15 @@
 from rest_framework.pagination import PageNumberPagination
 
+from common.pagination import KeysetPagination
+
 
 class InventoryPagination(PageNumberPagination):
     page_size = 12
     page_size_query_param = "page_size"
     page_size_query_description = "Número de elementos por página (predeterminado: 12)"
+
+
+class InventoryCursorPagination(KeysetPagination):
+    # ?page=N sigue disponible con InventoryPagination
+    page_size = 12
+    page_number_pagination_class = InventoryPagination
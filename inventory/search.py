@@ -0,0 +1,42 @@
+"""
+Catalog search over ``Product.search_vector`` (a generated ``tsvector`` with
+a GIN index) plus trigram similarity on ``Product.name`` for typos and
+partial words. Results are ranked, most relevant first.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q
+
+from products.models import SEARCH_CONFIG
+
+
+def search_inventory(queryset, query):
+    """
+    Filters ``queryset`` (of ``Inventory``) by the free-text ``query`` and
+    orders it by relevance. An empty query returns the newest items.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset.order_by("-created_at", "-pkid")
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    matches = Q(product__search_vector=search_query)
+    queryset = queryset.annotate(
+        rank=SearchRank(F("product__search_vector"), search_query)
+    )
+    ordering = ["-rank"]
+
+    if settings.CATALOG_SEARCH_TRIGRAM:
+        # trigram_similar usa el índice product_name_trgm (operador %)
+        matches |= Q(product__name__trigram_similar=query)
+        queryset = queryset.annotate(
+            similarity=TrigramSimilarity("product__name", query)
+        )
+        ordering.append("-similarity")
+
+    return queryset.filter(matches).order_by(*ordering, "-created_at", "-pkid")
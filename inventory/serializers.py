@@ -1,10 +1,8 @@
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Avg, Count, Q
 from rest_framework import serializers
 
 from products.models import Product
 from products.serializers import ProductSerializer
-from promotion.models import Promotion
+from promotion.pricing import price_resolver
 from reviews.models import Review
 from users.serializers import UserSerializer
 
@@ -156,6 +154,7 @@ class InventorySerializer(serializers.ModelSerializer):
             # "rating", # Reemplazado
             "average_rating",
             "rating_count",
+            "rating_histogram",
         ]
         read_only = True
         depth = 3
@@ -166,28 +165,27 @@ class InventorySerializer(serializers.ModelSerializer):
     def get_image(self, obj):
         return MediaSerializer(obj.inventory_media.all(), many=True).data
 
+    # Las anotaciones de Inventory.objects.for_catalog() evitan una consulta
+    # por fila; sin ellas se calcula como antes. Las valoraciones se leen de
+    # las columnas desnormalizadas (rating_sum, rating_count, rating_avg).
+
     # def get_rating(self, obj): # Reemplazado por get_average_rating y get_rating_count
     #     return ReviewSerializer(obj.Inventory_review.all(), many=True).data
 
     def get_average_rating(self, obj):
-        # Calcula el promedio usando agregación de BD. Devuelve None si no hay reviews.
-        # El '.get("rating__avg")' maneja el caso None si no hay reviews.
-        # Redondeamos a 1 decimal si no es None.
-        avg = obj.Inventory_review.aggregate(Avg("rating")).get("rating__avg")
-        return round(avg, 1) if avg is not None else 0  # Devolver 0 si no hay reviews
+        # Redondeamos a 1 decimal; 0 si no hay reviews
+        if not obj.rating_count:
+            return 0
+        return round(obj.rating_sum / obj.rating_count, 1)
 
     def get_rating_count(self, obj):
-        # Calcula la cuenta usando agregación de BD.
-        return obj.Inventory_review.aggregate(Count("id")).get("id__count")
+        return obj.rating_count
 
     def get_promotion_price(self, obj):
-        try:
-            x = Promotion.products_on_promotion.through.objects.get(
-                Q(promotion_id__is_active=True) & Q(product_inventory_id__id=obj.id)
-            )
-            return x.promo_price
-        except ObjectDoesNotExist:
-            return None
+        if hasattr(obj, "promotion_price"):
+            return obj.promotion_price
+        price = price_resolver.resolve([obj.pkid]).get(obj.pkid)
+        return price.promo_price if price else None
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
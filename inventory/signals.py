@@ -0,0 +1,74 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from common.cache import fields_changed, invalidate_tags
+from orders.models import Order
+
+from .models import Brand, Inventory, Media, Stock, Type
+from .stock import convert_holds
+
+# Campos que deciden en qué listados aparece un inventario y en qué orden
+LIST_FIELDS = (
+    "product",
+    "brand",
+    "type",
+    "quality",
+    "is_active",
+    "published_status",
+    "retail_price",
+    "store_price",
+)
+
+
+@receiver(pre_save, sender=Inventory)
+def remember_inventory_list_fields(sender, instance, raw=False, **kwargs):
+    instance._list_changed = raw or fields_changed(
+        instance, LIST_FIELDS, kwargs.get("update_fields")
+    )
+
+
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+def invalidate_inventory_cache(sender, instance, **kwargs):
+    tags = [f"inventory:{instance.pkid}"]
+    # Los listados que ya lo muestran caen por su etiqueta; el resto solo si
+    # cambia su pertenencia u orden
+    deleted = "created" not in kwargs
+    if deleted or getattr(instance, "_list_changed", True):
+        tags.append("inventory:list")
+    invalidate_tags(*tags)
+
+
+@receiver(m2m_changed, sender=Inventory.attribute_values.through)
+def invalidate_inventory_attributes_cache(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and not reverse:
+        invalidate_tags(f"inventory:{instance.pkid}")
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+def invalidate_inventory_detail_cache(sender, instance, **kwargs):
+    if instance.inventory_id:
+        invalidate_tags(f"inventory:{instance.inventory_id}")
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brand_cache(sender, instance, **kwargs):
+    invalidate_tags("brand:list", "inventory:list")
+
+
+@receiver(post_save, sender=Type)
+@receiver(post_delete, sender=Type)
+def invalidate_type_cache(sender, instance, **kwargs):
+    invalidate_tags("type:list", "inventory:list")
+
+
+@receiver(post_save, sender=Order)
+def convert_paid_order_holds(sender, instance, **kwargs):
+    # Todos los caminos de pago (webhooks, verificación manual) completan la
+    # orden; convertir es idempotente
+    if instance.status == Order.OrderStatus.COMPLETED:
+        convert_holds(instance.pk)
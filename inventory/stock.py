@@ -0,0 +1,251 @@
+"""
+Stock reservation without read-modify-write.
+
+Each line is a conditional ``UPDATE stock SET ... WHERE inventory_id = ...
+AND units - units_held >= q``: the database checks and takes the units in one
+statement under the row lock, so two checkouts racing for the last unit
+cannot both succeed. Lines are applied in ``inventory_id`` order so
+concurrent multi-line reservations lock rows in the same order and cannot
+deadlock each other. A reservation is all or nothing: if any line fails, the
+transaction is rolled back and ``InsufficientStock`` lists every failed line.
+
+Checkouts don't take stock directly, they place ``StockHold`` rows that
+expire. ``Stock.units_held`` is the sum of the active holds, so available to
+sell is ``units - units_held``. Paying the order converts its holds into a
+sale; cancelling releases them, and holds nobody resolved are released by
+``release_expired_holds`` (a periodic task) instead of waiting for a Stripe
+webhook.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from common.cache import invalidate_tags
+
+from .exceptions import InsufficientStock
+from .models import Stock, StockHold
+
+logger = logging.getLogger(__name__)
+
+HOLD_SWEEP_BATCH_SIZE = 500
+
+
+def _totals(lines):
+    """``[(inventory pkid, quantity), ...]`` summed by inventory, sorted."""
+    totals = defaultdict(int)
+    for inventory_id, quantity in lines:
+        # Las líneas de órdenes pueden haber perdido su inventario (SET_NULL)
+        if inventory_id is not None and quantity > 0:
+            totals[inventory_id] += quantity
+    return sorted(totals.items())
+
+
+def _invalidate(totals):
+    invalidate_tags(*(f"inventory:{inventory_id}" for inventory_id, _ in totals))
+
+
+def _take(totals, **updates):
+    """
+    Applies ``updates`` (``field=lambda quantity: expression``) to the stock
+    of every line with enough available units and raises
+    ``InsufficientStock`` for the rest. Runs inside the caller's
+    transaction, which the exception rolls back.
+    """
+    failed = []
+    for inventory_id, quantity in totals:
+        updated = Stock.objects.filter(
+            inventory_id=inventory_id, units__gte=F("units_held") + quantity
+        ).update(**{field: value(quantity) for field, value in updates.items()})
+        if not updated:
+            failed.append((inventory_id, quantity))
+
+    if failed:
+        available = dict(
+            Stock.objects.filter(
+                inventory_id__in=[inventory_id for inventory_id, _ in failed]
+            ).values_list("inventory_id", F("units") - F("units_held"))
+        )
+        raise InsufficientStock(
+            [
+                {
+                    "inventory": inventory_id,
+                    "requested": quantity,
+                    "available": available.get(inventory_id),
+                }
+                for inventory_id, quantity in failed
+            ]
+        )
+
+
+def _unhold(totals):
+    for inventory_id, quantity in totals:
+        Stock.objects.filter(inventory_id=inventory_id).update(
+            units_held=Greatest(F("units_held") - quantity, 0)
+        )
+
+
+def reserve_stock(lines):
+    """
+    Takes ``quantity`` units of each ``(inventory pkid, quantity)`` line.
+    Raises ``InsufficientStock`` (and changes nothing) if any line can't be
+    served.
+    """
+    totals = _totals(lines)
+    with transaction.atomic():
+        _take(
+            totals,
+            units=lambda quantity: F("units") - quantity,
+            units_sold=lambda quantity: F("units_sold") + quantity,
+        )
+    _invalidate(totals)
+
+
+def release_stock(lines):
+    """Returns the units of each ``(inventory pkid, quantity)`` line to stock."""
+    totals = _totals(lines)
+    with transaction.atomic():
+        for inventory_id, quantity in totals:
+            Stock.objects.filter(inventory_id=inventory_id).update(
+                units=F("units") + quantity,
+                units_sold=Greatest(F("units_sold") - quantity, 0),
+            )
+    _invalidate(totals)
+
+
+def place_holds(order, lines, expires_at):
+    """
+    Holds the units of each ``(inventory pkid, quantity)`` line for ``order``
+    until ``expires_at``. All or nothing, like ``reserve_stock``.
+    """
+    totals = _totals(lines)
+    with transaction.atomic():
+        # Las reservas vencidas de estos inventarios dejan de restar ya
+        release_expired_holds(
+            inventory_ids=[inventory_id for inventory_id, _ in totals]
+        )
+        _take(totals, units_held=lambda quantity: F("units_held") + quantity)
+        StockHold.objects.bulk_create(
+            StockHold(
+                inventory_id=inventory_id,
+                order=order,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for inventory_id, quantity in totals
+        )
+    _invalidate(totals)
+
+
+def _lock_holds(order_id, *statuses):
+    return list(
+        StockHold.objects.select_for_update()
+        .filter(order_id=order_id, status__in=statuses)
+        .order_by("inventory_id")
+    )
+
+
+def _hold_totals(holds, status):
+    return _totals(
+        (hold.inventory_id, hold.quantity) for hold in holds if hold.status == status
+    )
+
+
+def convert_holds(order_id):
+    """
+    Turns the holds of a paid order into a sale. Holds that already lapsed
+    are taken again from the stock if it's still there; otherwise the order
+    was oversold and it is logged.
+    """
+    with transaction.atomic():
+        holds = _lock_holds(
+            order_id, StockHold.HoldStatus.ACTIVE, StockHold.HoldStatus.RELEASED
+        )
+        if not holds:
+            return
+        active = _hold_totals(holds, StockHold.HoldStatus.ACTIVE)
+        for inventory_id, quantity in active:
+            Stock.objects.filter(inventory_id=inventory_id).update(
+                units=F("units") - quantity,
+                units_sold=F("units_sold") + quantity,
+                units_held=Greatest(F("units_held") - quantity, 0),
+            )
+        lapsed = _hold_totals(holds, StockHold.HoldStatus.RELEASED)
+        if lapsed:
+            try:
+                reserve_stock(lapsed)
+            except InsufficientStock as e:
+                logger.error(
+                    f"[STOCK] Orden {order_id} pagada sin existencias: {e.failures}"
+                )
+        StockHold.objects.filter(pkid__in=[hold.pkid for hold in holds]).update(
+            status=StockHold.HoldStatus.CONVERTED
+        )
+    _invalidate(active)
+
+
+def release_order_stock(order_id, lines):
+    """
+    Undoes what ``order_id`` took: active holds are released and converted
+    ones (a refunded sale) go back to stock. ``lines`` are the order lines,
+    used for orders placed before holds existed, whose stock was taken
+    directly.
+    """
+    with transaction.atomic():
+        holds = _lock_holds(
+            order_id, StockHold.HoldStatus.ACTIVE, StockHold.HoldStatus.CONVERTED
+        )
+        if not holds:
+            if not StockHold.objects.filter(order_id=order_id).exists():
+                release_stock(lines)
+            return
+        active = _hold_totals(holds, StockHold.HoldStatus.ACTIVE)
+        _unhold(active)
+        release_stock(
+            (hold.inventory_id, hold.quantity)
+            for hold in holds
+            if hold.status == StockHold.HoldStatus.CONVERTED
+        )
+        StockHold.objects.filter(pkid__in=[hold.pkid for hold in holds]).update(
+            status=StockHold.HoldStatus.RELEASED
+        )
+    _invalidate(active)
+
+
+def release_expired_holds(batch_size=HOLD_SWEEP_BATCH_SIZE, inventory_ids=None):
+    """
+    Releases active holds past ``expires_at``, ``batch_size`` per
+    transaction, and returns how many were released. Rows locked by another
+    sweeper are skipped.
+    """
+    now = timezone.now()
+    expired = StockHold.objects.filter(
+        status=StockHold.HoldStatus.ACTIVE, expires_at__lte=now
+    )
+    if inventory_ids is not None:
+        expired = expired.filter(inventory_id__in=inventory_ids)
+
+    released = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                expired.select_for_update(skip_locked=True)
+                .order_by("expires_at")
+                .values_list("pkid", "inventory_id", "quantity")[:batch_size]
+            )
+            if not batch:
+                break
+            totals = _totals((inventory_id, qty) for _, inventory_id, qty in batch)
+            _unhold(totals)
+            StockHold.objects.filter(pkid__in=[pkid for pkid, _, _ in batch]).update(
+                status=StockHold.HoldStatus.RELEASED
+            )
+        _invalidate(totals)
+        released += len(batch)
+        if len(batch) < batch_size:
+            break
+    return released
@@ -0,0 +1,52 @@
+import logging
+import os
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .importer import CacheCheckpoint, InventoryImporter, read_rows
+from .stock import release_expired_holds
+from .tracking import flush_views
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_inventory_views():
+    """Persiste en InventoryViews/Inventory.views las visitas acumuladas en Redis."""
+    created = flush_views()
+    if created:
+        logger.info(f"Visitas únicas registradas: {created}")
+    return created
+
+
+@shared_task
+def release_expired_stock_holds():
+    """Libera las reservas de stock vencidas de checkouts que nadie resolvió."""
+    released = release_expired_holds()
+    if released:
+        logger.info(f"Reservas de stock vencidas liberadas: {released}")
+    return released
+
+
+@shared_task
+def import_inventory_file(path, fmt, checkpoint, user_id=None):
+    """
+    Importa un archivo subido desde el admin. Si falla, reenviar el mismo
+    archivo encola otra tarea que continúa desde el último lote confirmado.
+    """
+    importer = InventoryImporter(
+        user=get_user_model().objects.filter(pk=user_id).first(),
+        batch_size=settings.INVENTORY_IMPORT_BATCH_SIZE,
+        upload_workers=settings.INVENTORY_IMPORT_WORKERS,
+        checkpoint=CacheCheckpoint(checkpoint),
+    )
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        result = importer.run(read_rows(f, fmt))
+    os.remove(path)
+    logger.info(
+        f"Importación {checkpoint}: {result.created} inventarios creados, "
+        f"{result.failed} filas con errores"
+    )
+    return result.as_dict()
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from categories.models import Category, MeasureUnit
+from common.testing import locmem_caches
+from inventory.models import Inventory, Stock
+from products.models import Product
+from promotion.models import ProductsOnPromotion, Promotion, PromoType
+from reviews.models import Review
+from reviews.services import review_created
+
+User = get_user_model()
+
+
+@locmem_caches
+class CatalogQuerysetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = User.objects.create_user(
+            username="seller", email="seller@example.com", password="testpass123"
+        )
+        measure_unit = MeasureUnit.objects.create(description="Units")
+        self.category = Category.objects.create(
+            name="Electronics", measure_unit=measure_unit
+        )
+        self.promotion = Promotion.objects.create(
+            name="Sale",
+            is_active=True,
+            promo_start=date.today(),
+            promo_end=date.today() + timedelta(days=5),
+            promo_type=PromoType.objects.create(name="Percent"),
+        )
+
+    def create_inventories(self, count):
+        for _ in range(count):
+            product = Product.objects.create(name=f"product {Product.objects.count()}")
+            product.category.add(self.category)
+            inventory = Inventory.objects.create(
+                product=product,
+                user=self.seller,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            Stock.objects.create(inventory=inventory, units=3)
+            review_created(
+                Review.objects.create(
+                    rater=self.seller, product=product, inventory=inventory, rating=4
+                )
+            )
+            ProductsOnPromotion.objects.create(
+                product_inventory_id=inventory,
+                promotion_id=self.promotion,
+                promo_price=Decimal("8.00"),
+            )
+
+    def list_inventory(self):
+        return self.client.get("/api/inventory/all/", secure=True)
+
+    def test_annotations_match_serialized_values(self):
+        self.create_inventories(1)
+
+        data = self.list_inventory().data["results"][0]
+
+        self.assertEqual(data["average_rating"], 4)
+        self.assertEqual(data["rating_count"], 1)
+        self.assertEqual(Decimal(data["promotion_price"]), Decimal("8.00"))
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.create_inventories(2)
+        with CaptureQueriesContext(connection) as small_page:
+            self.list_inventory()
+
+        self.create_inventories(6)
+        with CaptureQueriesContext(connection) as large_page:
+            self.list_inventory()
+
+        self.assertEqual(len(small_page), len(large_page))
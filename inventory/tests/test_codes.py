@@ -0,0 +1,91 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from common.codes import CodeAllocator, digits, upc_a
+from common.testing import LOCMEM_CACHES
+from inventory.models import SKU_CODES, UPC_CODES, Inventory
+from products.models import Product
+
+
+def upc_is_valid(code):
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(code[:11]))
+    return len(code) == 12 and (total + int(code[11])) % 10 == 0
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CODE_ALLOCATOR_BLOCK_SIZE=10)
+class CodeAllocatorTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Teclado")
+
+    def inventory(self, **kwargs):
+        return Inventory(
+            product=self.product,
+            retail_price=Decimal("10.00"),
+            store_price=Decimal("9.00"),
+            **kwargs,
+        )
+
+    def test_codes_are_assigned_on_create_only(self):
+        inventory = self.inventory()
+        inventory.save()
+        sku, upc, ref_code = inventory.sku, inventory.upc, self.product.ref_code
+
+        inventory.retail_price = Decimal("12.00")
+        inventory.save()
+        self.product.name = "Teclado mecánico"
+        self.product.save()
+
+        inventory.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual((inventory.sku, inventory.upc), (sku, upc))
+        self.assertEqual(self.product.ref_code, ref_code)
+        self.assertEqual(len(sku), 10)
+        self.assertEqual(len(ref_code), 10)
+        self.assertTrue(upc_is_valid(upc))
+
+    def test_bulk_create_reserves_codes_in_blocks(self):
+        inventories = [self.inventory() for _ in range(25)]
+        with CaptureQueriesContext(connection) as ctx:
+            Inventory.objects.bulk_create(inventories)
+
+        nextval = [q for q in ctx.captured_queries if "nextval" in q["sql"]]
+        # 25 codes of each kind: the buffered codes plus one 10..25-value block
+        self.assertLessEqual(len(nextval), 4)
+        skus = {inventory.sku for inventory in inventories}
+        self.assertEqual(len(skus), 25)
+        self.assertEqual(set(Inventory.objects.values_list("sku", flat=True)), skus)
+        self.assertTrue(all(upc_is_valid(inventory.upc) for inventory in inventories))
+
+    def test_explicit_codes_are_kept(self):
+        inventory = self.inventory(sku="LEGACY-1")
+        inventory.save()
+        self.assertEqual(inventory.sku, "LEGACY-1")
+        self.assertTrue(upc_is_valid(inventory.upc))
+
+    def test_codes_already_taken_are_skipped(self):
+        allocator = CodeAllocator("inventory_sku_seq", "sku", digits(10))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT last_value FROM inventory_sku_seq")
+            (last,) = cursor.fetchone()
+        # A legacy random code equal to the next sequence value
+        self.inventory(sku=digits(10)(last + 1)).save()
+
+        codes = allocator.take(Inventory, 3)
+
+        self.assertNotIn(digits(10)(last + 1), codes)
+        self.assertEqual(len(set(codes)), 3)
+
+    def test_forked_process_discards_inherited_block(self):
+        SKU_CODES.take(Inventory, 1)
+        with mock.patch("common.codes.os.getpid", return_value=-1):
+            with CaptureQueriesContext(connection) as ctx:
+                SKU_CODES.take(Inventory, 1)
+        self.assertTrue(any("nextval" in q["sql"] for q in ctx.captured_queries))
+
+    def test_upc_check_digit(self):
+        self.assertEqual(upc_a(3600029145), "036000291452")
+        self.assertIs(UPC_CODES.formatter, upc_a)
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from categories.models import Category, MeasureUnit
+from common.testing import LOCMEM_CACHES
+from inventory.models import Brand, Inventory, Type
+from products.models import Product
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CATALOG_SEARCH_TRIGRAM=False)
+class FacetedSearchTest(TestCase):
+    def setUp(self):
+        measure_unit = MeasureUnit.objects.create(description="Units")
+        computers = Category.objects.create(name="Computers", measure_unit=measure_unit)
+        gaming = Category.objects.create(name="Gaming", measure_unit=measure_unit)
+        acme = Brand.objects.create(name="Acme")
+        nova = Brand.objects.create(name="Nova")
+        keyboard = Type.objects.create(name="Keyboard")
+
+        for name, brand, price, quality, categories in [
+            ("Teclado uno", acme, "20000", "New", [computers, gaming]),
+            ("Teclado dos", acme, "75000", "Used", [computers]),
+            ("Teclado tres", nova, "650000", "New", [gaming]),
+            ("Monitor", nova, "120000", "New", [computers]),
+        ]:
+            product = Product.objects.create(name=name)
+            product.category.add(*categories)
+            Inventory.objects.create(
+                product=product,
+                brand=brand,
+                type=keyboard if "Teclado" in name else None,
+                quality=quality,
+                retail_price=Decimal(price),
+                store_price=Decimal(price),
+            )
+        self.client = APIClient()
+
+    def get(self, **params):
+        return self.client.get("/api/inventory/facets/", params, secure=True)
+
+    def test_results_and_facets_for_the_same_filters(self):
+        response = self.get(query="teclado")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            response.data["facets"],
+            {
+                "brand": {"Acme": 2, "Nova": 1},
+                "type": {"keyboard": 3},
+                "quality": {"New": 2, "Used": 1},
+                "category": {"computers": 2, "gaming": 2},
+                "price_bucket": {"0-50000": 1, "50000-100000": 1, "600000+": 1},
+            },
+        )
+
+    def test_facet_filters_and_cache_per_combination(self):
+        response = self.get(category="computers", price_bucket="50000-100000")
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["facets"]["brand"], {"Acme": 1})
+
+        # Same filters on another page reuse the cached counts: count, page and
+        # the three catalog prefetches, but no grouped facet query
+        with self.assertNumQueries(5):
+            self.get(category="computers", price_bucket="50000-100000", page=1)
@@ -0,0 +1,191 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from common.testing import locmem_caches
+from inventory.importer import FileCheckpoint, InventoryImporter, read_rows
+from inventory.models import AttributeValue, Brand, Inventory, Media, Stock, Type
+from inventory.tasks import import_inventory_file
+from products.models import Product
+
+User = get_user_model()
+
+CSV = (
+    "product,brand,type,retail_price,store_price,units,attributes,images\n"
+    "teclado,Acme,Periféricos,10.00,9.00,5,Color:Rojo|Talla:M,a.jpg|b.jpg\n"
+    "teclado,Acme,Periféricos,11.00,10.00,3,Color:Rojo,\n"
+    "mouse,Nova,Periféricos,abc,5.00,1,,\n"
+    "mouse,Nova,Periféricos,6.00,5.00,2,Color:Azul,c.jpg\n"
+)
+
+
+class FailingCheckpoint:
+    """Commits the first batch, then stops the import as a crash would."""
+
+    def __init__(self, rows=0):
+        self.rows = rows
+
+    def load(self):
+        return self.rows
+
+    def save(self, rows):
+        self.rows = rows
+        raise RuntimeError("crash")
+
+    def clear(self):
+        self.rows = 0
+
+
+@locmem_caches
+@mock.patch("inventory.importer.upload_image", side_effect=lambda url: f"id/{url}")
+class InventoryImportTest(TestCase):
+    def test_import_creates_rows_and_reuses_natural_keys(self, upload):
+        Product.objects.create(name="Teclado")
+
+        result = InventoryImporter(batch_size=2).run(read_rows(io.StringIO(CSV), "csv"))
+
+        self.assertEqual((result.created, result.failed), (3, 1))
+        self.assertEqual(
+            result.errors,
+            [{"row": 3, "error": "'retail_price' must be a decimal value"}],
+        )
+        self.assertEqual(Product.objects.filter(name="Teclado").count(), 1)
+        self.assertEqual(Brand.objects.count(), 2)
+        self.assertEqual(AttributeValue.objects.count(), 3)
+        self.assertEqual(
+            sorted(Stock.objects.values_list("units", flat=True)), [2, 3, 5]
+        )
+        first = Inventory.objects.get(retail_price=Decimal("10.00"))
+        self.assertEqual(first.attribute_values.count(), 2)
+        self.assertEqual(
+            list(
+                first.inventory_media.order_by("-is_featured").values_list(
+                    "is_featured", flat=True
+                )
+            ),
+            [True, False],
+        )
+        self.assertEqual(upload.call_count, 3)
+        self.assertTrue(all(len(inv.sku) == 10 for inv in Inventory.objects.all()))
+
+    def test_failed_import_resumes_from_checkpoint(self, upload):
+        checkpoint = FailingCheckpoint()
+        with self.assertRaises(RuntimeError):
+            InventoryImporter(batch_size=2, checkpoint=checkpoint).run(
+                read_rows(io.StringIO(CSV), "csv")
+            )
+        self.assertEqual(Inventory.objects.count(), 2)
+
+        checkpoint.save = lambda rows: None
+        result = InventoryImporter(batch_size=2, checkpoint=checkpoint).run(
+            read_rows(io.StringIO(CSV), "csv")
+        )
+
+        self.assertEqual(result.resumed_from, 2)
+        self.assertEqual(Inventory.objects.count(), 3)
+        self.assertEqual(Media.objects.count(), 3)
+        self.assertEqual(checkpoint.rows, 0)
+
+    def test_file_checkpoint_only_resumes_the_same_content(self, upload):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "inventario.csv")
+            with open(path, "w") as f:
+                f.write(CSV)
+            FileCheckpoint(f"{path}.checkpoint", fingerprint="other").save(2)
+
+            call_command("import_inventory", path, batch_size=2, stdout=io.StringIO())
+
+            # The stale checkpoint was ignored and cleared after the import
+            self.assertEqual(Inventory.objects.count(), 3)
+            self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_admin_upload_endpoint(self, upload):
+        admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="testpass123"
+        )
+        admin.is_staff = True
+        admin.save()
+        client = APIClient()
+        client.force_authenticate(admin)
+        lines = [
+            {
+                "product": "monitor",
+                "retail_price": "99.90",
+                "store_price": "90",
+                "units": 4,
+            },
+            {"product": "monitor", "store_price": "90"},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines).encode()
+        jobs = []
+
+        def run_now(*args):
+            jobs.append(import_inventory_file.apply(args=args))
+            return jobs[-1]
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            override_settings(INVENTORY_IMPORT_DIR=directory),
+            mock.patch.object(import_inventory_file, "delay", side_effect=run_now),
+        ):
+            response = client.post(
+                "/api/inventory/import/",
+                {"file": SimpleUploadedFile("inventario.jsonl", body)},
+                secure=True,
+            )
+
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data["job_id"], jobs[0].id)
+            self.assertEqual(len(response.data["checkpoint"]), 64)
+            result = jobs[0].get()
+            self.assertEqual(result["created"], 1)
+            self.assertEqual(result["errors"][0]["row"], 2)
+            self.assertEqual(Inventory.objects.get().user, admin)
+            # The processed upload is removed
+            self.assertEqual(os.listdir(directory), [])
+
+            # A finished import leaves no checkpoint: the same file is imported anew
+            client.post(
+                "/api/inventory/import/",
+                {"file": SimpleUploadedFile("inventario.jsonl", body)},
+                secure=True,
+            )
+            self.assertEqual(jobs[1].get()["resumed_from"], 0)
+            self.assertEqual(Inventory.objects.count(), 2)
+
+    def test_new_names_are_created_in_bulk(self, upload):
+        Product.objects.create(name="Monitor!")
+        rows = [
+            {
+                "product": product,
+                "brand": f"marca {i}",
+                "type": "Periféricos",
+                "retail_price": "10",
+                "store_price": "9",
+                "attributes": f"Color:C{i}",
+            }
+            for i, product in enumerate(["monitor", "monitor?", "mouse", "teclado"])
+        ]
+        importer = InventoryImporter()
+
+        # Lookup, insert and re-fetch per model: the count does not grow with rows
+        with self.assertNumQueries(15):
+            importer._resolve([importer._parse(row) for row in rows])
+
+        # Slugs are unique against the table and within the batch
+        self.assertEqual(
+            sorted(Product.objects.values_list("slug", flat=True)),
+            ["monitor", "monitor-2", "monitor-3", "mouse", "teclado"],
+        )
+        self.assertEqual(Type.objects.get().slug, "perifericos")
+        self.assertEqual(Brand.objects.count(), 4)
+        self.assertEqual(AttributeValue.objects.count(), 4)
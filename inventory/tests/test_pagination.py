@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from common.testing import locmem_caches
+from inventory.models import Inventory
+from products.models import Product
+
+
+@locmem_caches
+class InventoryCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        product = Product.objects.create(name="product")
+        self.inventories = [
+            Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            for _ in range(5)
+        ]
+        # Same created_at for some rows: pkid breaks the tie
+        first = self.inventories[0]
+        Inventory.objects.filter(
+            pkid__in=[i.pkid for i in self.inventories[:3]]
+        ).update(created_at=first.created_at)
+
+    def get(self, url="/api/inventory/all/", **params):
+        return self.client.get(url, params, secure=True)
+
+    def ids(self, response):
+        return [item["id"] for item in response.data["results"]]
+
+    def test_walks_forward_and_back_without_gaps_or_count(self):
+        expected = [
+            str(i.id) for i in Inventory.objects.order_by("-created_at", "-pkid")
+        ]
+
+        first = self.get(page_size=2)
+        self.assertNotIn("count", first.data)
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"], secure=True)
+        third = self.client.get(second.data["next"], secure=True)
+
+        self.assertEqual(self.ids(first) + self.ids(second) + self.ids(third), expected)
+        self.assertIsNone(third.data["next"])
+
+        back = self.client.get(third.data["previous"], secure=True)
+        self.assertEqual(self.ids(back), self.ids(second))
+
+    def test_page_number_mode_is_opt_in(self):
+        response = self.get(page=2, page_size=2)
+
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.get(cursor="not-a-cursor").status_code, 404)
@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from categories.models import Category, MeasureUnit
+from common.cache import get_tag_versions
+from common.testing import locmem_caches
+from inventory.models import Inventory, Stock
+from products.models import Product
+
+
+@locmem_caches
+class CatalogResponseCacheTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.inventories = []
+        for i in range(2):
+            product = Product.objects.create(name=f"product {i}")
+            inventory = Inventory.objects.create(
+                product=product,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            Stock.objects.create(inventory=inventory, units=3)
+            self.inventories.append(inventory)
+
+    def list_inventory(self, **params):
+        return self.client.get("/api/inventory/all/", params, secure=True)
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.list_inventory(page_size=5)
+
+        with self.assertNumQueries(0):
+            second = self.list_inventory(page_size=5)
+
+        self.assertEqual(first.data, second.data)
+
+    def test_only_responses_tagged_with_the_changed_inventory_are_invalidated(self):
+        self.list_inventory()
+        self.client.get(
+            f"/api/inventory/product/{self.inventories[0].product.ref_code}/",
+            secure=True,
+        )
+        by_ref_code = f"/api/inventory/product/{self.inventories[1].product.ref_code}/"
+        self.client.get(by_ref_code, secure=True)
+
+        stock = self.inventories[0].inventory_stock
+        stock.units = 7
+        stock.save()
+
+        # The other inventory's response is still cached
+        with self.assertNumQueries(0):
+            self.client.get(by_ref_code, secure=True)
+        # The list renders the changed inventory, so it is recomputed
+        with self.assertNumQueries(4):
+            self.list_inventory()
+
+    def test_new_inventory_invalidates_the_listings(self):
+        self.assertEqual(len(self.list_inventory().data["results"]), 2)
+
+        Inventory.objects.create(
+            product=self.inventories[0].product,
+            retail_price=Decimal("10.00"),
+            store_price=Decimal("10.00"),
+        )
+
+        self.assertEqual(len(self.list_inventory().data["results"]), 3)
+
+    def test_only_list_fields_invalidate_the_collection(self):
+        inventory = self.inventories[0]
+        version = get_tag_versions(["inventory:list"])["inventory:list"]
+
+        inventory.weight = 2.5
+        inventory.save()
+        self.assertEqual(
+            get_tag_versions(["inventory:list"])["inventory:list"], version
+        )
+
+        inventory.is_active = not inventory.is_active
+        inventory.save()
+        self.assertNotEqual(
+            get_tag_versions(["inventory:list"])["inventory:list"], version
+        )
+
+    def test_category_changes_only_invalidate_its_pages(self):
+        unit = MeasureUnit.objects.create(description="Units")
+        parent = Category.objects.create(name="Electronics", measure_unit=unit)
+        child = Category.objects.create(name="Phones", parent=parent, measure_unit=unit)
+        other = Category.objects.create(name="Garden", measure_unit=unit)
+        by_parent = f"/api/inventory/category/{parent.slug}/"
+        by_other = f"/api/inventory/category/{other.slug}/"
+        self.assertEqual(
+            len(self.client.get(by_parent, secure=True).data["results"]), 0
+        )
+        self.client.get(by_other, secure=True)
+        self.list_inventory()
+
+        self.inventories[0].product.category.add(child)
+
+        with self.assertNumQueries(0):
+            self.client.get(by_other, secure=True)
+        response = self.client.get(by_parent, secure=True)
+        self.assertEqual(len(response.data["results"]), 1)
+
+        # Editing a category leaves the catalog and other categories cached
+        self.list_inventory()
+        child.name = "Mobiles"
+        child.save()
+        with self.assertNumQueries(0):
+            self.list_inventory()
+            self.client.get(by_other, secure=True)
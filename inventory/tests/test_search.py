@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from common.testing import LOCMEM_CACHES
+from inventory.models import Inventory
+from inventory.search import search_inventory
+from products.models import Product
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CATALOG_SEARCH_TRIGRAM=False)
+class CatalogSearchTest(TestCase):
+    def setUp(self):
+        self.inventories = {}
+        for name, description in [
+            ("Teclado mecánico", "Teclado con switches azules"),
+            ("Mouse inalámbrico", "Compatible con teclado y portátil"),
+            ("Monitor curvo", "Pantalla de 27 pulgadas"),
+        ]:
+            self.inventories[name] = Inventory.objects.create(
+                product=Product.objects.create(name=name, description=description),
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+
+    def test_name_matches_rank_above_description_matches(self):
+        results = list(search_inventory(Inventory.objects.all(), "teclados"))
+
+        self.assertEqual(
+            results,
+            [
+                self.inventories["Teclado mecánico"],
+                self.inventories["Mouse inalámbrico"],
+            ],
+        )
+
+    def test_search_endpoint_is_paginated(self):
+        response = APIClient().get(
+            "/api/inventory/search/",
+            {"query": "teclado", "page_size": 1},
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertIsNotNone(response.data["next"])
+        self.assertEqual(len(response.data["inventories"]), 1)
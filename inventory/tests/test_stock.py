@@ -0,0 +1,217 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from common.testing import locmem_caches
+from inventory.exceptions import InsufficientStock
+from inventory.models import Inventory, Stock, StockHold
+from inventory.stock import (
+    place_holds,
+    release_expired_holds,
+    release_order_stock,
+    release_stock,
+    reserve_stock,
+)
+from orders.models import Order
+from products.models import Product
+from shipping.models import Shipping
+
+User = get_user_model()
+
+
+def create_stock(units, name="Teclado"):
+    inventory = Inventory.objects.create(
+        product=Product.objects.create(name=name),
+        retail_price=Decimal("10.00"),
+        store_price=Decimal("9.00"),
+    )
+    return Stock.objects.create(inventory=inventory, units=units)
+
+
+@locmem_caches
+class StockReservationTest(TestCase):
+    def setUp(self):
+        self.keyboard = create_stock(5)
+        self.mouse = create_stock(1, name="Mouse")
+
+    def test_reserve_and_release(self):
+        lines = [(self.keyboard.inventory_id, 2), (self.keyboard.inventory_id, 1)]
+        with self.assertNumQueries(1 + 2):  # savepoint + one UPDATE per inventory
+            reserve_stock(lines)
+
+        self.keyboard.refresh_from_db()
+        self.assertEqual((self.keyboard.units, self.keyboard.units_sold), (2, 3))
+
+        release_stock(lines)
+        self.keyboard.refresh_from_db()
+        self.assertEqual((self.keyboard.units, self.keyboard.units_sold), (5, 0))
+
+    def test_failed_line_rolls_back_every_line(self):
+        orphan = Inventory.objects.create(
+            product=self.keyboard.inventory.product,
+            retail_price=Decimal("1.00"),
+            store_price=Decimal("1.00"),
+        )
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock(
+                [
+                    (self.keyboard.inventory_id, 2),
+                    (self.mouse.inventory_id, 3),
+                    (orphan.pkid, 1),
+                ]
+            )
+
+        self.assertEqual(
+            ctx.exception.failures,
+            [
+                {"inventory": self.mouse.inventory_id, "requested": 3, "available": 1},
+                {"inventory": orphan.pkid, "requested": 1, "available": None},
+            ],
+        )
+        self.keyboard.refresh_from_db()
+        self.assertEqual(self.keyboard.units, 5)
+
+    def test_release_never_leaves_negative_units_sold(self):
+        release_stock([(self.mouse.inventory_id, 2), (None, 4)])
+        self.mouse.refresh_from_db()
+        self.assertEqual((self.mouse.units, self.mouse.units_sold), (3, 0))
+
+
+@locmem_caches
+class StockHoldTest(TestCase):
+    def setUp(self):
+        self.stock = create_stock(5)
+        self.user = User.objects.create_user(
+            username="buyer", email="buyer@example.com", password="testpass123"
+        )
+        self.shipping = Shipping.objects.create(
+            name="Standard", standard_shipping_cost=Decimal("5.00"), is_active=True
+        )
+        self.later = timezone.now() + timedelta(minutes=30)
+
+    def create_order(self, transaction_id):
+        return Order.objects.create(
+            user=self.user,
+            amount=Decimal("20.00"),
+            shipping=self.shipping,
+            status=Order.OrderStatus.PENDING,
+            transaction_id=transaction_id,
+        )
+
+    def assertStock(self, units, units_sold, units_held):
+        self.stock.refresh_from_db()
+        self.assertEqual(
+            (self.stock.units, self.stock.units_sold, self.stock.units_held),
+            (units, units_sold, units_held),
+        )
+
+    def test_holds_reduce_available_units_until_paid(self):
+        order = self.create_order("txn-paid")
+        place_holds(order, [(self.stock.inventory_id, 3)], self.later)
+        self.assertStock(5, 0, 3)
+        self.assertEqual(self.stock.available_units, 2)
+
+        with self.assertRaises(InsufficientStock) as ctx:
+            place_holds(
+                self.create_order("txn-late"),
+                [(self.stock.inventory_id, 3)],
+                self.later,
+            )
+        self.assertEqual(ctx.exception.failures[0]["available"], 2)
+        self.assertEqual(StockHold.objects.count(), 1)
+
+        order.status = Order.OrderStatus.COMPLETED
+        order.save()
+        order.save()  # Converting is idempotent
+        self.assertStock(2, 3, 0)
+        self.assertEqual(StockHold.objects.get().status, StockHold.HoldStatus.CONVERTED)
+
+        # A refund puts the sold units back
+        release_order_stock(order.pk, [(self.stock.inventory_id, 3)])
+        self.assertStock(5, 0, 0)
+
+    def test_cancelled_and_expired_holds_are_released_once(self):
+        cancelled = self.create_order("txn-cancelled")
+        place_holds(cancelled, [(self.stock.inventory_id, 1)], self.later)
+        release_order_stock(cancelled.pk, [(self.stock.inventory_id, 1)])
+        release_order_stock(cancelled.pk, [(self.stock.inventory_id, 1)])
+        self.assertStock(5, 0, 0)
+
+        for i in range(3):
+            place_holds(
+                self.create_order(f"txn-{i}"),
+                [(self.stock.inventory_id, 1)],
+                self.later,
+            )
+        StockHold.objects.filter(status=StockHold.HoldStatus.ACTIVE).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertStock(5, 0, 3)
+
+        self.assertEqual(release_expired_holds(batch_size=2), 3)
+        self.assertStock(5, 0, 0)
+        # The expiry webhook arriving afterwards changes nothing
+        release_order_stock(
+            StockHold.objects.last().order_id, [(self.stock.inventory_id, 1)]
+        )
+        self.assertStock(5, 0, 0)
+
+    def test_expired_holds_do_not_block_new_checkouts(self):
+        expired = timezone.now() - timedelta(seconds=1)
+        place_holds(
+            self.create_order("txn-old"), [(self.stock.inventory_id, 5)], expired
+        )
+
+        place_holds(
+            self.create_order("txn-new"), [(self.stock.inventory_id, 4)], self.later
+        )
+
+        self.assertStock(5, 0, 4)
+
+    def test_orders_without_holds_release_stock_directly(self):
+        order = self.create_order("txn-legacy")
+        reserve_stock([(self.stock.inventory_id, 2)])
+
+        release_order_stock(order.pk, [(self.stock.inventory_id, 2)])
+
+        self.assertStock(5, 0, 0)
+
+
+@locmem_caches
+class StockReservationConcurrencyTest(TransactionTestCase):
+    def test_concurrent_checkouts_never_oversell(self):
+        stock = create_stock(10)
+        other = create_stock(100, name="Mouse")
+        results = []
+        barrier = threading.Barrier(25)
+
+        def checkout(index):
+            # Half of the buyers reserve the lines in the opposite order
+            lines = [(stock.inventory_id, 1), (other.inventory_id, 1)]
+            if index % 2:
+                lines.reverse()
+            try:
+                barrier.wait()
+                reserve_stock(lines)
+                results.append(True)
+            except InsufficientStock:
+                results.append(False)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=checkout, args=(i,)) for i in range(25)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stock.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual((stock.units, stock.units_sold), (0, 10))
+        self.assertEqual(other.units, 90)
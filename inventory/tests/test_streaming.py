@@ -0,0 +1,52 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from common.testing import LOCMEM_CACHES
+from inventory.models import Inventory
+from products.models import Product
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CATALOG_SEARCH_TRIGRAM=False)
+class StreamingResponsesTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(5):
+            Inventory.objects.create(
+                product=Product.objects.create(name=f"Teclado {i}"),
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+
+    def body(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_images_stream_as_json_array_in_chunks(self):
+        with mock.patch("common.streaming.STREAM_CHUNK_SIZE", 2):
+            response = self.client.get("/api/inventory/images/", secure=True)
+            # One server-side cursor, one media prefetch per chunk of 2
+            with self.assertNumQueries(4):
+                data = json.loads(self.body(response))
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            [item["product_name"] for item in data],
+            [f"Teclado {i}" for i in range(5)],
+        )
+
+    def test_search_streams_ndjson_when_negotiated(self):
+        response = self.client.get(
+            "/api/inventory/search/",
+            {"query": "teclado"},
+            secure=True,
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+
+        lines = self.body(response).splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(lines), 5)
+        self.assertIn("sku", json.loads(lines[0]))
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from common.testing import locmem_caches
+from inventory.models import Inventory, InventoryViews
+from inventory.tracking import DIRTY_KEY, apply_views, flush_views, pending_key
+from products.models import Product
+
+
+@locmem_caches
+class InventoryViewsTrackingTest(TestCase):
+    def setUp(self):
+        self.inventories = [
+            Inventory.objects.create(
+                product=Product.objects.create(name=f"product {i}"),
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            for i in range(3)
+        ]
+
+    def test_detail_view_only_buffers_the_view(self):
+        inventory = self.inventories[0]
+        with (
+            mock.patch("inventory.views.record_view") as record_view,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            response = APIClient().get(
+                f"/api/inventory/details/{inventory.id}/",
+                secure=True,
+                REMOTE_ADDR="10.0.0.1",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        record_view.assert_called_once_with(inventory, "10.0.0.1")
+        writes = [
+            query["sql"]
+            for query in queries
+            if not query["sql"].lstrip().upper().startswith("SELECT")
+        ]
+        self.assertEqual(writes, [])
+
+    def test_apply_views_counts_unique_ips_in_bulk(self):
+        first, second, third = self.inventories
+        InventoryViews.objects.create(inventory=first, ip="10.0.0.1")
+
+        # savepoint + 2 lookups + 1 insert + 1 update per distinct delta + release
+        with self.assertNumQueries(7):
+            created = apply_views(
+                {
+                    first.pkid: {"10.0.0.1", "10.0.0.2"},
+                    second.pkid: {"10.0.0.1", "10.0.0.2"},
+                    third.pkid: {"10.0.0.3"},
+                    0: {"10.0.0.4"},
+                }
+            )
+
+        self.assertEqual(created, 4)
+        views = dict(Inventory.objects.values_list("pkid", "views"))
+        self.assertEqual(views, {first.pkid: 1, second.pkid: 2, third.pkid: 1})
+        self.assertEqual(InventoryViews.objects.count(), 5)
+
+    def test_failed_flush_puts_the_views_back(self):
+        pkid = self.inventories[0].pkid
+        redis = mock.MagicMock()
+        redis.spop.return_value = [str(pkid).encode()]
+        drain, restore = mock.MagicMock(), mock.MagicMock()
+        redis.pipeline.side_effect = [drain, restore]
+        drain.execute.return_value = [{b"10.0.0.1", b"10.0.0.2"}, 1]
+
+        with (
+            mock.patch("inventory.tracking.get_redis_connection", return_value=redis),
+            mock.patch(
+                "inventory.tracking.apply_views", side_effect=RuntimeError("db down")
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            flush_views()
+
+        restore.sadd.assert_any_call(pending_key(pkid), mock.ANY, mock.ANY)
+        self.assertEqual(
+            set(restore.sadd.call_args_list[0].args[1:]), {"10.0.0.1", "10.0.0.2"}
+        )
+        restore.sadd.assert_any_call(DIRTY_KEY, pkid)
+        restore.execute.assert_called_once()
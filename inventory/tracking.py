@@ -0,0 +1,153 @@
+"""
+Buffered unique-view counting for the inventory detail page.
+
+A page view only touches Redis: the visitor IP goes into the per-inventory
+set ``inventory:views:seen:<pkid>`` and, the first time it is seen, into
+``inventory:views:pending:<pkid>`` (whose size is the pending view delta),
+and the inventory is marked in ``inventory:views:dirty``.
+``inventory.tasks.flush_inventory_views`` moves the pending IPs to
+``InventoryViews`` with ``bulk_create`` and adds the deltas to
+``Inventory.views`` with ``F()`` updates.
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from redis.exceptions import RedisError
+
+from common.redis import get_redis_connection
+
+from .models import Inventory, InventoryViews
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "inventory:views:dirty"
+
+RECORD_SCRIPT = """
+    if redis.call('SADD', KEYS[1], ARGV[1]) == 1 then
+        redis.call('SADD', KEYS[2], ARGV[1])
+        redis.call('SADD', KEYS[3], ARGV[2])
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+"""
+
+
+def seen_key(pkid):
+    return f"inventory:views:seen:{pkid}"
+
+
+def pending_key(pkid):
+    return f"inventory:views:pending:{pkid}"
+
+
+def get_client_ip(request):
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        return x_forwarded_for.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR")
+
+
+def record_view(inventory, ip):
+    """Buffers a view of ``inventory`` from ``ip``; never writes to Postgres."""
+    if not ip:
+        return
+    try:
+        redis = get_redis_connection()
+        redis.eval(
+            RECORD_SCRIPT,
+            3,
+            seen_key(inventory.pkid),
+            pending_key(inventory.pkid),
+            DIRTY_KEY,
+            ip,
+            inventory.pkid,
+            settings.INVENTORY_VIEWS_SEEN_TTL,
+        )
+    except RedisError as e:
+        # Perder una visita es preferible a fallar la página del producto
+        logger.warning(f"Error buffering view of inventory {inventory.id}: {str(e)}")
+
+
+def apply_views(views):
+    """
+    Persists ``{inventory pkid: set of ips}``. IPs that already have an
+    ``InventoryViews`` row (e.g. the Redis seen-set expired) are skipped, so
+    ``Inventory.views`` stays a count of unique IPs. Returns the rows created.
+    """
+    views = {pkid: ips for pkid, ips in views.items() if ips}
+    if not views:
+        return 0
+
+    with transaction.atomic():
+        existing_pkids = set(
+            Inventory.objects.filter(pkid__in=views).values_list("pkid", flat=True)
+        )
+        already_seen = set(
+            InventoryViews.objects.filter(
+                inventory_id__in=existing_pkids,
+                ip__in={ip for ips in views.values() for ip in ips},
+            ).values_list("inventory_id", "ip")
+        )
+        rows = [
+            InventoryViews(inventory_id=pkid, ip=ip)
+            for pkid, ips in views.items()
+            if pkid in existing_pkids
+            for ip in ips
+            if (pkid, ip) not in already_seen
+        ]
+        InventoryViews.objects.bulk_create(rows, batch_size=1000)
+
+        # Un UPDATE por cada incremento distinto, no uno por inventario
+        pkids_by_delta = defaultdict(list)
+        for pkid, delta in Counter(row.inventory_id for row in rows).items():
+            pkids_by_delta[delta].append(pkid)
+        for delta, pkids in pkids_by_delta.items():
+            Inventory.objects.filter(pkid__in=pkids).update(views=F("views") + delta)
+
+    return len(rows)
+
+
+def restore_views(redis, views):
+    """Puts drained ``{inventory pkid: set of ips}`` back in the buffer."""
+    pipe = redis.pipeline()
+    for pkid, ips in views.items():
+        if ips:
+            pipe.sadd(pending_key(pkid), *ips)
+    pipe.sadd(DIRTY_KEY, *views)
+    pipe.execute()
+
+
+def flush_views(batch_size=500):
+    """
+    Drains the dirty inventories in batches. The pending set of each one is
+    read and deleted in a MULTI block, so views buffered meanwhile land in a
+    fresh set and re-mark the inventory dirty. If the batch cannot be
+    written, its IPs are added back to the pending sets (merging with the
+    ones buffered meanwhile) and the inventories marked dirty again before
+    re-raising; ``apply_views`` skips IPs already stored, so a retry never
+    counts a view twice.
+    """
+    redis = get_redis_connection()
+    created = 0
+    while True:
+        pkids = [int(pkid) for pkid in redis.spop(DIRTY_KEY, batch_size) or []]
+        if not pkids:
+            break
+        pipe = redis.pipeline()
+        for pkid in pkids:
+            pipe.smembers(pending_key(pkid))
+            pipe.delete(pending_key(pkid))
+        members = pipe.execute()[::2]
+        views = {
+            pkid: {ip.decode() for ip in ips}
+            for pkid, ips in zip(pkids, members, strict=True)
+        }
+        try:
+            created += apply_views(views)
+        except Exception:
+            restore_views(redis, views)
+            raise
+    return created
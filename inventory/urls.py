@@ -5,22 +5,27 @@ from .views import (
     AttributeValueListAPIView,
     BrandCreateAPIView,
     BrandListAPIView,
+    FacetedInventorySearchAPIView,
     InventoryByCategoryAPIView,
     InventoryByRefCode,
     InventoryDetailView,
     InventoryImages,
     InventoryListAPIView,
     ListUsersInventoryAPIView,
+    TopRatedInventoryAPIView,
     TypeCreateAPIView,
     TypeListAPIView,
     create_inventory_api_view,
     delete_inventory_api_view,
+    import_inventory_api_view,
+    import_inventory_status_api_view,
     search_api_view,
     update_inventory_api_view,
 )
 
 urlpatterns = [
     path("all/", InventoryListAPIView.as_view()),
+    path("top-rated/", TopRatedInventoryAPIView.as_view(), name="inventory-top-rated"),
     path(
         "user/",
         ListUsersInventoryAPIView.as_view(),
@@ -40,8 +45,19 @@ urlpatterns = [
     path("product/<str:query>/", InventoryByRefCode.as_view()),
     path("update/<int:sku>/", update_inventory_api_view, name="update-inventory"),
     path("create/", create_inventory_api_view, name="inventory-create"),
+    path("import/", import_inventory_api_view, name="inventory-import"),
+    path(
+        "import/<str:job_id>/",
+        import_inventory_status_api_view,
+        name="inventory-import-status",
+    ),
     path("delete/<int:sku>/", delete_inventory_api_view, name="delete-inventory"),
     path("search/", search_api_view, name="inventory-search"),
+    path(
+        "facets/",
+        FacetedInventorySearchAPIView.as_view(),
+        name="inventory-faceted-search",
+    ),
     # path("search/", InventorySearchAPIView.as_view(), name="inventory-search"),
     path("brands/create/", BrandCreateAPIView.as_view(), name="brand-create"),
     path("brands/list/", BrandListAPIView.as_view(), name="brand-list"),
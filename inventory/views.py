@@ -1,14 +1,27 @@
 import django_filters
+from celery.result import AsyncResult
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from categories.tree import subtree_tags
+from common.cache import TaggedCacheMixin, cache_response, inventory_tags
+from common.streaming import (
+    STREAMING_RENDERER_CLASSES,
+    streaming_response,
+    wants_ndjson,
+)
+
 from .exceptions import InventoryNotFound
+from .facets import get_facets, price_bucket_range
+from .importer import save_upload
 from .models import AttributeValue, Brand, Inventory, InventoryViews, Type
-from .pagination import InventoryPagination
+from .pagination import InventoryCursorPagination, InventoryPagination
+from .search import search_inventory
 from .serializers import (
     AttributeValueCreateSerializer,
     BrandSerializer,
@@ -19,10 +32,13 @@ from .serializers import (
     TypeCreateSerializer,
     TypeSerializer,
 )
+from .tasks import import_inventory_file
+from .tracking import get_client_ip, record_view
 
 
 # Vista para listar marcas
-class BrandListAPIView(generics.ListAPIView):
+class BrandListAPIView(TaggedCacheMixin, generics.ListAPIView):
+    cache_tags = ("brand:list",)
     queryset = Brand.objects.all().order_by("name")
     serializer_class = BrandSerializer
     permission_classes = [permissions.AllowAny]
@@ -50,7 +66,8 @@ class AttributeValueCreateAPIView(generics.CreateAPIView):
 
 
 # Vista para listar tipos
-class TypeListAPIView(generics.ListAPIView):
+class TypeListAPIView(TaggedCacheMixin, generics.ListAPIView):
+    cache_tags = ("type:list",)
     queryset = Type.objects.all().order_by("name")
     serializer_class = TypeSerializer
     permission_classes = [permissions.AllowAny]
@@ -79,11 +96,30 @@ class InventoryFilter(django_filters.FilterSet):
         fields = ["type", "quality", "retail_price"]
 
 
-class InventoryListAPIView(generics.ListAPIView):
+class CatalogFacetFilter(InventoryFilter):
+    brand = django_filters.CharFilter(field_name="brand__name", lookup_expr="iexact")
+    category = django_filters.CharFilter(
+        field_name="product__category__slug", distinct=True
+    )
+    price_bucket = django_filters.CharFilter(method="filter_price_bucket")
+
+    def filter_price_bucket(self, queryset, name, value):
+        price_range = price_bucket_range(value)
+        if price_range is None:
+            return queryset.none()
+        lower, upper = price_range
+        queryset = queryset.filter(store_price__gte=lower)
+        if upper is not None:
+            queryset = queryset.filter(store_price__lt=upper)
+        return queryset
+
+
+class InventoryListAPIView(TaggedCacheMixin, generics.ListAPIView):
+    cache_tags = ("inventory:list",)
     serializer_class = InventorySerializer
-    queryset = Inventory.objects.all().order_by("-created_at")
+    queryset = Inventory.objects.for_catalog().order_by("-created_at")
     permission_classes = [permissions.AllowAny]
-    pagination_class = InventoryPagination
+    pagination_class = InventoryCursorPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -91,12 +127,49 @@ class InventoryListAPIView(generics.ListAPIView):
     ]
     filterset_class = InventoryFilter
     search_fields = ["product", "type"]
-    ordering_fields = ["created_at"]
+    ordering_fields = ["created_at", "rating_avg", "rating_count"]
 
+    def get_object_cache_tags(self, objects):
+        return inventory_tags(objects)
+
+
+class TopRatedInventoryAPIView(generics.ListAPIView):
+    serializer_class = InventorySerializer
+    queryset = Inventory.objects.for_catalog().top_rated()
+    permission_classes = [permissions.AllowAny]
+    pagination_class = InventoryPagination
+
+
+class FacetedInventorySearchAPIView(generics.ListAPIView):
+    """
+    Paginated catalog results plus facet counts (brand, type, quality,
+    category, price bucket) for the same filters, cached per combination.
+    """
 
-class ListUsersInventoryAPIView(generics.ListAPIView):
     serializer_class = InventorySerializer
+    permission_classes = [permissions.AllowAny]
     pagination_class = InventoryPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CatalogFacetFilter
+
+    def get_queryset(self):
+        return search_inventory(
+            Inventory.objects.for_catalog().filter(published_status=True),
+            self.request.query_params.get("query"),
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data["facets"] = get_facets(queryset, request.query_params)
+        return response
+
+
+class ListUsersInventoryAPIView(generics.ListAPIView):
+    serializer_class = InventorySerializer
+    pagination_class = InventoryCursorPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -108,7 +181,9 @@ class ListUsersInventoryAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Inventory.objects.filter(user=user).order_by("-created_at")
+        queryset = (
+            Inventory.objects.for_catalog().filter(user=user).order_by("-created_at")
+        )
         return queryset
 
 
@@ -121,30 +196,22 @@ class InventoryDetailView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, id):
-        inventory = Inventory.objects.get(id=id)
+        inventory = Inventory.objects.for_catalog().get(id=id)
 
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-
-        if not InventoryViews.objects.filter(inventory=inventory, ip=ip).exists():
-            InventoryViews.objects.create(inventory=inventory, ip=ip)
-
-            inventory.views += 1
-            inventory.save()
+        # La visita se acumula en Redis; inventory.tasks la persiste
+        record_view(inventory, get_client_ip(request))
 
         serializer = InventorySerializer(inventory, context={"request": request})
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class InventoryByCategoryAPIView(generics.ListAPIView):
+class InventoryByCategoryAPIView(TaggedCacheMixin, generics.ListAPIView):
+    cache_tags = ("inventory:list",)
     permission_classes = (permissions.AllowAny,)
-    pagination_class = InventoryPagination
+    pagination_class = InventoryCursorPagination
     serializer_class = InventorySerializer
-    queryset = Inventory.objects.all()
+    queryset = Inventory.objects.for_catalog()
 
     def get_queryset(self):
         categories_string = self.kwargs.get(
@@ -154,26 +221,48 @@ class InventoryByCategoryAPIView(generics.ListAPIView):
             categories = categories_string.split(
                 ","
             )  # Split into individual categories
-            self.queryset = self.queryset.filter(product__category__slug__in=categories)
+            # Incluye las subcategorías (categories.CategoryClosure)
+            self.queryset = self.queryset.in_categories(categories)
+            self.categories = categories
         return self.queryset
 
+    def get_object_cache_tags(self, objects):
+        tags = inventory_tags(objects)
+        if getattr(self, "categories", None):
+            tags += subtree_tags(self.categories)
+        return tags
 
-class InventoryByRefCode(APIView):
+
+class InventoryByRefCode(TaggedCacheMixin, APIView):
+    cache_tags = ("inventory:list",)
     permission_classes = (permissions.AllowAny,)
+    renderer_classes = STREAMING_RENDERER_CLASSES
 
+    @cache_response
     def get(self, request, query=None):
-        queryset = Inventory.objects.filter(product__ref_code=query)
-        serializer = InventorySerializer(queryset, many=True)
+        queryset = Inventory.objects.for_catalog().filter(product__ref_code=query)
+        if wants_ndjson(request):
+            return streaming_response(request, queryset, InventorySerializer)
+        self.cache_objects = list(queryset)
+        serializer = InventorySerializer(self.cache_objects, many=True)
         return Response(serializer.data)
 
+    def get_object_cache_tags(self, objects):
+        return inventory_tags(objects)
+
 
 class InventoryImages(APIView):
     permission_classes = (permissions.AllowAny,)
+    renderer_classes = STREAMING_RENDERER_CLASSES
 
     def get(self, request):
-        inventories = Inventory.objects.all()
-        serializer = InventoryImagesSerializer(inventories, many=True)
-        return Response(serializer.data)
+        # Se transmite por bloques: la memoria no crece con el catálogo
+        inventories = (
+            Inventory.objects.select_related("product")
+            .prefetch_related("inventory_media")
+            .order_by("pkid")
+        )
+        return streaming_response(request, inventories, InventoryImagesSerializer)
 
 
 @api_view(["PUT"])
@@ -261,6 +350,46 @@ def create_inventory_api_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@permission_classes([permissions.IsAdminUser])
+def import_inventory_api_view(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response(
+            {"error": _("A CSV or JSONL file is required")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    fmt = request.data.get("format") or (
+        "jsonl" if upload.name.endswith(".jsonl") else "csv"
+    )
+    if fmt not in ("csv", "jsonl"):
+        return Response(
+            {"error": _("Unsupported format")}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # El progreso se guarda por contenido: reenviar el mismo archivo tras un
+    # fallo continúa desde el último lote confirmado
+    path, checkpoint = save_upload(upload, settings.INVENTORY_IMPORT_DIR, fmt)
+    # Las subidas a Cloudinary y los lotes exceden el tiempo de una petición
+    job = import_inventory_file.delay(path, fmt, checkpoint, request.user.pk)
+    return Response(
+        {"job_id": job.id, "checkpoint": checkpoint},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def import_inventory_status_api_view(request, job_id):
+    job = AsyncResult(job_id)
+    data = {"job_id": job_id, "status": job.status}
+    if job.successful():
+        data["result"] = job.result
+    elif job.failed():
+        data["error"] = str(job.result)
+    return Response(data)
+
+
 @api_view(["DELETE"])
 @permission_classes([permissions.IsAdminUser])
 def delete_inventory_api_view(request, sku):
@@ -288,14 +417,25 @@ def delete_inventory_api_view(request, sku):
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@renderer_classes(STREAMING_RENDERER_CLASSES)
 def search_api_view(request):
-    query = request.query_params.get("query")
-    if query is None:
-        query = ""
-    inventory = Inventory.objects.filter(product__name__icontains=query)
-    inventory = Inventory.objects.filter(product__description__icontains=query)
-    serializer = InventorySerializer(inventory, many=True)
-    return Response({"inventories": serializer.data})
+    queryset = search_inventory(
+        Inventory.objects.for_catalog(), request.query_params.get("query")
+    )
+    if wants_ndjson(request):
+        # Todos los resultados, por relevancia, sin paginar
+        return streaming_response(request, queryset, InventorySerializer)
+    paginator = InventoryPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = InventorySerializer(page, many=True)
+    return Response(
+        {
+            "count": paginator.page.paginator.count,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "inventories": serializer.data,
+        }
+    )
 
 
 class InventorySearchAPIView(APIView):
@@ -303,11 +443,11 @@ class InventorySearchAPIView(APIView):
     serializer_class = InventoryCreateSerializer
 
     def post(self, request):
-        queryset = Inventory.objects.filter(published_status=True)
+        queryset = Inventory.objects.for_catalog().filter(published_status=True)
         data = self.request.data
 
         type = data["type"]
-        queryset = queryset.filter(type__iexact=type)
+        queryset = queryset.filter(type__name__iexact=type)
 
         quality = data["quality"]
         queryset = queryset.filter(quality__iexact=quality)
@@ -332,8 +472,10 @@ class InventorySearchAPIView(APIView):
             queryset = queryset.filter(store_price__gte=store_price)
 
         catch_phrase = data["catch_phrase"]
-        queryset = queryset.filter(description__icontains=catch_phrase)
+        queryset = search_inventory(queryset, catch_phrase)
 
-        serializer = InventorySerializer(queryset, many=True)
+        paginator = InventoryPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = InventorySerializer(page, many=True)
 
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0002_order_address_order_shipping_order_user_and_more"),
+        ("shipping", "0001_initial"),
+        ("users", "0002_alter_address_address_line_2_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_at", "pkid"], name="order_created_pkid_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at", "pkid"], name="order_user_created_idx"
+            ),
+        ),
+    ]
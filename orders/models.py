@@ -44,6 +44,13 @@ class Order(TimeStampedUUIDModel):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            # Paginación por cursor (common.pagination.KeysetPagination)
+            models.Index(fields=["created_at", "pkid"], name="order_created_pkid_idx"),
+            models.Index(
+                fields=["user", "created_at", "pkid"], name="order_user_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.transaction_id} - {self.status}"
@@ -71,4 +78,4 @@ class OrderItem(TimeStampedUUIDModel):
         """
         Total cost of the ordered item
         """
-        return round(self.count * self.inventory.store_price, 2)
+        return round(self.count * self.price, 2)
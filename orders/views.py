@@ -6,6 +6,7 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.pagination import KeysetPagination
 from coupons.models import CouponUsage
 
 from .models import Order, OrderItem
@@ -21,8 +22,15 @@ class ListOrdersView(APIView):
     def get(self, request, format=None):
         user = self.request.user
 
+        # Fuera del try: un cursor inválido debe responder 404, no 500
+        paginator = KeysetPagination()
+        orders = paginator.paginate_queryset(
+            Order.objects.select_related("shipping", "address").filter(user=user),
+            request,
+            view=self,
+        )
+
         try:
-            orders = Order.objects.order_by("-created_at").filter(user=user)
             result = []
 
             for order in orders:
@@ -87,7 +95,14 @@ class ListOrdersView(APIView):
 
                 result.append(item)
 
-            return Response({"orders": result}, status=status.HTTP_200_OK)
+            return Response(
+                {
+                    "orders": result,
+                    "next": paginator.get_next_link(),
+                    "previous": paginator.get_previous_link(),
+                },
+                status=status.HTTP_200_OK,
+            )
         except Exception as e:
             logger.error(f"Error retrieving orders: {str(e)}")
             return Response(
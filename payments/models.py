@@ -136,6 +136,13 @@ class Payment(TimeStampedUUIDModel):
             models.Index(fields=["payment_method"]),
             models.Index(fields=["stripe_payment_intent_id"]),
             models.Index(fields=["paypal_transaction_id"]),
+            # Paginación por cursor (common.pagination.KeysetPagination)
+            models.Index(
+                fields=["created_at", "pkid"], name="payment_created_pkid_idx"
+            ),
+            models.Index(
+                fields=["user", "created_at", "pkid"], name="payment_user_created_idx"
+            ),
         ]
 
     def __str__(self):
@@ -9,6 +9,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from cart.models import Cart
+from cart.services import clear_cart
 from orders.models import Order
 
 from .models import Payment, Refund, Subscription, SubscriptionHistory
@@ -194,7 +195,7 @@ def handle_checkout_session_completed_task(session_data):
         if order and order.user:
             cart = Cart.objects.filter(user=order.user).first()
             if cart and cart.items.exists():
-                cart.items.all().delete()
+                clear_cart(cart)
                 # Limpiar cupones del carrito
                 clear_cart_coupons(order.user)
                 logger.info(f"Carrito limpiado para usuario {order.user.id}")
@@ -301,7 +302,7 @@ def handle_payment_intent_succeeded_task(payment_intent_data):
         # Limpiar el carrito después del pago exitoso
         cart = Cart.objects.filter(user=payment.order.user).first()
         if cart:
-            cart.items.all().delete()
+            clear_cart(cart)
             # Limpiar cupones del carrito
             clear_cart_coupons(payment.order.user)
 
@@ -1101,7 +1102,7 @@ def handle_charge_succeeded_task(charge_data):
             if payment.order and payment.order.user:
                 cart = Cart.objects.filter(user=payment.order.user).first()
                 if cart and cart.items.exists():
-                    cart.items.all().delete()
+                    clear_cart(cart)
                     # Limpiar cupones del carrito
                     clear_cart_coupons(payment.order.user)
                     logger.info(
@@ -3,6 +3,8 @@ import json
 import logging
 import time
 import uuid
+from collections import defaultdict
+from datetime import timedelta
 from decimal import Decimal
 
 # Third-party
@@ -25,7 +27,12 @@ from rest_framework.throttling import UserRateThrottle
 
 # Local/First-party
 from cart.models import Cart
+from cart.services import CartPricing, clear_cart
+from cart.store import flush_cart
+from common.pagination import KeysetPagination
 from coupons.models import Coupon, CouponUsage
+from inventory.exceptions import InsufficientStock
+from inventory.stock import place_holds, release_order_stock
 from orders.models import Order, OrderItem
 from shipping.models import Shipping
 from shipping.services import ServientregaService
@@ -258,54 +265,37 @@ class PaymentRateThrottle(UserRateThrottle):
 
 
 class PaymentViewSet(viewsets.ModelViewSet):
-    def reserve_inventory(self, cart_items):
-        """Reserva el inventario de los productos del carrito al crear la orden."""
-        for item in cart_items:
-            inventory = item.inventory
-            stock = getattr(inventory, "inventory_stock", None)
-            logger.info(
-                f"[RESERVE] Item: {getattr(inventory, 'id', None)} | Stock: {stock} | Qty: {item.quantity}"
-            )
-            if not stock:
-                logger.error(
-                    f"[RESERVE] No hay registro de stock para {getattr(inventory.product, 'name', 'N/A')}"
-                )
-                raise ValidationError(
-                    f"No hay registro de stock para {inventory.product.name}"
-                )
-            if stock.units < item.quantity:
-                logger.error(
-                    f"[RESERVE] Inventario insuficiente para {getattr(inventory.product, 'name', 'N/A')}: {stock.units} < {item.quantity}"
-                )
-                raise ValidationError(
-                    f"Inventario insuficiente para {inventory.product.name}"
-                )
-            stock.units -= item.quantity
-            stock.units_sold += item.quantity
-            stock.save()
-            logger.info(
-                f"[RESERVE] Nuevo stock: {stock.units} | Vendidos: {stock.units_sold}"
+    def reserve_inventory(self, cart_items, order):
+        """Retiene el inventario del carrito para la orden hasta que venza el pago."""
+        cart_items = list(cart_items)
+        expires_at = timezone.now() + timedelta(seconds=settings.STOCK_HOLD_TIMEOUT)
+        try:
+            place_holds(
+                order,
+                ((item.inventory.pkid, item.quantity) for item in cart_items),
+                expires_at,
             )
+        except InsufficientStock as e:
+            products = {
+                item.inventory.pkid: item.inventory.product.name for item in cart_items
+            }
+            names = [products[failure["inventory"]] for failure in e.failures]
+            logger.error(f"[RESERVE] Inventario insuficiente: {e.failures}")
+            raise ValidationError(
+                f"Inventario insuficiente para {', '.join(names)}"
+            ) from e
+        logger.info(
+            f"[RESERVE] Retenidas {len(cart_items)} líneas hasta {expires_at.isoformat()}"
+        )
 
     def release_inventory(self, order_items):
         """Libera el inventario reservado si el pago falla/caduca/cancela."""
+        lines_by_order = defaultdict(list)
         for item in order_items:
-            inventory = item.inventory
-            stock = getattr(inventory, "inventory_stock", None)
-            logger.info(
-                f"[RELEASE] Item: {getattr(inventory, 'id', None)} | Stock: {stock} | Qty: {item.count}"
-            )
-            if not stock:
-                logger.warning(
-                    f"[RELEASE] No hay registro de stock para {getattr(inventory.product, 'name', 'N/A')}"
-                )
-                continue  # Si no hay stock, no se puede liberar
-            stock.units += item.count
-            stock.units_sold = max(0, stock.units_sold - item.count)
-            stock.save()
-            logger.info(
-                f"[RELEASE] Nuevo stock: {stock.units} | Vendidos: {stock.units_sold}"
-            )
+            lines_by_order[item.order_id].append((item.inventory_id, item.count))
+        for order_id, lines in lines_by_order.items():
+            release_order_stock(order_id, lines)
+        logger.info(f"[RELEASE] Liberadas {len(lines_by_order)} órdenes")
 
     queryset = Payment.objects.select_related(
         "order", "user", "payment_method", "order__shipping", "order__user"
@@ -313,6 +303,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated, IsPaymentByUser]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
     lookup_field = "id"
     search_fields = [
         "order__id",
@@ -592,10 +583,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
             shipping_id = request.query_params.get("shipping_id")
             coupon_id = request.query_params.get("coupon_id")
 
-            cart, created = Cart.objects.prefetch_related("items").get_or_create(
-                user=request.user
-            )
-            if not cart.items.exists():
+            cart, created = Cart.objects.get_or_create(user=request.user)
+            pricing = CartPricing(cart, user=request.user)
+            if not pricing.items:
                 return Response(
                     {"error": _("El carrito está vacío")},
                     status=status.HTTP_400_BAD_REQUEST,
@@ -617,7 +607,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                     )
 
             shipping = get_object_or_404(Shipping, id=shipping_id)
-            subtotal = Decimal(str(cart.get_total()))
+            subtotal = pricing.subtotal
             shipping_cost = Decimal(str(shipping.calculate_shipping_cost(subtotal)))
 
             # Aplicar cupón si se proporciona coupon_id
@@ -706,13 +696,15 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-    def _calculate_order_total(self, cart, shipping):
+    def _calculate_order_total(self, cart, shipping, pricing=None):
         """
         Calcula el total de la orden incluyendo subtotal, envío y descuentos.
         """
         try:
-            # Obtener el subtotal del carrito y asegurarnos que sea Decimal
-            subtotal = Decimal(str(cart.get_total()))
+            # Reutilizar el cálculo del carrito si ya se hizo en esta petición
+            if pricing is None:
+                pricing = CartPricing(cart)
+            subtotal = pricing.subtotal
             logger.info(f"Subtotal: {subtotal}")
 
             # Calcular el costo de envío basado en el subtotal y asegurarnos que sea Decimal
@@ -784,17 +776,19 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 logger.info(f"Checkout data validated - Request ID: {request_id}")
 
             cart = self.get_user_cart(request.user)
+            # Un único cálculo del carrito para todo el checkout
+            pricing = CartPricing(cart, user=request.user, from_database=True)
             if STRUCTLOG_AVAILABLE:
                 structlog_logger.info(
                     "cart_retrieved",
                     request_id=request_id,
                     cart_id=cart.id,
-                    items_count=cart.items.count(),
-                    subtotal=cart.get_total(),
+                    items_count=pricing.total_items,
+                    subtotal=pricing.subtotal,
                 )
             else:
                 logger.info(
-                    f"Cart retrieved - Request ID: {request_id}, Subtotal: {cart.get_total()}"
+                    f"Cart retrieved - Request ID: {request_id}, Subtotal: {pricing.subtotal}"
                 )
 
             shipping = self.validate_checkout_request(
@@ -813,7 +807,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                     f"Shipping validated - Request ID: {request_id}, Method: {shipping.name}"
                 )
 
-            total = self._calculate_order_total(cart, shipping)
+            total = self._calculate_order_total(cart, shipping, pricing=pricing)
             if STRUCTLOG_AVAILABLE:
                 structlog_logger.info(
                     "total_calculated", request_id=request_id, total=str(total)
@@ -845,7 +839,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             validated_data["total_amount"] = (
                 total  # asegura que el total esté actualizado
             )
-            order = self._get_or_create_order(validated_data)
+            order = self._get_or_create_order(validated_data, pricing=pricing)
             if STRUCTLOG_AVAILABLE:
                 structlog_logger.info(
                     "order_created",
@@ -998,30 +992,40 @@ class PaymentViewSet(viewsets.ModelViewSet):
             raise ValidationError(_("Invalid shipping method"))
         return shipping
 
-    def create_order(self, user, total, shipping, transaction_id, discount_amount=0):
-        cart = self.get_user_cart(user)
-        # Reservar inventario antes de crear la orden
-        self.reserve_inventory(cart.items.all())
+    def create_order(
+        self, user, total, shipping, transaction_id, discount_amount=0, pricing=None
+    ):
+        if pricing is None:
+            pricing = CartPricing(
+                self.get_user_cart(user), user=user, from_database=True
+            )
         # Asociar la dirección de envío por defecto del usuario
         default_address = user.address_set.filter(is_default=True).first()
-        order = Order.objects.create(
-            user=user,
-            amount=total,
-            shipping=shipping,
-            status=Order.OrderStatus.PENDING,
-            transaction_id=transaction_id,
-            currency="USD",
-            discount_amount=discount_amount,
-            address=default_address,
-        )
-        # Crear OrderItems para cada CartItem
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                inventory=cart_item.inventory,
-                name=cart_item.inventory.product.name,
-                price=cart_item.inventory.store_price,
-                count=cart_item.quantity,
+        # Si no hay stock para retener, la orden tampoco se crea
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                amount=total,
+                shipping=shipping,
+                status=Order.OrderStatus.PENDING,
+                transaction_id=transaction_id,
+                currency="USD",
+                discount_amount=discount_amount,
+                address=default_address,
+            )
+            self.reserve_inventory(pricing.items, order)
+            # Crear OrderItems para cada CartItem con el precio unitario calculado
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=order,
+                        inventory=cart_item.inventory,
+                        name=cart_item.inventory.product.name,
+                        price=cart_item.unit_price,
+                        count=cart_item.quantity,
+                    )
+                    for cart_item in pricing.items
+                ]
             )
         return order
 
@@ -1260,6 +1264,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     def get_user_cart(self, user):
         cart = getattr(user, "cart", None)
+        if cart:
+            # Con el almacenamiento en Redis, el checkout trabaja sobre CartItem
+            flush_cart(cart)
         if not cart or not cart.items.exists():
             raise ValidationError("Cart is empty")
         cart = Cart.objects.prefetch_related("items").get(id=cart.id)
@@ -1481,7 +1488,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                     # Limpiar el carrito
                     cart = Cart.objects.filter(user=payment.order.user).first()
                     if cart:
-                        cart.items.all().delete()
+                        clear_cart(cart)
 
                     # Enviar email de éxito
                     if payment.order.user and payment.order.user.email:
@@ -1831,7 +1838,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 # Limpiar el carrito
                 cart = Cart.objects.filter(user=payment.order.user).first()
                 if cart:
-                    cart.items.all().delete()
+                    clear_cart(cart)
 
                 logger.info(
                     f"Payment {payment.id} synchronized with Stripe - marked as completed"
@@ -1916,7 +1923,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                     # Limpiar carrito
                     cart = Cart.objects.filter(user=payment.order.user).first()
                     if cart:
-                        cart.items.all().delete()
+                        clear_cart(cart)
 
                     logger.info(
                         f"Force synced payment {payment.id} - marked as completed"
@@ -2109,9 +2116,15 @@ class PaymentViewSet(viewsets.ModelViewSet):
         except stripe.error.StripeError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    def _get_or_create_order(self, validated_data):
-        cart = self.get_user_cart(self.request.user)
-        logger.info(f"Cart subtotal: {cart.get_total()}")
+    def _get_or_create_order(self, validated_data, pricing=None):
+        if pricing is None:
+            pricing = CartPricing(
+                self.get_user_cart(self.request.user),
+                user=self.request.user,
+                from_database=True,
+            )
+        cart = pricing.cart
+        logger.info(f"Cart subtotal: {pricing.subtotal}")
         logger.info(
             f"Cart antes de cupón: {cart}, cupón actual: {getattr(cart, 'coupon', None)}"
         )
@@ -2131,7 +2144,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             logger.info(f"Using frontend calculated net total: {net_total}")
         else:
             # Fallback: calcular desde el carrito
-            subtotal = cart.get_total()
+            subtotal = pricing.subtotal
             shipping_cost = shipping.calculate_shipping_cost(subtotal)
             discount = Decimal("0")
             net_total = subtotal + shipping_cost
@@ -2163,6 +2176,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             shipping,
             transaction_id,
             discount_amount=discount,
+            pricing=pricing,
         )
         logger.info(f"Created order: {order.id} with amount: {order.amount}")
 
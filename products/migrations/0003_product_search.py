@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm es opcional: sin la extensión disponible, o con
+    # CATALOG_SEARCH_TRIGRAM=False, la búsqueda usa solo el vector
+    if not settings.CATALOG_SEARCH_TRIGRAM:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS product_name_trgm "
+        "ON products_product USING gin (name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS product_name_trgm")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("categories", "0002_remove_measureunit_is_custom_and_more"),
+        ("products", "0002_product_rating_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "name", config="spanish", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="spanish", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("spanish"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="product_search_vector_gin"
+            ),
+        ),
+        # Búsqueda aproximada por nombre (operador % de pg_trgm)
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("categories", "0002_remove_measureunit_is_custom_and_more"),
+        ("products", "0003_product_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["created_at", "pkid"], name="product_created_pkid_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:38
+
+import common.slugs
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0004_product_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="slug",
+            field=common.slugs.AutoSlugField(
+                always_update=True, editable=False, populate_from="name", unique=True
+            ),
+        ),
+    ]
@@ -1,18 +1,57 @@
-import random
-import string
-
-from autoslug import AutoSlugField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from categories.models import Category
-from common.models import IsActiveQueryset, PublishedManager, TimeStampedUUIDModel
+from common.codes import CodeAllocator, base36
+from common.models import (
+    IsActiveQueryset,
+    PublishedManager,
+    RatingSummaryModel,
+    TimeStampedUUIDModel,
+)
+from common.slugs import AutoSlugField, assign_slugs
 
 User = get_user_model()
 
+# Configuración de texto de PostgreSQL usada por la búsqueda del catálogo
+SEARCH_CONFIG = "spanish"
+
+REF_CODES = CodeAllocator("product_ref_code_seq", "ref_code", base36(10))
+
+
+def in_categories_filter(product_ref, slugs):
+    """
+    ``EXISTS`` over the category links of ``product_ref`` whose category is
+    any of ``slugs`` or lies under one of them (``CategoryClosure``).
+    """
+    return models.Exists(
+        Product.category.through.objects.filter(
+            product_id=product_ref,
+            category__ancestor_links__ancestor__slug__in=slugs,
+        )
+    )
+
 
-class Product(TimeStampedUUIDModel):
+class ProductQuerySet(IsActiveQueryset):
+    def in_categories(self, slugs):
+        """Products in the categories ``slugs`` or any of their descendants."""
+        return self.filter(in_categories_filter(models.OuterRef("pk"), slugs))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no llama a save(): nombre, slug y código se asignan aquí
+        objs = list(objs)
+        for obj in objs:
+            obj.name = str.title(obj.name)
+            obj.description = str.capitalize(obj.description)
+        assign_slugs(objs)
+        REF_CODES.assign(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class Product(RatingSummaryModel, TimeStampedUUIDModel):
     name = models.CharField(
         max_length=255,
     )
@@ -31,17 +70,33 @@ class Product(TimeStampedUUIDModel):
     published_status = models.BooleanField(
         verbose_name=_("Published Status"), default=False
     )
+    # Mantenida por PostgreSQL: el nombre pesa más que la descripción
+    search_vector = models.GeneratedField(
+        expression=SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
-    objects = IsActiveQueryset.as_manager()
+    objects = ProductQuerySet.as_manager()
     published = PublishedManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="product_search_vector_gin"),
+            # Paginación por cursor (common.pagination.KeysetPagination)
+            models.Index(
+                fields=["created_at", "pkid"], name="product_created_pkid_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         self.name = str.title(self.name)
         self.description = str.capitalize(self.description)
-        self.ref_code = "".join(
-            random.choices(string.ascii_uppercase + string.digits, k=10)
-        )
+        # La referencia se asigna solo al crear y no cambia después
+        if self._state.adding:
+            REF_CODES.assign([self])
         super().save(*args, **kwargs)
@@ -1,5 +1,13 @@
 from rest_framework.pagination import PageNumberPagination
 
+from common.pagination import KeysetPagination
+
 
 class ProductPagination(PageNumberPagination):
     page_size = 25
+
+
+class ProductCursorPagination(KeysetPagination):
+    # ?page=N sigue disponible con ProductPagination
+    page_size = 25
+    page_number_pagination_class = ProductPagination
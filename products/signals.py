@@ -0,0 +1,93 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from categories.closure import refresh_product_counts
+from categories.tree import category_tag
+from common.cache import fields_changed, invalidate_tags
+
+from .models import Product
+
+# Campos que deciden en qué listados aparece un producto y en qué orden
+LIST_FIELDS = ("name", "is_active", "published_status")
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_list_fields(sender, instance, raw=False, **kwargs):
+    instance._list_changed = raw or fields_changed(
+        instance, LIST_FIELDS, kwargs.get("update_fields")
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    # El producto se muestra dentro de cada inventario: las respuestas que lo
+    # incluyen caen por su etiqueta; los listados, si cambia su pertenencia
+    tags = [f"product:{instance.pkid}"]
+    deleted = "created" not in kwargs
+    if deleted or getattr(instance, "_list_changed", True):
+        tags += ["product:list", "inventory:list"]
+    invalidate_tags(*tags)
+
+
+@receiver(m2m_changed, sender=Product.category.through)
+def invalidate_product_category_cache(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        if action == "post_clear":
+            # Guardadas en pre_clear por refresh_category_counts_on_change
+            pk_set = getattr(instance, "_category_pks", [])
+        invalidate_tags(
+            f"product:{instance.pkid}", *(category_tag(pk) for pk in pk_set)
+        )
+    elif action == "post_clear":
+        # category.product_set.clear(): los productos ya no se conocen
+        invalidate_tags(category_tag(instance.pk), "product:list", "inventory:list")
+    else:
+        invalidate_tags(category_tag(instance.pk), *(f"product:{pk}" for pk in pk_set))
+
+
+def _refresh_category_counts(category_pks):
+    if refresh_product_counts(category_pks):
+        invalidate_tags("category:list")
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_category_counts(sender, instance, **kwargs):
+    # is_active decide si el producto cuenta en sus categorías
+    _refresh_category_counts(list(instance.category.values_list("pk", flat=True)))
+
+
+@receiver(pre_delete, sender=Product)
+def remember_product_categories(sender, instance, **kwargs):
+    instance._category_pks = list(instance.category.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Product)
+def refresh_deleted_product_counts(sender, instance, **kwargs):
+    _refresh_category_counts(getattr(instance, "_category_pks", []))
+
+
+@receiver(m2m_changed, sender=Product.category.through)
+def refresh_category_counts_on_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if reverse:
+        # category.product_set.add(...): solo cambia esa categoría
+        if action in ("post_add", "post_remove", "post_clear"):
+            _refresh_category_counts([instance.pk])
+    elif action == "pre_clear":
+        instance._category_pks = list(instance.category.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        _refresh_category_counts(list(pk_set))
+    elif action == "post_clear":
+        _refresh_category_counts(getattr(instance, "_category_pks", []))
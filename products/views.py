@@ -1,17 +1,23 @@
 from rest_framework import generics, permissions
 
+from common.cache import TaggedCacheMixin
+
 from .models import Product
-from .pagination import ProductPagination
+from .pagination import ProductCursorPagination
 from .serializers import ProductSerializer
 
 
 # Listar productos (paginado)
-class ProductListView(generics.ListAPIView):
+class ProductListView(TaggedCacheMixin, generics.ListAPIView):
+    cache_tags = ("product:list",)
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    pagination_class = ProductPagination
+    pagination_class = ProductCursorPagination
     permission_classes = [permissions.AllowAny]
 
+    def get_object_cache_tags(self, objects):
+        return [f"product:{product.pkid}" for product in objects]
+
 
 # Crear producto (solo staff)
 class ProductCreateView(generics.CreateAPIView):
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import Coupon, Promotion, PromoType
-from .tasks import promotion_management, promotion_prices
+from .tasks import promotion_prices
 
 
 class ProductOnPromotion(admin.StackedInline):
@@ -14,11 +14,12 @@ class InventoryList(admin.ModelAdmin):
     model = Promotion
     inlines = (ProductOnPromotion,)
     list_display = ("name", "is_active", "promo_start", "promo_end")
+    readonly_fields = ("next_transition_at",)
 
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
+        # La programación (inicio/fin) se aplica desde promotion.signals
         promotion_prices.delay(obj.promo_reduction, obj.pkid)
-        promotion_management.delay()
 
 
 admin.site.register(Promotion, InventoryList)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from promotion.pricing import refresh_effective_prices
+
+
+class Command(BaseCommand):
+    help = "Recalcula el precio efectivo materializado de todos los inventarios"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = refresh_effective_prices()
+        self.stdout.write(
+            self.style.SUCCESS(f"Se actualizó el precio de {updated} inventarios")
+        )
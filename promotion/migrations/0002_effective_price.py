@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_EFFECTIVE_PRICES = """
+INSERT INTO promotion_effectiveprice (
+    inventory_id, store_price, promo_price, promotion_id, price, updated_at
+)
+SELECT inventory.pkid, inventory.store_price, best.promo_price,
+       best.promotion_id, LEAST(inventory.store_price,
+                                COALESCE(best.promo_price, inventory.store_price)),
+       NOW()
+FROM inventory_inventory AS inventory
+LEFT JOIN LATERAL (
+    SELECT line.promo_price, line.promotion_id_id AS promotion_id
+    FROM promotion_productsonpromotion AS line
+    JOIN promotion_promotion AS promotion
+      ON promotion.pkid = line.promotion_id_id AND promotion.is_active
+    WHERE line.product_inventory_id_id = inventory.pkid AND line.promo_price > 0
+    ORDER BY line.promo_price
+    LIMIT 1
+) AS best ON TRUE
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stock_holds'),
+        ('promotion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectivePrice',
+            fields=[
+                ('inventory', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='effective_price', serialize=False, to='inventory.inventory')),
+                ('store_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('promo_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('promotion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='promotion.promotion')),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL_EFFECTIVE_PRICES, migrations.RunSQL.noop),
+    ]
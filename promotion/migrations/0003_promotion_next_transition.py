@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stock_holds'),
+        ('promotion', '0002_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='next_transition_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(condition=models.Q(('is_schedule', True)), fields=['next_transition_at'], name='promotion_next_transition_idx'),
+        ),
+    ]
@@ -32,6 +32,8 @@ class Promotion(TimeStampedUUIDModel):
     is_schedule = models.BooleanField(default=False)
     promo_start = models.DateField()
     promo_end = models.DateField()
+    # Próximo inicio o fin de una promoción programada (promotion.scheduler)
+    next_transition_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     products_on_promotion = models.ManyToManyField(
         Inventory,
@@ -53,6 +55,15 @@ class Promotion(TimeStampedUUIDModel):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_transition_at"],
+                condition=models.Q(is_schedule=True),
+                name="promotion_next_transition_idx",
+            )
+        ]
+
     def clean(self):
         if self.promo_start > self.promo_end:
             raise ValidationError(_("End data before the start date"))
@@ -86,3 +97,35 @@ class ProductsOnPromotion(TimeStampedUUIDModel):
 
     class Meta:
         unique_together = (("product_inventory_id", "promotion_id"),)
+
+
+class EffectivePrice(models.Model):
+    """
+    Precio final de cada inventario, materializado por
+    ``promotion.pricing.refresh_effective_prices`` para que catálogo y
+    carrito lo lean con un JOIN en lugar de buscar la promoción activa.
+    """
+
+    inventory = models.OneToOneField(
+        Inventory,
+        primary_key=True,
+        related_name="effective_price",
+        on_delete=models.CASCADE,
+    )
+    store_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Menor precio de promoción activo (> 0), si lo hay
+    promo_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    promotion = models.ForeignKey(
+        Promotion,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.inventory_id}: {self.price}"
@@ -0,0 +1,253 @@
+"""
+Set-based promotion pricing.
+
+``apply_promotion_reduction`` recomputes every non-overridden
+``promo_price`` of a promotion with one ``UPDATE ... FROM`` against the
+inventory table, instead of loading and saving each row.
+
+``EffectivePrice`` holds, per inventory, the price a buyer pays: the lowest
+active promotion price above zero, or ``store_price``. It is refreshed with
+one ``INSERT ... ON CONFLICT`` for the affected inventories whenever a
+promotion, one of its lines or an inventory price changes (see
+``promotion.signals``), so catalog and cart reads join it directly.
+
+``price_resolver`` answers effective prices for many inventories in one
+call from a per-process LRU, then Redis, then one query. Entries are stamped
+with the version of the ``"price:<pkid>"`` tag (and of ``"price:all"``),
+which every refresh bumps, so no stale price outlives a change. Every
+refresh also bumps ``"price:any"``, for readers that depend on prices they
+do not enumerate (the cart ETag).
+"""
+
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from common.cache import get_tag_versions, invalidate_tags
+
+from .models import EffectivePrice, ProductsOnPromotion, Promotion
+
+UPSERT_EFFECTIVE_PRICES = """
+INSERT INTO {effective} (
+    inventory_id, store_price, promo_price, promotion_id, price, updated_at
+)
+SELECT inventory.pkid, inventory.store_price, best.promo_price,
+       best.promotion_id, LEAST(inventory.store_price,
+                                COALESCE(best.promo_price, inventory.store_price)),
+       NOW()
+FROM {inventory} AS inventory
+LEFT JOIN LATERAL (
+    SELECT line.promo_price, line.promotion_id_id AS promotion_id
+    FROM {line} AS line
+    JOIN {promotion} AS promotion
+      ON promotion.pkid = line.promotion_id_id AND promotion.is_active
+    WHERE line.product_inventory_id_id = inventory.pkid AND line.promo_price > 0
+    ORDER BY line.promo_price
+    LIMIT 1
+) AS best ON TRUE
+{where}
+ON CONFLICT (inventory_id) DO UPDATE
+SET store_price = EXCLUDED.store_price,
+    promo_price = EXCLUDED.promo_price,
+    promotion_id = EXCLUDED.promotion_id,
+    price = EXCLUDED.price,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+ALL_PRICES_TAG = "price:all"
+ANY_PRICE_TAG = "price:any"
+
+
+def price_tag(inventory_id):
+    return f"price:{inventory_id}"
+
+
+def _sql(template, **kwargs):
+    from inventory.models import Inventory
+
+    return template.format(
+        effective=EffectivePrice._meta.db_table,
+        inventory=Inventory._meta.db_table,
+        line=ProductsOnPromotion._meta.db_table,
+        promotion=Promotion._meta.db_table,
+        **kwargs,
+    )
+
+
+def refresh_effective_prices(inventory_ids=None):
+    """
+    Recomputes ``EffectivePrice`` for ``inventory_ids``, or for every
+    inventory when it is ``None``, and invalidates their cached entries.
+    """
+    if inventory_ids is None:
+        where, params = "", []
+    else:
+        inventory_ids = sorted(set(inventory_ids))
+        if not inventory_ids:
+            return 0
+        where, params = "WHERE inventory.pkid = ANY(%s)", [inventory_ids]
+    with connection.cursor() as cursor:
+        cursor.execute(_sql(UPSERT_EFFECTIVE_PRICES, where=where), params)
+        count = cursor.rowcount
+    if inventory_ids is None:
+        tags = ["inventory:list", ALL_PRICES_TAG]
+    else:
+        tags = [f"inventory:{pkid}" for pkid in inventory_ids]
+        tags += [price_tag(pkid) for pkid in inventory_ids]
+    tags.append(ANY_PRICE_TAG)
+    invalidate_tags(*tags)
+    # Otro proceso pudo leer el precio anterior antes del commit
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+    return count
+
+
+def promotion_inventory_ids(promotion_id):
+    return list(
+        ProductsOnPromotion.objects.filter(promotion_id=promotion_id).values_list(
+            "product_inventory_id", flat=True
+        )
+    )
+
+
+def apply_promotion_reduction(promotion_id, reduction_amount):
+    """
+    Sets ``promo_price = ceil(store_price * (1 - reduction_amount / 100))``
+    on every line of the promotion without ``price_override`` and refreshes
+    the effective prices of all its inventories.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _sql(
+                """
+                UPDATE {line} AS line
+                SET promo_price = CEIL(
+                        inventory.store_price
+                        - inventory.store_price * %(reduction)s / 100
+                    ),
+                    updated_at = NOW()
+                FROM {inventory} AS inventory
+                WHERE inventory.pkid = line.product_inventory_id_id
+                  AND line.promotion_id_id = %(promotion)s
+                  AND NOT line.price_override
+                """
+            ),
+            {"reduction": reduction_amount, "promotion": promotion_id},
+        )
+        updated = cursor.rowcount
+    refresh_effective_prices(promotion_inventory_ids(promotion_id))
+    return updated
+
+
+class ResolvedPrice(NamedTuple):
+    store_price: Decimal
+    promo_price: Decimal | None
+    price: Decimal
+
+
+class PriceResolver:
+    """
+    Effective prices of inventories, cached in a bounded per-process LRU
+    backed by the ``default`` cache. ``resolve`` costs one cache read of the
+    versions plus, for entries missing in memory, one ``get_many`` and at
+    most one query.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, inventory_ids):
+        """Returns ``{inventory pkid: ResolvedPrice}`` for existing inventories."""
+        inventory_ids = set(inventory_ids)
+        if not inventory_ids:
+            return {}
+        tags = get_tag_versions(
+            [ALL_PRICES_TAG, *(price_tag(pkid) for pkid in inventory_ids)]
+        )
+        versions = {
+            pkid: (tags[ALL_PRICES_TAG], tags[price_tag(pkid)])
+            for pkid in inventory_ids
+        }
+
+        resolved, missing = {}, {}
+        with self._lock:
+            for pkid, version in versions.items():
+                entry = self._entries.get(pkid)
+                if entry is not None and entry[0] == version:
+                    self._entries.move_to_end(pkid)
+                    resolved[pkid] = entry[1]
+                else:
+                    missing[pkid] = version
+        if not missing:
+            return resolved
+
+        keys = {
+            f"price:{pkid}:{version[0]}:{version[1]}": pkid
+            for pkid, version in missing.items()
+        }
+        fetched = {
+            keys[key]: ResolvedPrice(*value)
+            for key, value in cache.get_many(list(keys)).items()
+        }
+        loaded = self._load([pkid for pkid in missing if pkid not in fetched])
+        if loaded:
+            cache.set_many(
+                {
+                    key: tuple(loaded[pkid])
+                    for key, pkid in keys.items()
+                    if pkid in loaded
+                },
+                settings.PRICE_RESOLVER_CACHE_TIMEOUT,
+            )
+        fetched.update(loaded)
+        self._remember(
+            {pkid: (missing[pkid], price) for pkid, price in fetched.items()}
+        )
+        resolved.update(fetched)
+        return resolved
+
+    def unit_prices(self, inventory_ids):
+        """Returns ``{inventory pkid: price}``."""
+        return {
+            pkid: price.price for pkid, price in self.resolve(inventory_ids).items()
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self, inventory_ids):
+        from inventory.models import Inventory
+
+        if not inventory_ids:
+            return {}
+        rows = Inventory.objects.filter(pk__in=inventory_ids).values_list(
+            "pkid",
+            "store_price",
+            "effective_price__promo_price",
+            "effective_price__price",
+        )
+        # Sin fila materializada todavía, se vende al precio de tienda
+        return {
+            pkid: ResolvedPrice(store_price, promo_price, price or store_price)
+            for pkid, store_price, promo_price, price in rows
+        }
+
+    def _remember(self, entries):
+        maxsize = self.maxsize or settings.PRICE_RESOLVER_CACHE_SIZE
+        with self._lock:
+            for pkid, entry in entries.items():
+                self._entries[pkid] = entry
+                self._entries.move_to_end(pkid)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+
+price_resolver = PriceResolver()
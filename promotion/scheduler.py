@@ -0,0 +1,161 @@
+"""
+Event-driven promotion scheduling.
+
+A scheduled promotion (``is_schedule``) is active from the start of
+``promo_start`` to the end of ``promo_end`` in local time, after which it
+stops being scheduled. Each one stores ``next_transition_at``, the next
+instant its state changes, under a partial index.
+
+Saving a promotion applies its current state right away. After that,
+``promotion_transition`` runs as an ETA task exactly at each boundary and
+only touches that promotion, re-materializing the effective prices (and
+invalidating the cached entries) of its own inventories.
+
+The Redis broker redelivers tasks held longer than its visibility timeout,
+so ETA tasks are only enqueued for boundaries within
+``PROMOTION_SCHEDULE_HORIZON``. The ``promotion_management`` beat task reads
+the index to enqueue the upcoming ones and to apply any boundary that was
+missed (a worker that was down, a lost message).
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Promotion
+from .pricing import promotion_inventory_ids, refresh_effective_prices
+
+logger = logging.getLogger(__name__)
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def schedule_state(promotion, now=None):
+    """
+    Returns ``(is_active, is_schedule, next_transition_at)`` of a scheduled
+    ``promotion`` at ``now``.
+    """
+    today = timezone.localdate(now)
+    if promotion.promo_end < today:
+        return False, False, None
+    if today < promotion.promo_start:
+        return False, True, _start_of(promotion.promo_start)
+    return True, True, _start_of(promotion.promo_end + timedelta(days=1))
+
+
+def _apply(promotion, now=None):
+    """
+    Writes the state of ``promotion`` at ``now`` with one ``UPDATE`` if it
+    changed. Returns whether ``is_active`` changed.
+    """
+    state = dict(
+        zip(
+            ("is_active", "is_schedule", "next_transition_at"),
+            schedule_state(promotion, now),
+            strict=True,
+        )
+    )
+    changes = {
+        field: value
+        for field, value in state.items()
+        if getattr(promotion, field) != value
+    }
+    if not changes:
+        return False
+    Promotion.objects.filter(pk=promotion.pk).update(
+        **changes, updated_at=timezone.now()
+    )
+    for field, value in changes.items():
+        setattr(promotion, field, value)
+    return "is_active" in changes
+
+
+def apply_transition(promotion_id, now=None):
+    """
+    Brings a scheduled promotion to its state at ``now`` and refreshes the
+    prices of its inventories when it was activated or deactivated. Returns
+    the next transition, or ``None``.
+    """
+    with transaction.atomic():
+        promotion = (
+            Promotion.objects.select_for_update()
+            .filter(pk=promotion_id, is_schedule=True)
+            .first()
+        )
+        if promotion is None:
+            return None
+        if _apply(promotion, now):
+            refresh_effective_prices(promotion_inventory_ids(promotion.pk))
+    return promotion.next_transition_at
+
+
+def enqueue_transition(promotion_id, when):
+    """
+    Enqueues ``promotion_transition`` at ``when`` if it falls within the
+    horizon, once per promotion and instant. Returns whether it was enqueued.
+    """
+    horizon = settings.PROMOTION_SCHEDULE_HORIZON
+    if when is None or when > timezone.now() + timedelta(seconds=horizon):
+        return False
+    key = f"promotion:transition:{promotion_id}:{int(when.timestamp())}"
+    if not cache.add(key, 1, timeout=horizon * 2):
+        return False
+
+    from .tasks import promotion_transition
+
+    try:
+        promotion_transition.apply_async(
+            args=[promotion_id, when.isoformat()], eta=max(when, timezone.now())
+        )
+    except Exception:
+        cache.delete(key)
+        raise
+    return True
+
+
+def sync_promotion(promotion):
+    """
+    Applies the schedule of a promotion that was just saved and enqueues its
+    next transition once the transaction commits. Prices are refreshed by
+    the caller (``promotion.signals``).
+    """
+    if not promotion.is_schedule:
+        if promotion.next_transition_at is not None:
+            Promotion.objects.filter(pk=promotion.pk).update(next_transition_at=None)
+            promotion.next_transition_at = None
+        return
+    _apply(promotion)
+    pk, when = promotion.pk, promotion.next_transition_at
+    transaction.on_commit(lambda: enqueue_transition(pk, when), robust=True)
+
+
+def run_due_transitions(now=None):
+    """
+    Applies every transition already due (or never computed) and enqueues
+    the ones within the horizon. Returns the number of promotions applied.
+    """
+    now = now or timezone.now()
+    horizon = now + timedelta(seconds=settings.PROMOTION_SCHEDULE_HORIZON)
+    upcoming = Promotion.objects.filter(
+        Q(next_transition_at__lte=horizon) | Q(next_transition_at__isnull=True),
+        is_schedule=True,
+    ).values_list("pk", "next_transition_at")
+
+    applied = 0
+    for pk, when in upcoming:
+        if when is None or when <= now:
+            when = apply_transition(pk, now)
+            applied += 1
+        try:
+            enqueue_transition(pk, when)
+        except Exception as e:
+            # La próxima ejecución vuelve a intentarlo desde el índice
+            logger.warning(f"No se pudo encolar la transición de {pk}: {e}")
+    return applied
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from inventory.models import Inventory
+
+from .models import ProductsOnPromotion, Promotion
+from .pricing import promotion_inventory_ids, refresh_effective_prices
+from .scheduler import sync_promotion
+
+
+@receiver(post_save, sender=ProductsOnPromotion)
+@receiver(post_delete, sender=ProductsOnPromotion)
+def refresh_promotion_line_price(sender, instance, **kwargs):
+    refresh_effective_prices([instance.product_inventory_id_id])
+
+
+@receiver(post_save, sender=Promotion)
+def refresh_promotion_prices(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_promotion(instance)
+    # Activar/desactivar la promoción cambia el precio de todos sus inventarios
+    refresh_effective_prices(promotion_inventory_ids(instance.pk))
+
+
+@receiver(post_save, sender=Inventory)
+def refresh_inventory_price(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_effective_prices([instance.pk])
@@ -1,44 +1,36 @@
+import logging
 from datetime import datetime
-from decimal import Decimal
-from math import ceil
 
 from celery import shared_task
 from django.db import transaction
+from django.utils import timezone
 
-from .models import Promotion
+from .pricing import apply_promotion_reduction
+from .scheduler import apply_transition, enqueue_transition, run_due_transitions
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task()
 def promotion_prices(reduction_amount, obj_id):
     with transaction.atomic():
-        promotions = Promotion.products_on_promotion.through.objects.filter(
-            promotion_id=obj_id
-        )
-        reduction = reduction_amount / 100
+        return apply_promotion_reduction(obj_id, reduction_amount)
+
 
-        for promo in promotions:
-            if promo.price_override is False:
-                store_price = promo.product_inventory_id.store_price
-                new_price = ceil(store_price - (store_price * Decimal(reduction)))
-                promo.promo_price = Decimal(new_price)
-                promo.save()
+@shared_task()
+def promotion_transition(promotion_id, at=None):
+    """Aplica el inicio o fin de una promoción y encola su próxima transición."""
+    now = timezone.now()
+    if at is not None:
+        # Un worker con el reloj levemente adelantado no se adelanta al límite
+        now = max(now, datetime.fromisoformat(at))
+    enqueue_transition(promotion_id, apply_transition(promotion_id, now))
 
 
 @shared_task()
 def promotion_management():
-    with transaction.atomic():
-        promotions = Promotion.objects.filter(is_schedule=True)
-
-        now = datetime.now().date()
-
-        for promo in promotions:
-            if promo.is_schedule:
-                if promo.promo_end < now:
-                    promo.is_active = False
-                    promo.is_schedule = False
-                else:
-                    if promo.promo_start <= now:
-                        promo.is_active = True
-                    else:
-                        promo.is_active = False
-            promo.save()
+    """Aplica transiciones vencidas y encola las próximas desde el índice."""
+    applied = run_due_transitions()
+    if applied:
+        logger.info(f"Promociones actualizadas por programación: {applied}")
+    return applied
@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from cart.services import CartPricing
+from common.testing import locmem_caches
+from inventory.models import Inventory
+from products.models import Product
+from promotion.models import EffectivePrice, ProductsOnPromotion, Promotion, PromoType
+from promotion.pricing import PriceResolver, refresh_effective_prices
+from promotion.tasks import promotion_prices
+
+
+@locmem_caches
+class PromotionPricingTest(TestCase):
+    def setUp(self):
+        self.inventories = [
+            Inventory.objects.create(
+                product=Product.objects.create(name=f"product {i}"),
+                retail_price=Decimal(price),
+                store_price=Decimal(price),
+            )
+            for i, price in enumerate(["10.00", "19.99", "30.00"])
+        ]
+        self.promotion = Promotion.objects.create(
+            name="Sale",
+            promo_reduction=15,
+            is_active=True,
+            promo_start=date.today(),
+            promo_end=date.today() + timedelta(days=5),
+            promo_type=PromoType.objects.create(name="Percent"),
+        )
+        for inventory in self.inventories[:2]:
+            ProductsOnPromotion.objects.create(
+                product_inventory_id=inventory,
+                promotion_id=self.promotion,
+            )
+        ProductsOnPromotion.objects.create(
+            product_inventory_id=self.inventories[2],
+            promotion_id=self.promotion,
+            promo_price=Decimal("25.00"),
+            price_override=True,
+        )
+
+    def prices(self):
+        return [
+            EffectivePrice.objects.get(inventory=inventory).price
+            for inventory in self.inventories
+        ]
+
+    def test_reduction_is_applied_in_one_update(self):
+        # Savepoints around the UPDATE, the id lookup and the upsert
+        with self.assertNumQueries(5):
+            self.assertEqual(promotion_prices(15, self.promotion.pkid), 2)
+
+        self.assertEqual(
+            list(
+                ProductsOnPromotion.objects.order_by(
+                    "product_inventory_id"
+                ).values_list("promo_price", flat=True)
+            ),
+            [Decimal("9.00"), Decimal("17.00"), Decimal("25.00")],
+        )
+        self.assertEqual(
+            self.prices(), [Decimal("9.00"), Decimal("17.00"), Decimal("25.00")]
+        )
+
+    def test_effective_prices_follow_promotions_and_store_prices(self):
+        promotion_prices(15, self.promotion.pkid)
+
+        self.promotion.is_active = False
+        self.promotion.save()
+        self.assertEqual(
+            self.prices(), [Decimal("10.00"), Decimal("19.99"), Decimal("30.00")]
+        )
+
+        self.promotion.is_active = True
+        self.promotion.save()
+        inventory = self.inventories[0]
+        inventory.store_price = Decimal("8.00")
+        inventory.save()
+        self.assertEqual(self.prices()[0], Decimal("8.00"))
+
+        ProductsOnPromotion.objects.filter(
+            product_inventory_id=self.inventories[2]
+        ).delete()
+        self.assertEqual(self.prices()[2], Decimal("30.00"))
+
+    def test_catalog_and_cart_read_the_materialized_price(self):
+        promotion_prices(15, self.promotion.pkid)
+        # Stale rows are only fixed by a refresh
+        EffectivePrice.objects.update(price=Decimal("1.00"))
+
+        self.assertEqual(
+            CartPricing.get_unit_prices(self.inventories),
+            {inventory.pkid: Decimal("1.00") for inventory in self.inventories},
+        )
+        refresh_effective_prices()
+        catalog = Inventory.objects.for_catalog().order_by("pkid")
+        self.assertEqual(
+            [inventory.promotion_price for inventory in catalog],
+            [Decimal("9.00"), Decimal("17.00"), Decimal("25.00")],
+        )
+
+
+@locmem_caches
+class PriceResolverTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.resolver = PriceResolver(maxsize=2)
+        self.inventories = [
+            Inventory.objects.create(
+                product=Product.objects.create(name=f"product {i}"),
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            for i in range(3)
+        ]
+        self.ids = [inventory.pkid for inventory in self.inventories]
+
+    def test_prices_are_resolved_in_one_query_then_from_memory(self):
+        with self.assertNumQueries(1):
+            prices = self.resolver.unit_prices(self.ids[:2])
+        self.assertEqual(prices, dict.fromkeys(self.ids[:2], Decimal("10.00")))
+        with self.assertNumQueries(0):
+            self.resolver.unit_prices(self.ids[:2])
+
+        # A fresh worker reuses the shared cache
+        with self.assertNumQueries(0):
+            PriceResolver().unit_prices(self.ids[:2])
+
+    def test_price_changes_invalidate_only_the_affected_inventory(self):
+        self.resolver.unit_prices(self.ids[:2])
+        promotion = Promotion.objects.create(
+            name="Sale",
+            is_active=True,
+            promo_start=date.today(),
+            promo_end=date.today() + timedelta(days=5),
+            promo_type=PromoType.objects.create(name="Percent"),
+        )
+        ProductsOnPromotion.objects.create(
+            product_inventory_id=self.inventories[0],
+            promotion_id=promotion,
+            promo_price=Decimal("7.00"),
+        )
+
+        with self.assertNumQueries(1):
+            resolved = self.resolver.resolve(self.ids[:2])
+        self.assertEqual(resolved[self.ids[0]].promo_price, Decimal("7.00"))
+        self.assertEqual(resolved[self.ids[0]].price, Decimal("7.00"))
+        self.assertEqual(resolved[self.ids[1]].price, Decimal("10.00"))
+
+        promotion.is_active = False
+        promotion.save()
+        self.assertEqual(
+            self.resolver.unit_prices([self.ids[0]]), {self.ids[0]: Decimal("10.00")}
+        )
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.resolver.unit_prices(self.ids)
+        self.assertEqual(len(self.resolver._entries), 2)
+        self.assertNotIn(self.ids[0], self.resolver._entries)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from common.testing import locmem_caches
+from inventory.models import Inventory
+from products.models import Product
+from promotion.models import EffectivePrice, ProductsOnPromotion, Promotion, PromoType
+from promotion.scheduler import run_due_transitions
+from promotion.tasks import promotion_transition
+
+
+@locmem_caches
+class PromotionSchedulerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.promo_type = PromoType.objects.create(name="Percent")
+        self.on_sale, self.other = [
+            Inventory.objects.create(
+                product=Product.objects.create(name=name),
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            for name in ("on sale", "other")
+        ]
+
+    def promotion(self, name, start, end):
+        promotion = Promotion.objects.create(
+            name=name,
+            is_schedule=True,
+            promo_start=start,
+            promo_end=end,
+            promo_type=self.promo_type,
+        )
+        ProductsOnPromotion.objects.create(
+            product_inventory_id=self.on_sale,
+            promotion_id=promotion,
+            promo_price=Decimal("8.00"),
+        )
+        return promotion
+
+    def price(self, inventory):
+        return EffectivePrice.objects.get(inventory=inventory).price
+
+    def test_promotion_follows_its_boundaries(self):
+        tomorrow = self.today + timedelta(days=1)
+        promotion = self.promotion("Tomorrow", tomorrow, tomorrow)
+        start = promotion.next_transition_at
+        self.assertFalse(promotion.is_active)
+        self.assertEqual(timezone.localtime(start).date(), tomorrow)
+        self.assertEqual(self.price(self.on_sale), Decimal("10.00"))
+
+        other_price = EffectivePrice.objects.get(inventory=self.other)
+        with mock.patch.object(promotion_transition, "apply_async") as enqueue:
+            promotion_transition(promotion.pk, start.isoformat())
+        enqueue.assert_not_called()  # The end is beyond the horizon
+
+        promotion.refresh_from_db()
+        self.assertTrue(promotion.is_active)
+        self.assertEqual(promotion.next_transition_at, start + timedelta(days=1))
+        self.assertEqual(self.price(self.on_sale), Decimal("8.00"))
+        self.assertEqual(
+            EffectivePrice.objects.get(inventory=self.other).updated_at,
+            other_price.updated_at,
+        )
+
+        promotion_transition(promotion.pk, promotion.next_transition_at.isoformat())
+        promotion.refresh_from_db()
+        self.assertEqual(
+            (promotion.is_active, promotion.is_schedule, promotion.next_transition_at),
+            (False, False, None),
+        )
+        self.assertEqual(self.price(self.on_sale), Decimal("10.00"))
+
+    def test_saving_applies_the_current_state(self):
+        promotion = self.promotion(
+            "Running", self.today - timedelta(days=1), self.today + timedelta(days=1)
+        )
+        self.assertTrue(Promotion.objects.get(pk=promotion.pk).is_active)
+        self.assertEqual(self.price(self.on_sale), Decimal("8.00"))
+
+    @override_settings(PROMOTION_SCHEDULE_HORIZON=3 * 24 * 60 * 60)
+    def test_sweep_applies_missed_transitions_and_enqueues_upcoming_ones(self):
+        ended = self.promotion(
+            "Ended", self.today - timedelta(days=3), self.today + timedelta(days=1)
+        )
+        upcoming = self.promotion(
+            "Upcoming", self.today + timedelta(days=1), self.today + timedelta(days=1)
+        )
+        # The end of the first promotion passed while no worker was running
+        Promotion.objects.filter(pk=ended.pk).update(
+            promo_end=self.today - timedelta(days=1),
+            next_transition_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        with mock.patch.object(promotion_transition, "apply_async") as enqueue:
+            self.assertEqual(run_due_transitions(), 1)
+            run_due_transitions()
+
+        ended.refresh_from_db()
+        self.assertEqual((ended.is_active, ended.is_schedule), (False, False))
+        upcoming.refresh_from_db()
+        enqueue.assert_called_once_with(
+            args=[upcoming.pk, upcoming.next_transition_at.isoformat()],
+            eta=upcoming.next_transition_at,
+        )
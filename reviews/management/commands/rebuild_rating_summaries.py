@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from inventory.models import Inventory
+from products.models import Product
+from reviews.services import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula rating_sum, rating_count, rating_avg y el histograma de "
+        "productos e inventarios a partir de las reviews"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Cantidad de filas (por rango de pkid) recalculadas por UPDATE",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        for model in (Product, Inventory):
+            last_pkid = model.objects.aggregate(last=Max("pkid"))["last"] or 0
+            rebuilt = 0
+            start = 0
+            while start < last_pkid:
+                end = start + batch_size
+                rebuilt += rebuild_rating_summaries(
+                    model, model.objects.filter(pkid__gt=start, pkid__lte=end)
+                )
+                start = end
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Se recalcularon las valoraciones de {rebuilt} "
+                    f"{model._meta.verbose_name_plural}"
+                )
+            )
@@ -0,0 +1,150 @@
+"""
+Denormalized rating summaries (``common.models.RatingSummaryModel``).
+
+Review writes call ``review_created``/``review_updated``/``review_deleted``,
+which move the counters of the reviewed product and inventories with a single
+``UPDATE ... SET col = col + delta`` each, so concurrent reviews never
+overwrite one another. A review of an inventory counts for that inventory; a
+review of a product alone counts for every inventory of the product, which is
+what the catalog lists and orders by. ``rebuild_rating_summaries``
+recomputes everything from ``Review`` (see the ``rebuild_rating_summaries``
+command).
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+
+from common.cache import invalidate_tags
+from inventory.models import Inventory
+from products.models import Product
+
+from .models import Review
+
+RATING_STARS = range(1, 6)
+
+
+def _average(rating_sum, rating_count):
+    return Case(
+        When(
+            GreaterThan(rating_count, 0),
+            then=ExpressionWrapper(
+                rating_sum * Value(1.0) / rating_count,
+                output_field=DecimalField(max_digits=3, decimal_places=2),
+            ),
+        ),
+        default=Value(0),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def _apply(review, old_rating=None, new_rating=None):
+    deltas = Counter()
+    if old_rating is not None:
+        deltas["rating_sum"] -= old_rating
+        deltas["rating_count"] -= 1
+        if old_rating in RATING_STARS:
+            deltas[f"rating_{old_rating}"] -= 1
+    if new_rating is not None:
+        deltas["rating_sum"] += new_rating
+        deltas["rating_count"] += 1
+        if new_rating in RATING_STARS:
+            deltas[f"rating_{new_rating}"] += 1
+
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    # El promedio se calcula en la misma sentencia con los valores nuevos
+    updates["rating_avg"] = _average(
+        F("rating_sum") + deltas["rating_sum"],
+        F("rating_count") + deltas["rating_count"],
+    )
+
+    if review.inventory_id:
+        inventory_ids = [review.inventory_id]
+    elif review.product_id:
+        inventory_ids = list(
+            Inventory.objects.filter(product_id=review.product_id).values_list(
+                "pk", flat=True
+            )
+        )
+    else:
+        inventory_ids = []
+
+    with transaction.atomic():
+        if review.product_id:
+            Product.objects.filter(pk=review.product_id).update(**updates)
+        if inventory_ids:
+            Inventory.objects.filter(pk__in=inventory_ids).update(**updates)
+
+    tags = [f"inventory:{pkid}" for pkid in inventory_ids]
+    if review.product_id:
+        tags.append(f"product:{review.product_id}")
+    # Las respuestas cacheadas se invalidan cuando la reseña ya es visible
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def review_created(review):
+    _apply(review, new_rating=review.rating)
+
+
+def review_updated(review, old_rating):
+    if old_rating != review.rating:
+        _apply(review, old_rating=old_rating, new_rating=review.rating)
+
+
+def review_deleted(review):
+    _apply(review, old_rating=review.rating)
+
+
+def rebuild_rating_summaries(model, queryset=None):
+    """
+    Recomputes the rating columns of ``model`` (``Product`` or ``Inventory``)
+    from ``Review`` with set-based UPDATEs. Returns the number of rows.
+    """
+    if model is Inventory:
+        reviewed = Q(inventory=OuterRef("pk")) | Q(
+            inventory__isnull=True, product=OuterRef("product")
+        )
+    else:
+        reviewed = Q(product=OuterRef("pk"))
+    # Un valor constante agrupa todas las reseñas de la fila en un solo total
+    reviews = (
+        Review.objects.filter(reviewed).order_by().annotate(row=Value(1)).values("row")
+    )
+
+    def aggregate(expression):
+        return Coalesce(
+            Subquery(reviews.annotate(value=expression).values("value")),
+            0,
+            output_field=IntegerField(),
+        )
+
+    updates = {
+        "rating_sum": aggregate(Sum("rating")),
+        "rating_count": aggregate(Count("pk")),
+    }
+    for star in RATING_STARS:
+        updates[f"rating_{star}"] = aggregate(Count("pk", filter=Q(rating=star)))
+
+    if queryset is None:
+        queryset = model.objects.all()
+    with transaction.atomic():
+        queryset.update(**updates)
+        return queryset.update(rating_avg=_average(F("rating_sum"), F("rating_count")))
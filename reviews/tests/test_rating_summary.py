@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from common.cache import get_tag_versions
+from common.testing import locmem_caches
+from inventory.models import Inventory
+from products.models import Product
+from reviews.models import Review
+from reviews.services import rebuild_rating_summaries
+
+User = get_user_model()
+
+
+@locmem_caches
+class RatingSummaryTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="product")
+        self.users = [
+            User.objects.create_user(
+                username=f"rater{i}", email=f"rater{i}@example.com", password="pass123"
+            )
+            for i in range(2)
+        ]
+        self.client = APIClient()
+
+    def url(self, action):
+        return f"/api/reviews/{action}-review/{self.product.id}"
+
+    def review_as(self, user, method, action, data=None):
+        self.client.force_authenticate(user)
+        return getattr(self.client, method)(
+            self.url(action), data, format="json", secure=True
+        )
+
+    def assertSummary(self, rating_sum, rating_count, rating_avg, histogram):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_sum, rating_sum)
+        self.assertEqual(self.product.rating_count, rating_count)
+        self.assertEqual(self.product.rating_avg, Decimal(rating_avg))
+        self.assertEqual(self.product.rating_histogram, histogram)
+
+    def test_create_update_and_delete_keep_summary_current(self):
+        create = {"rating": 5, "comment": "great"}
+        self.review_as(self.users[0], "post", "create", create)
+        self.review_as(self.users[1], "post", "create", {**create, "rating": 2})
+        self.assertSummary(7, 2, "3.50", {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+
+        self.review_as(self.users[1], "put", "update", {"review": 4, "comment": ""})
+        self.assertSummary(9, 2, "4.50", {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        self.review_as(self.users[0], "delete", "delete")
+        self.assertSummary(4, 1, "4.00", {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+        self.review_as(self.users[1], "delete", "delete")
+        self.assertSummary(0, 0, "0.00", {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+
+    def test_product_reviews_roll_up_to_its_inventories(self):
+        cache.clear()
+        inventories = [
+            Inventory.objects.create(
+                product=self.product,
+                retail_price=Decimal("10.00"),
+                store_price=Decimal("10.00"),
+            )
+            for _ in range(2)
+        ]
+        tags = [f"product:{self.product.pkid}"]
+        tags += [f"inventory:{inventory.pkid}" for inventory in inventories]
+        versions = get_tag_versions(tags)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review_as(
+                self.users[0], "post", "create", {"rating": 4, "comment": ""}
+            )
+
+        for inventory in inventories:
+            inventory.refresh_from_db()
+            self.assertEqual((inventory.rating_count, inventory.rating_avg), (1, 4))
+        self.assertEqual(set(Inventory.objects.top_rated()), set(inventories))
+        changed = get_tag_versions(tags)
+        self.assertTrue(all(changed[tag] != versions[tag] for tag in tags))
+
+        Inventory.objects.update(rating_count=0, rating_sum=0, rating_avg=0)
+        rebuild_rating_summaries(Inventory)
+        inventories[0].refresh_from_db()
+        self.assertEqual(inventories[0].rating_avg, Decimal("4.00"))
+
+    def test_rebuild_matches_reviews(self):
+        inventory = Inventory.objects.create(
+            product=self.product,
+            retail_price=Decimal("10.00"),
+            store_price=Decimal("10.00"),
+        )
+        for user, rating in zip(self.users, (3, 4), strict=True):
+            Review.objects.create(
+                rater=user, product=self.product, inventory=inventory, rating=rating
+            )
+
+        self.assertEqual(rebuild_rating_summaries(Product), 1)
+        rebuild_rating_summaries(Inventory)
+
+        self.assertSummary(7, 2, "3.50", {1: 0, 2: 0, 3: 1, 4: 1, 5: 0})
+        inventory.refresh_from_db()
+        self.assertEqual(inventory.rating_avg, Decimal("3.50"))
+        self.assertEqual(list(Inventory.objects.top_rated()), [inventory])
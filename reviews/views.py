@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.db import transaction
 from drf_spectacular.utils import extend_schema
 from rest_framework import permissions, status
 from rest_framework.response import Response
@@ -6,6 +7,7 @@ from rest_framework.views import APIView
 
 from products.models import Product
 
+from . import services
 from .models import Review
 from .serializers import UpdateProductReviewSerializer
 
@@ -137,9 +139,11 @@ class CreateProductReviewView(APIView):
                     status=status.HTTP_409_CONFLICT,
                 )
 
-            review = Review.objects.create(
-                rater=user, product=product, rating=rating, comment=comment
-            )
+            with transaction.atomic():
+                review = Review.objects.create(
+                    rater=user, product=product, rating=int(rating), comment=comment
+                )
+                services.review_created(review)
 
             if Review.objects.filter(rater=user, product=product).exists():
                 result["id"] = review.id
@@ -219,11 +223,17 @@ class UpdateProductReviewView(APIView):
                 )
 
             if Review.objects.filter(rater=user, product=product).exists():
-                Review.objects.filter(rater=user, product=product).update(
-                    review=review, comment=comment
-                )
+                with transaction.atomic():
+                    review_obj = Review.objects.select_for_update().get(
+                        rater=user, product=product
+                    )
+                    old_rating = review_obj.rating
+                    review_obj.rating = int(review)
+                    review_obj.comment = comment
+                    review_obj.save(update_fields=["rating", "comment", "updated_at"])
+                    services.review_updated(review_obj, old_rating)
 
-                review = Review.objects.get(rater=user, product=product)
+                review = review_obj
 
                 result["id"] = review.id
                 result["rating"] = review.rating
@@ -278,7 +288,12 @@ class DeleteProductReviewView(APIView):
             results = []
 
             if Review.objects.filter(rater=user, product=product).exists():
-                Review.objects.filter(rater=user, product=product).delete()
+                with transaction.atomic():
+                    for review in Review.objects.select_for_update().filter(
+                        rater=user, product=product
+                    ):
+                        review.delete()
+                        services.review_deleted(review)
 
                 reviews = Review.objects.order_by("-created_at").filter(product=product)
 